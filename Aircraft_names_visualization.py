@@ -1,81 +1,66 @@
 import plotly.graph_objects as go
 
+from cityscape_builder import build_cityscape_traces, grid_positions
+from cityscape_lod import use_lod, write_lod_cityscape
+from corpus_index import query_file_names, restrict_grouped
+from data_access import load_grouped_pdfs
+from figure_export import write_figure
+
 # Path to the aircraft names file
 file_path = "C:\\Users\\olaye\\Documents\\UARC\\Aircraft_names.txt"
+output_path = "C:\\Users\\olaye\\Documents\\UARC\\Aircraft_3D_Bar_With_PDFs.html"
 
-# Step 1: Parse aircraft names and PDFs
-def load_aircraft_data(file_path):
-    aircraft_data = {}
-    current_aircraft = None
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if not line.endswith('.pdf'):
-                current_aircraft = line.rstrip(':')
-                aircraft_data[current_aircraft] = []
-            else:
-                aircraft_data[current_aircraft].append(line)
-    return aircraft_data
-
-# Step 2: Create 3D bar blocks
-def create_bar(x, y, z, dx, dy, dz, color, hovertext):
-    x0, x1 = x, x + dx
-    y0, y1 = y, y + dy
-    z0, z1 = z, z + dz
-    vertices = [
-        [x0, y0, z0], [x1, y0, z0], [x1, y1, z0], [x0, y1, z0],
-        [x0, y0, z1], [x1, y0, z1], [x1, y1, z1], [x0, y1, z1],
-    ]
-    x_coords, y_coords, z_coords = zip(*vertices)
-    faces = [
-        [0, 1, 2], [0, 2, 3], [4, 5, 6], [4, 6, 7],
-        [0, 1, 5], [0, 5, 4], [1, 2, 6], [1, 6, 5],
-        [2, 3, 7], [2, 7, 6], [3, 0, 4], [3, 4, 7],
-    ]
-    i, j, k = zip(*faces)
-    return go.Mesh3d(
-        x=x_coords, y=y_coords, z=z_coords,
-        i=i, j=j, k=k,
-        color=color, opacity=0.85,
-        hovertext=hovertext,
-        hoverinfo="text"
-    )
+# Optional corpus_index query restricting the input PDFs, e.g. 'cause:fatigue AND "landing gear"'
+QUERY = None
+corpus_path = "C:\\Users\\olaye\\Documents\\UARC\\semantic_enriched_output_cleaned.json"
 
-# Step 3: Generate and render figure
-def generate_visualization(aircraft_data):
-    fig = go.Figure()
-    spacing = 5
+# Dashboard figure JSON + shared plotly.min.js (see figure_export.py / main_dashboard.html)
+figures_dir = "C:\\Users\\olaye\\Documents\\UARC\\figures"
 
-    for idx, (aircraft, pdfs) in enumerate(aircraft_data.items()):
-        x = (idx % 20) * spacing
-        y = (idx // 20) * spacing
-        z = 0
-        dx = dy = 1.8  # Size of cube base
-        dz = len(pdfs)  # Height = number of PDFs
+# Level of detail: True, False or "auto" (manufacturer overview above cityscape_lod.LOD_THRESHOLD aircraft)
+LOD = "auto"
+lod_dir = "C:\\Users\\olaye\\Documents\\UARC\\Aircraft_3D_Bar_LOD"
 
-        color = 'rgba(0, 0, 150, 0.8)'
-        hover_text = f"<b>{aircraft}</b><br>PDF Count: {dz}<br><br>PDF Files:<br>" + "<br>".join(pdfs)
-
-        fig.add_trace(create_bar(x, y, z, dx, dy, dz, color, hover_text))
+# Step 1: Generate and render figure
+def generate_visualization(aircraft_data):
+    names = list(aircraft_data)
+    x, y = grid_positions(len(names), columns=20, spacing=5)
+    dx = dy = 1.8  # Size of cube base
+    dz = [len(aircraft_data[a]) for a in names]  # Height = number of PDFs
+    hover_text = [
+        f"<b>{aircraft}</b><br>PDF Count: {len(pdfs)}<br><br>PDF Files:<br>" + "<br>".join(pdfs)
+        for aircraft, pdfs in aircraft_data.items()
+    ]
 
-    fig.update_layout(
+    color = 'rgba(0, 0, 150, 0.8)'
+    layout = dict(
         scene=dict(
             xaxis=dict(visible=False),
             yaxis=dict(visible=False),
             zaxis=dict(title='Number of PDFs'),
             aspectratio=dict(x=2, y=2, z=0.7)
         ),
-        title="Interactive Aircraft PDF Visualization",
         margin=dict(l=0, r=0, b=0, t=40),
         showlegend=False
     )
+    title = "Interactive Aircraft PDF Visualization"
+
+    # Too many aircraft for one scene: manufacturer overview + drill-down pages
+    if use_lod(LOD, len(names)):
+        overview = write_lod_cityscape(lod_dir, names, dz, dx, color, hover_text,
+                                       title=title, layout=layout, opacity=0.85,
+                                       figure_path=output_path, figures_dir=figures_dir)
+        print(f"✅ LOD visualization saved to: {overview} (overview also in {output_path})")
+        return
+
+    fig = go.Figure(build_cityscape_traces(x, y, dx, dy, dz, hover_text, color=color, opacity=0.85))
+    fig.update_layout(title=title, **layout)
 
-    output_path = "C:\\Users\\olaye\\Documents\\UARC\\Aircraft_3D_Bar_With_PDFs.html"
-    fig.write_html(output_path)
+    write_figure(fig, output_path, figures_dir)
     print(f"✅ Visualization saved to: {output_path}")
 
-# Run it
-aircraft_data = load_aircraft_data(file_path)
+# Run it (aircraft/PDF listing is parsed once and cached by data_access)
+aircraft_data = load_grouped_pdfs(file_path)
+if QUERY:
+    aircraft_data = restrict_grouped(aircraft_data, query_file_names(QUERY, corpus_path))
 generate_visualization(aircraft_data)
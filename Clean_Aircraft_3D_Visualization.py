@@ -1,22 +1,35 @@
 import plotly.graph_objects as go
-import pandas as pd
-import json
-from collections import defaultdict
+import numpy as np
 
-# Load your JSON dataset
-with open("C:\\Users\\olaye\\Documents\\UARC\\final_extracted_data.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+from cityscape_builder import grid_positions, wireframe_stack_arrays
+from corpus_index import query_file_names
+from corpus_model import load_corpus
+from figure_export import write_figure
 
-# Prepare the dataframe
-df = pd.DataFrame(data)
-df['aircraft'] = df['Flight Information'].apply(lambda x: x.get('Aircraft') if isinstance(x, dict) else None)
-df['pdf'] = df['File Name']
+# "batched" draws every stacked outline in one NaN-separated line trace;
+# "per_layer" keeps the original one-Scatter3d-per-PDF rendering.
+STACK_MODE = "batched"
 
-# Group PDFs by aircraft
-aircraft_to_pdfs = defaultdict(list)
-for _, row in df.iterrows():
-    if row['aircraft'] and row['pdf']:
-        aircraft_to_pdfs[row['aircraft']].append(row['pdf'])
+# Optional corpus_index query restricting the input PDFs, e.g. 'cause:fatigue AND "landing gear"'
+QUERY = None
+corpus_path = "C:\\Users\\olaye\\Documents\\UARC\\semantic_enriched_output_cleaned.json"
+
+# Dashboard figure JSON + shared plotly.min.js (see figure_export.py / main_dashboard.html)
+figures_dir = "C:\\Users\\olaye\\Documents\\UARC\\figures"
+
+# Load your JSON dataset (parsed once, then served from the columnar cache)
+data_path = "C:\\Users\\olaye\\Documents\\UARC\\final_extracted_data.json"
+corpus = load_corpus(data_path)
+
+# Prepare the dataframe (categorical aircraft column, no nested dicts)
+df = corpus.frame()
+df['pdf'] = df['file_name']
+
+# Group PDFs by aircraft (first-seen order, same as the original dict build)
+valid = df[df['aircraft'].notna() & df['pdf'].astype(bool)]
+if QUERY:
+    valid = valid[valid['pdf'].isin(query_file_names(QUERY, corpus_path))]
+aircraft_to_pdfs = valid.groupby('aircraft', sort=False, observed=True)['pdf'].agg(list)
 
 # Set up 3D plot
 fig = go.Figure()
@@ -25,30 +38,49 @@ grid_width = 20
 opacity = 0.3
 color = 'rgba(0, 100, 255, 0.7)'
 
-aircraft_list = list(aircraft_to_pdfs.keys())
+aircraft_list = aircraft_to_pdfs.index.tolist()
+counts = aircraft_to_pdfs.str.len().to_numpy()
+xs, ys = grid_positions(len(aircraft_list), columns=grid_width, spacing=spacing)
 
-for idx, aircraft in enumerate(aircraft_list):
-    col = idx % grid_width
-    row = idx // grid_width
-    x = col * spacing
-    y = row * spacing
-    pdfs = aircraft_to_pdfs[aircraft]
-    count = len(pdfs)
+# Hover text is built once per aircraft, not once per layer
+hover_texts = []
+for aircraft, pdfs in aircraft_to_pdfs.items():
+    hover_text = f"<b>{aircraft}</b><br>PDF Count: {len(pdfs)}<br><br>Files:<br>" + "<br>".join(pdfs[:20])
+    if len(pdfs) > 20:
+        hover_text += "<br>...and more"
+    hover_texts.append(hover_text)
 
-    for z in range(count):
-        hover_text = f"<b>{aircraft}</b><br>PDF Count: {count}<br><br>Files:<br>" + "<br>".join(pdfs[:20])
-        if len(pdfs) > 20:
-            hover_text += "<br>...and more"
-        fig.add_trace(go.Scatter3d(
-            x=[x, x+1, x+1, x, x],
-            y=[y, y, y+1, y+1, y],
-            z=[z]*5,
-            mode='lines',
-            line=dict(color=color, width=2),
-            opacity=opacity,
-            hoverinfo='text',
-            text=hover_text
-        ))
+if STACK_MODE == "batched":
+    lx, ly, lz = wireframe_stack_arrays(xs, ys, counts, size=1)
+    fig.add_trace(go.Scatter3d(
+        x=lx, y=ly, z=lz,
+        mode='lines',
+        line=dict(color=color, width=2),
+        opacity=opacity,
+        hoverinfo='skip'
+    ))
+    # One hover anchor per aircraft at the centre of its top layer
+    fig.add_trace(go.Scatter3d(
+        x=xs + 0.5, y=ys + 0.5, z=np.maximum(counts - 1, 0),
+        mode='markers',
+        marker=dict(color=color, size=3),
+        opacity=opacity,
+        hoverinfo='text',
+        text=hover_texts
+    ))
+else:
+    for x, y, count, hover_text in zip(xs, ys, counts, hover_texts):
+        for z in range(count):
+            fig.add_trace(go.Scatter3d(
+                x=[x, x+1, x+1, x, x],
+                y=[y, y, y+1, y+1, y],
+                z=[z]*5,
+                mode='lines',
+                line=dict(color=color, width=2),
+                opacity=opacity,
+                hoverinfo='text',
+                text=hover_text
+            ))
 
 # Final layout
 fig.update_layout(
@@ -68,5 +100,5 @@ fig.update_layout(
 
 # Save to interactive HTML file
 output_path = "C:\\Users\\olaye\\Documents\\UARC\\Clean_Aircraft_3D_Visualization.html"
-fig.write_html(output_path)
+write_figure(fig, output_path, figures_dir)
 print(f"✅ Visualization saved to: {output_path}")
@@ -1,64 +1,34 @@
 import plotly.graph_objects as go
 
+from cityscape_builder import build_cityscape_traces, grid_positions
+from corpus_index import query_file_names, restrict_grouped
+from data_access import load_grouped_pdfs
+from figure_export import write_figure
+
 # Path to the aircraft names file
 file_path = "C:\\Users\\olaye\\Documents\\UARC\\Injuries.txt"
+output_path = "C:\\Users\\olaye\\Documents\\UARC\\Imjuries_3D_Bar_With_PDFs.html"
 
-# Step 1: Parse aircraft names and PDFs
-def load_aircraft_data(file_path):
-    aircraft_data = {}
-    current_aircraft = None
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if not line.endswith('.pdf'):
-                current_aircraft = line.rstrip(':')
-                aircraft_data[current_aircraft] = []
-            else:
-                aircraft_data[current_aircraft].append(line)
-    return aircraft_data
+# Optional corpus_index query restricting the input PDFs, e.g. 'cause:fatigue AND "landing gear"'
+QUERY = None
+corpus_path = "C:\\Users\\olaye\\Documents\\UARC\\semantic_enriched_output_cleaned.json"
 
-# Step 2: Create 3D bar blocks
-def create_bar(x, y, z, dx, dy, dz, color, hovertext):
-    x0, x1 = x, x + dx
-    y0, y1 = y, y + dy
-    z0, z1 = z, z + dz
-    vertices = [
-        [x0, y0, z0], [x1, y0, z0], [x1, y1, z0], [x0, y1, z0],
-        [x0, y0, z1], [x1, y0, z1], [x1, y1, z1], [x0, y1, z1],
-    ]
-    x_coords, y_coords, z_coords = zip(*vertices)
-    faces = [
-        [0, 1, 2], [0, 2, 3], [4, 5, 6], [4, 6, 7],
-        [0, 1, 5], [0, 5, 4], [1, 2, 6], [1, 6, 5],
-        [2, 3, 7], [2, 7, 6], [3, 0, 4], [3, 4, 7],
-    ]
-    i, j, k = zip(*faces)
-    return go.Mesh3d(
-        x=x_coords, y=y_coords, z=z_coords,
-        i=i, j=j, k=k,
-        color=color, opacity=0.85,
-        hovertext=hovertext,
-        hoverinfo="text"
-    )
+# Dashboard figure JSON + shared plotly.min.js (see figure_export.py / main_dashboard.html)
+figures_dir = "C:\\Users\\olaye\\Documents\\UARC\\figures"
 
-# Step 3: Generate and render figure
+# Step 1: Generate and render figure
 def generate_visualization(aircraft_data):
-    fig = go.Figure()
-    spacing = 5
-
-    for idx, (aircraft, pdfs) in enumerate(aircraft_data.items()):
-        x = (idx % 20) * spacing
-        y = (idx // 20) * spacing
-        z = 0
-        dx = dy = 1.8  # Size of cube base
-        dz = len(pdfs)  # Height = number of PDFs
-
-        color = 'rgba(255, 165, 0, 0.8)'
-        hover_text = f"<b>{aircraft}</b><br>PDF Count: {dz}<br><br>PDF Files:<br>" + "<br>".join(pdfs)
+    names = list(aircraft_data)
+    x, y = grid_positions(len(names), columns=20, spacing=5)
+    dx = dy = 1.8  # Size of cube base
+    dz = [len(aircraft_data[a]) for a in names]  # Height = number of PDFs
+    hover_text = [
+        f"<b>{aircraft}</b><br>PDF Count: {len(pdfs)}<br><br>PDF Files:<br>" + "<br>".join(pdfs)
+        for aircraft, pdfs in aircraft_data.items()
+    ]
 
-        fig.add_trace(create_bar(x, y, z, dx, dy, dz, color, hover_text))
+    color = 'rgba(255, 165, 0, 0.8)'
+    fig = go.Figure(build_cityscape_traces(x, y, dx, dy, dz, hover_text, color=color, opacity=0.85))
 
     fig.update_layout(
         scene=dict(
@@ -72,10 +42,11 @@ def generate_visualization(aircraft_data):
         showlegend=False
     )
 
-    output_path = "C:\\Users\\olaye\\Documents\\UARC\\Imjuries_3D_Bar_With_PDFs.html"
-    fig.write_html(output_path)
+    write_figure(fig, output_path, figures_dir)
     print(f"✅ Visualization saved to: {output_path}")
 
-# Run it
-aircraft_data = load_aircraft_data(file_path)
+# Run it (aircraft/PDF listing is parsed once and cached by data_access)
+aircraft_data = load_grouped_pdfs(file_path)
+if QUERY:
+    aircraft_data = restrict_grouped(aircraft_data, query_file_names(QUERY, corpus_path))
 generate_visualization(aircraft_data)
@@ -6,108 +6,331 @@ Full end‑to‑end pipeline that
 1. Cleans and tokenises aviation accident narratives while preserving
    hyphenated aircraft models (e.g. "Boeing-747") and other critical terms.
 2. Builds dynamic low‑ and high‑frequency stop‑lists to filter noise or
-   over‑represented generic words.
+   over‑represented generic words (on top of NLTK's English stopwords, read
+   from the copy bundled as nltk_stopwords_english.txt – no download).
+   Keywords are filtered in ``KEYWORD_WORKERS`` processes (keywords.py);
+   each worker gets the frozen stop‑list once through the pool initializer.
 3. Runs spaCy (with the **en_core_web_md** model) to extract aircraft,
    damage descriptions, causes, and locations using NER + pattern rules.
+   Documents are streamed through ``nlp.pipe`` in batches (optionally in
+   several processes) with the components the rules don't use disabled.
 4. Outputs the enriched results as a full JSON file.
+
+With ``INCREMENTAL`` enabled, a state file next to the output keeps a
+fingerprint and the cleaned tokens of every ``File Name`` plus the corpus
+token counts; it is discarded when the tokenizer, the stop-list file or
+the extraction rules it was built with change.  Later runs clean and NER-process only new or changed
+records, apply the count deltas, and refresh keyword lists only for
+documents containing a token whose stop-list membership flipped.
+
+With ``STREAMING`` enabled the input is read one record at a time (JSON array
+or JSON Lines) in two passes – token counts first, then NER + keywords – and
+the output is written as JSON Lines, so memory does not grow with the corpus.
 """
 
-import json, re, itertools, collections, pathlib
+import json, re, itertools, collections, pathlib, time, hashlib
 import pandas as pd
 
+import keywords
+
+from data_access import load_records
+from instrumentation import span
+from json_stream import iter_records, jsonl_path, write_jsonl
+
 # ── CONFIG ─────────────────────────────────────────────
 FILE_PATH = r"C:\\Users\\olaye\\Documents\\UARC\\final_extracted_data.json"
 OUTPUT_JSON = r"C:\\Users\\olaye\\Documents\\UARC\\semantic_enriched_output.json"
+STATE_JSON = OUTPUT_JSON + ".state.json"   # fingerprints + token counts for incremental runs
+INCREMENTAL = True
+STREAMING = False   # two passes over the input, one record at a time, JSON Lines output
+OUTPUT_JSONL = str(jsonl_path(OUTPUT_JSON))
 LOW_FREQ_THRESHOLD = 2
 HIGH_FREQ_DOC_RATIO = 0.90
+STOP_WORDS_FILE = pathlib.Path(__file__).with_name("nltk_stopwords_english.txt")   # nltk.corpus.stopwords 'english'
+KEYWORD_WORKERS = None    # keyword filtering processes (None = one per CPU, 1 = serial)
+KEYWORD_CHUNK = 2000      # documents per keyword task
 
 # ── CLEANING ───────────────────────────────────────────
-MODEL_PAT   = r'\b[A-Z][a-zA-Z]+-\d+\b'
-COMPOUND_PAT = r'\b\w+-\w+\b'
-PRESERVE_RE  = re.compile(f'(?:{MODEL_PAT}|{COMPOUND_PAT})')
+# A token is a run of word characters and hyphens, so hyphenated models
+# ("Boeing-747") and compounds ("nose-down") survive without a mask/unmask step.
+TOKEN_RE     = re.compile(r'[\w-]+')
 
 def clean_text(text: str) -> str:
-    protected = {}
-    def _mask(match):
-        key = f"__TOK{len(protected)}__"
-        protected[key] = match.group(0)
-        return key
-    text_masked = PRESERVE_RE.sub(_mask, text)
-    text_clean = re.sub(r'[^\w\s-]', ' ', text_masked).lower()
-    for key, original in protected.items():
-        text_clean = text_clean.replace(key.lower(), original.lower())
-    return re.sub(r'\s+', ' ', text_clean).strip()
+    return " ".join(TOKEN_RE.findall(text)).lower()
+
+def clean_texts(texts) -> list:
+    """``clean_text`` for a whole column (a single ``findall`` per document, no masking)."""
+    findall = TOKEN_RE.findall
+    return [" ".join(findall(t)).lower() for t in texts]
+
+def count_terms(docs, counts=None):
+    """Token counts of cleaned ``docs``, accumulated one document at a time."""
+    counts = collections.Counter() if counts is None else counts
+    for doc in docs:
+        counts.update(doc.split())
+    return counts
 
 # ── FREQUENCY FILTER ───────────────────────────────────
-def build_frequency_filters(docs, low_th=LOW_FREQ_THRESHOLD, high_ratio=HIGH_FREQ_DOC_RATIO):
-    from nltk.corpus import stopwords
-    import nltk; nltk.download('stopwords', quiet=True)
-    stop_words = set(stopwords.words('english'))
-    all_tokens = list(itertools.chain.from_iterable(doc.split() for doc in docs))
-    freq = collections.Counter(all_tokens)
+def load_stop_words(path=STOP_WORDS_FILE):
+    with open(path, encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+def filters_from_counts(freq, n_docs, stop_words, low_th=LOW_FREQ_THRESHOLD, high_ratio=HIGH_FREQ_DOC_RATIO):
     low_freq  = {tok for tok, c in freq.items() if c < low_th}
-    high_freq = {tok for tok, c in freq.items() if c > high_ratio * len(docs)}
+    high_freq = {tok for tok, c in freq.items() if c > high_ratio * n_docs}
     return stop_words | low_freq | high_freq
 
+def build_frequency_filters(docs, low_th=LOW_FREQ_THRESHOLD, high_ratio=HIGH_FREQ_DOC_RATIO):
+    stop_words = load_stop_words()
+    freq = count_terms(docs)
+    return filters_from_counts(freq, len(docs), stop_words, low_th, high_ratio)
+
+# ── KEYWORDS ───────────────────────────────────────────
+def keywords_per_doc(docs, filter_set, workers=KEYWORD_WORKERS, chunk_size=KEYWORD_CHUNK):
+    """``keywords.keywords_per_doc`` with this stage's worker settings."""
+    return keywords.keywords_per_doc(docs, filter_set, workers=workers, chunk_size=chunk_size)
+
 # ── SPACY EXTRACTION ───────────────────────────────────
 import spacy
 
-try:
-    nlp = spacy.load("en_core_web_md")
-except OSError:
-    print("[INFO] en_core_web_md not found. Downloading...")
-    import subprocess
-    subprocess.run(["python", "-m", "spacy", "download", "en_core_web_md"], check=True)
-    nlp = spacy.load("en_core_web_md")
+SPACY_MODEL    = "en_core_web_md"
+NLP_BATCH_SIZE = 64
+NLP_N_PROCESS  = 1        # >1 runs nlp.pipe in that many worker processes
+USE_SENTER     = False    # opt-in: faster "senter" sentences instead of the parser's (boundaries, and so notes, can differ)
+# The rules below only read doc.ents and doc.sents
+UNUSED_PIPES   = ("tagger", "attribute_ruler", "lemmatizer")
 
-def extract_entities(text):
-    doc = nlp(text)
+ENT_LABELS = ("ORG", "GPE", "DATE", "PRODUCT")
+
+# All sentence rules in one pass; the group name says which rule fired
+SENTENCE_RULES_RE = re.compile(
+    r'(?P<aircraft>\b(?:boeing|cessna|piper|airbus|beech|lancair|ryan|douglas)\b)'
+    r'|(?P<damage>damage|substantial)'
+    r'|(?P<cause>\b(?:failure|stall|loss of engine|loss of control|fatigue)\b)'
+)
+SENTENCE_RULES = ("aircraft", "damage", "cause")
+
+_nlp = None
+
+def load_nlp(model=SPACY_MODEL, use_senter=USE_SENTER):
+    exclude = list(UNUSED_PIPES) + (["parser"] if use_senter else [])
+    try:
+        nlp = spacy.load(model, exclude=exclude)
+    except OSError:
+        print(f"[INFO] {model} not found. Downloading...")
+        import subprocess, sys
+        subprocess.run([sys.executable, "-m", "spacy", "download", model], check=True)
+        nlp = spacy.load(model, exclude=exclude)
+    if use_senter and "senter" in nlp.disabled:
+        nlp.enable_pipe("senter")
+    return nlp
+
+def get_nlp():
+    """The shared pipeline, loaded on first use (not at import time)."""
+    global _nlp
+    if _nlp is None:
+        _nlp = load_nlp()
+    return _nlp
+
+def entities_from_doc(doc):
     ents = collections.defaultdict(list)
     for ent in doc.ents:
-        if ent.label_ in ("ORG", "GPE", "DATE", "PRODUCT"):
+        if ent.label_ in ENT_LABELS:
             ents[ent.label_].append(ent.text)
     for sent in doc.sents:
         s = sent.text.strip()
-        low = s.lower()
-        if re.search(r'\b(boeing|cessna|piper|airbus|beech|lancair|ryan|douglas)\b', low):
-            ents["aircraft"].append(s)
-        if "damage" in low or "substantial" in low:
-            ents["damage"].append(s)
-        if re.search(r'\b(failure|stall|loss of engine|loss of control|fatigue)\b', low):
-            ents["cause"].append(s)
+        fired = {m.lastgroup for m in SENTENCE_RULES_RE.finditer(s.lower())}
+        for rule in SENTENCE_RULES:
+            if rule in fired:
+                ents[rule].append(s)
     return {k: list(dict.fromkeys(v)) for k, v in ents.items()}
 
-# ── MAIN PIPELINE ──────────────────────────────────────
-def main():
-    with open(FILE_PATH, encoding="utf-8") as f:
-        raw = json.load(f)
+def extract_entities(text):
+    return entities_from_doc(get_nlp()(text))
 
-    filtered_items = [item for item in raw if item.get("Analysis") not in (None, "Not found")]
+def extract_entities_batch(texts, batch_size=NLP_BATCH_SIZE, n_process=NLP_N_PROCESS):
+    """Yield ``extract_entities`` results for ``texts`` using ``nlp.pipe``."""
+    for doc in get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process):
+        yield entities_from_doc(doc)
+
+# ── OUTPUT ENTRIES ─────────────────────────────────────
+def build_entry(item, ent, kw):
+    aircraft_text = item.get("Flight Information", {}).get("Aircraft", "")
+    return {
+        "file_name"    : item["File Name"],
+        "aircraft"     : list(set(ent.get("aircraft", []) + [aircraft_text] if aircraft_text else ent.get("aircraft", []))),
+        "damage_notes" : ent.get("damage", []),
+        "cause_notes"  : ent.get("cause", []),
+        "keywords"     : kw
+    }
+
+def run_ner(analyses):
+    t0 = time.perf_counter()
+    with span("ner", records=len(analyses)):
+        entities = list(extract_entities_batch(analyses))
+    elapsed = time.perf_counter() - t0
+    print(f"[i] NER: {len(analyses)} docs in {elapsed:.1f}s ({len(analyses) / max(elapsed, 1e-9):.1f} docs/sec)")
+    return entities
+
+def write_output(output):
+    with span("write_json", records=len(output)), open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"[✔] Output written to {OUTPUT_JSON}")
+
+# ── INCREMENTAL STATE ──────────────────────────────────
+def fingerprint(item):
+    """Hash of everything an output entry is derived from (Analysis + aircraft)."""
+    aircraft_text = item.get("Flight Information", {}).get("Aircraft", "")
+    payload = json.dumps([item["Analysis"], aircraft_text], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+STATE_VERSION = 2
+
+def state_signature():
+    """Hash of everything besides a record that its keywords and notes depend on."""
+    payload = json.dumps([TOKEN_RE.pattern, sorted(load_stop_words()), SENTENCE_RULES_RE.pattern,
+                          list(ENT_LABELS), SPACY_MODEL, USE_SENTER])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def save_state(docs, counts, n_docs):
+    state = {
+        "version"   : STATE_VERSION,
+        "signature" : state_signature(),
+        "low_th"    : LOW_FREQ_THRESHOLD,
+        "high_ratio": HIGH_FREQ_DOC_RATIO,
+        "n_docs"    : n_docs,
+        "counts"    : dict(counts),
+        "docs"      : docs,
+    }
+    with open(STATE_JSON, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+
+def load_state():
+    """Previous state and output keyed by file name, or ``None`` if a full run is needed."""
+    state_path, output_path = pathlib.Path(STATE_JSON), pathlib.Path(OUTPUT_JSON)
+    if not (state_path.exists() and output_path.exists()):
+        return None
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("low_th") != LOW_FREQ_THRESHOLD or state.get("high_ratio") != HIGH_FREQ_DOC_RATIO:
+        return None
+    if state.get("version") != STATE_VERSION or state.get("signature") != state_signature():
+        return None     # tokenizer, stop-list or extraction rules changed: rebuild everything
+    with open(output_path, encoding="utf-8") as f:
+        previous = {e["file_name"]: e for e in json.load(f)}
+    if set(previous) != set(state["docs"]):
+        return None
+    return state, previous
+
+# ── MAIN PIPELINE ──────────────────────────────────────
+def run_full(filtered_items):
     analyses = [item["Analysis"] for item in filtered_items]
-    cleaned = [clean_text(a) for a in analyses]
-    filter_set = build_frequency_filters(cleaned)
+    with span("clean", records=len(analyses)):
+        cleaned = clean_texts(analyses)
+        filter_set = build_frequency_filters(cleaned)
+    with span("keywords", records=len(cleaned)):
+        keyword_lists = keywords_per_doc(cleaned, filter_set)
+    entities = run_ner(analyses)
+
+    output = [build_entry(item, ent, kw) for item, ent, kw in zip(filtered_items, entities, keyword_lists)]
+    write_output(output)
+
+    docs = {
+        item["File Name"]: {"fp": fingerprint(item), "tokens": doc.split()}
+        for item, doc in zip(filtered_items, cleaned)
+    }
+    counts = collections.Counter(itertools.chain.from_iterable(d["tokens"] for d in docs.values()))
+    save_state(docs, counts, len(filtered_items))
+
+def run_incremental(filtered_items, state, previous):
+    docs = state["docs"]
+    counts = collections.Counter(state["counts"])
+    stop_words = load_stop_words()
+    old_filter = filters_from_counts(counts, state["n_docs"], stop_words)
+
+    current = {item["File Name"]: item for item in filtered_items}
+    changed = [name for name, item in current.items()
+               if name not in docs or docs[name]["fp"] != fingerprint(item)]
+    removed = [name for name in docs if name not in current]
+
+    # Counter deltas: take out the old tokens of changed/removed docs, add the new ones
+    for name in removed + changed:
+        if name in docs:
+            counts.subtract(docs.pop(name)["tokens"])
+    with span("clean", records=len(changed)):
+        for name, doc in zip(changed, clean_texts(current[name]["Analysis"] for name in changed)):
+            docs[name] = {"fp": fingerprint(current[name]), "tokens": doc.split()}
+            counts.update(docs[name]["tokens"])
+        counts = +counts   # drop tokens whose count fell to zero
+
+    new_filter = filters_from_counts(counts, len(current), stop_words)
+    flipped = old_filter ^ new_filter
+    refresh = {name for name, d in docs.items() if name not in changed and not flipped.isdisjoint(d["tokens"])}
 
-    keywords_per_doc = [
-        [t for t in doc.split() if t not in filter_set] for doc in cleaned
-    ]
-    entities = [extract_entities(a) for a in analyses]
+    rekey = changed + sorted(refresh)
+    with span("keywords", records=len(rekey)):
+        keyword_lists = dict(zip(rekey, keywords_per_doc([" ".join(docs[name]["tokens"]) for name in rekey], new_filter)))
+    entities = dict(zip(changed, run_ner([current[name]["Analysis"] for name in changed])))
 
     output = []
-    for item, ent, kw in zip(filtered_items, entities, keywords_per_doc):
-        aircraft_text = item.get("Flight Information", {}).get("Aircraft", "")
-        entry = {
-            "file_name"    : item["File Name"],
-            "aircraft"     : list(set(ent.get("aircraft", []) + [aircraft_text] if aircraft_text else ent.get("aircraft", []))),
-            "damage_notes" : ent.get("damage", []),
-            "cause_notes"  : ent.get("cause", []),
-            "keywords"     : kw
-        }
-        output.append(entry)
-
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    for name, item in current.items():
+        if name in entities:
+            output.append(build_entry(item, entities[name], keyword_lists[name]))
+        elif name in refresh:
+            entry = dict(previous[name])
+            entry["keywords"] = keyword_lists[name]
+            output.append(entry)
+        else:
+            output.append(previous[name])
 
-    print(f"[✔] Output written to {OUTPUT_JSON}")
+    print(f"[i] Incremental: {len(changed)} new/changed, {len(removed)} removed, "
+          f"{len(flipped)} stop-list flips, {len(refresh)} keyword lists refreshed")
+    write_output(output)
+    save_state(docs, counts, len(current))
+
+def iter_analysis_items(path):
+    for item in iter_records(path):
+        if item.get("Analysis") not in (None, "Not found"):
+            yield item
+
+def run_streaming():
+    # Pass 1: corpus-wide token counts (the only state kept across records)
+    counts = collections.Counter()
+    n_docs = 0
+    with span("clean") as s:
+        for item in iter_analysis_items(FILE_PATH):
+            counts.update(clean_text(item["Analysis"]).split())
+            n_docs += 1
+        s.records = n_docs
+    filter_set = filters_from_counts(counts, n_docs, load_stop_words())
+    del counts
+
+    # Pass 2: NER through nlp.pipe batches, one output line per record
+    def entries():
+        texts = ((item["Analysis"], item) for item in iter_analysis_items(FILE_PATH))
+        for doc, item in get_nlp().pipe(texts, as_tuples=True, batch_size=NLP_BATCH_SIZE, n_process=NLP_N_PROCESS):
+            kw = [t for t in clean_text(item["Analysis"]).split() if t not in filter_set]
+            yield build_entry(item, entities_from_doc(doc), kw)
+
+    with span("ner") as s:
+        written = s.records = write_jsonl(OUTPUT_JSONL, entries())
+    print(f"[✔] {written} records streamed to {OUTPUT_JSONL}")
+
+def main():
+    if STREAMING:
+        run_streaming()
+        return
+
+    raw = load_records(FILE_PATH)
+
+    filtered_items = [item for item in raw if item.get("Analysis") not in (None, "Not found")]
+
+    names = [item["File Name"] for item in filtered_items]
+    loaded = load_state() if INCREMENTAL and len(set(names)) == len(names) else None
+    if loaded is None:
+        run_full(filtered_items)
+    else:
+        run_incremental(filtered_items, *loaded)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,398 @@
+"""
+aggregate_cube.py
+─────────────────
+Materialised aggregate layer: a small OLAP-style count cube over every
+(aircraft, pdf) pair of Aircraft_names.txt, so the visualisations slice
+counts instead of rescanning records.
+
+Dimensions
+  aircraft  header of Aircraft_names.txt
+  model     ``Flight Information.Aircraft_model`` of the extracted corpus
+  injury    Injuries.txt category  (level via severity.map_injury_level)
+  damage    Aircraft Damage.txt category  (level via severity.map_damage_level)
+  themes    set of similarity themes listing the aircraft
+            (aircraft_by_similarity_theme.json); one coordinate per distinct
+            set, so a report in several themes is still counted once
+  month     ``YYYY-MM`` of the accident date (incident_timeline.load_timeline)
+
+Injury and damage keep the raw categories rather than the 0–4 / 1–3 scores:
+a set's score depends on which categories it holds (an exact "Unknown"
+overrides everything), which summed scores could not reproduce.
+``severity.set_levels`` scores any rollup row exactly.
+
+Facts are joined column-wise (``fact_frame``): the grouped .txt files as
+header codes, injury / damage / model / month attached by vectorised left
+merges on the pdf name, so building from millions of pairs takes seconds.
+
+Storage
+  Non-empty cells as a sparse COO table (int32 coordinates + int64 counts)
+  and the rollups in ``ROLLUPS`` as dense int64 arrays, all saved as
+  ``.npy`` under ``.rita_cache/<Aircraft_names.txt>.cube/`` and opened with
+  ``mmap_mode="r"``.  A precomputed rollup is an array lookup; other
+  group-bys and filtered slices reduce the non-empty cells, never records.
+  Coordinates are append-only, so ``Cube.add`` grows every array in place
+  with only the new facts; ``open_cube`` does that when reports were only
+  added to the sources and rebuilds otherwise.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_access import _file_sha1, _save_arrays, _string_arrays, _string_column, cache_dir_for, load_grouped_columns
+from incident_timeline import load_timeline
+from severity import UNKNOWN
+
+DIMENSIONS = ("aircraft", "model", "injury", "damage", "themes", "month")
+ROLLUPS = (
+    ("aircraft",),
+    ("aircraft", "injury"),
+    ("aircraft", "damage"),
+    ("aircraft", "month"),
+    ("injury", "damage"),
+    ("themes", "month"),
+    ("model",),
+    ("month",),
+)
+THEME_SEP = " | "
+CUBE_VERSION = 1
+
+
+# ── FACTS ──────────────────────────────────────────────
+def _listing(path):
+    """``(pdfs, blocks, header_codes, labels)`` of a grouped .txt file, headers factorised in first-seen order."""
+    headers, pdfs, pdf_block = load_grouped_columns(path)
+    header_codes, labels = pd.factorize(np.asarray(headers.tolist(), dtype=object))
+    return np.asarray(pdfs.tolist(), dtype=object), np.asarray(pdf_block), header_codes, list(labels)
+
+
+def _left_join(pdfs, table, default):
+    """``table``'s other columns for every pdf (``default`` where unlisted); the last row of a repeated pdf wins."""
+    table = table.drop_duplicates("pdf", keep="last")
+    joined = pd.DataFrame({"pdf": pdfs}).merge(table, on="pdf", how="left", sort=False)
+    return [joined[column].fillna(default).to_numpy() for column in table.columns if column != "pdf"]
+
+
+def category_codes(pdfs, path):
+    """
+    ``(codes, labels)``: the Injuries.txt / Aircraft Damage.txt category of
+    each pdf in ``pdfs`` – columnar ``load_category_map(path).get(pdf) or
+    "Unknown"``, one merge instead of a dict lookup per pdf.
+    """
+    listed, blocks, header_codes, labels = _listing(path)
+    label_codes, uniques = pd.factorize(np.asarray([label or UNKNOWN for label in labels] + [UNKNOWN], dtype=object))
+    unknown = label_codes[-1]
+    codes = label_codes[np.append(header_codes, len(labels))[blocks]]      # block -1 → "Unknown"
+    codes, = _left_join(pdfs, pd.DataFrame({"pdf": listed, "code": codes}), unknown)
+    return codes.astype(np.int64), list(uniques)
+
+
+def _pdf_attributes(pdfs, extracted_path):
+    """``(models, months)`` of ``pdfs`` from the extracted corpus's cached timeline."""
+    if not extracted_path:
+        unknown = np.full(len(pdfs), UNKNOWN, dtype=object)
+        return unknown, unknown
+    timeline, _ = load_timeline(extracted_path)
+    month_codes, months = pd.factorize(timeline["date"].dt.to_period("M"))      # format each month once
+    months = np.append(months.strftime("%Y-%m").to_numpy(dtype=object), UNKNOWN)
+    table = pd.DataFrame({
+        "pdf": timeline["file_name"].to_numpy(dtype=object),
+        "model": timeline["model"].astype(object).fillna(UNKNOWN).to_numpy(),
+        "month": months[month_codes],
+    })
+    return _left_join(pdfs, table, UNKNOWN)
+
+
+def _aircraft_themes(themes_path):
+    """``{aircraft: "theme a | theme b"}`` from aircraft_by_similarity_theme.json."""
+    if not themes_path:
+        return {}
+    with open(themes_path, "r", encoding="utf-8") as f:
+        theme_aircraft = json.load(f)
+    themes = {}
+    for theme in sorted(theme_aircraft):
+        for aircraft in theme_aircraft[theme]:
+            themes.setdefault(aircraft, []).append(theme)
+    return {aircraft: THEME_SEP.join(names) for aircraft, names in themes.items()}
+
+
+def fact_frame(aircraft_names_path, injury_path, damage_path, extracted_path=None, themes_path=None,
+               file_names=None):
+    """
+    Every listed (aircraft, pdf) pair as a row: ``pdf`` plus one categorical
+    column per ``DIMENSIONS`` label, aircraft in first-seen header order as
+    ``load_grouped_pdfs`` lists them.  ``file_names`` restricts the pdfs.
+    """
+    pdfs, blocks, header_codes, aircraft = _listing(aircraft_names_path)
+    # A repeated header restarts its list (load_grouped_pdfs): keep each header's last block only
+    last = np.full(len(aircraft), -1)
+    np.maximum.at(last, header_codes, np.arange(len(header_codes)))
+    rows = np.flatnonzero(blocks >= 0)
+    rows = rows[last[header_codes[blocks[rows]]] == blocks[rows]]
+    rows = rows[np.argsort(header_codes[blocks[rows]], kind="stable")]
+    pdfs, aircraft_codes = pdfs[rows], header_codes[blocks[rows]]
+    if file_names is not None:
+        keep = pd.Series(pdfs).isin(file_names).to_numpy()
+        pdfs, aircraft_codes = pdfs[keep], aircraft_codes[keep]
+
+    themes = _aircraft_themes(themes_path)
+    theme_of = np.asarray([themes.get(a, "") for a in aircraft] + [""], dtype=object)
+    injury_codes, injuries = category_codes(pdfs, injury_path)
+    damage_codes, damages = category_codes(pdfs, damage_path)
+    models, months = _pdf_attributes(pdfs, extracted_path)
+    return pd.DataFrame({
+        "pdf": pdfs,
+        "aircraft": pd.Categorical.from_codes(aircraft_codes, aircraft),
+        "model": pd.Categorical(models),
+        "injury": pd.Categorical.from_codes(injury_codes, injuries),
+        "damage": pd.Categorical.from_codes(damage_codes, damages),
+        "themes": pd.Categorical(theme_of[aircraft_codes]),
+        "month": pd.Categorical(months),
+    })
+
+
+def iter_facts(aircraft_names_path, injury_path, damage_path, extracted_path=None, themes_path=None,
+               file_names=None):
+    """
+    Yield ``((aircraft, pdf), labels)`` for every listed pair, ``labels``
+    ordered as ``DIMENSIONS`` – the row view of ``fact_frame``.
+    """
+    frame = fact_frame(aircraft_names_path, injury_path, damage_path, extracted_path, themes_path, file_names)
+    keys = zip(frame["aircraft"], frame["pdf"])
+    yield from zip(keys, zip(*(frame[d] for d in DIMENSIONS)))
+
+
+# ── CUBE ───────────────────────────────────────────────
+class Cube:
+    """Sparse count cube over ``DIMENSIONS`` with dense rollups."""
+
+    def __init__(self, labels=None, coords=None, counts=None, rollups=None):
+        self.labels = {d: list(labels[d]) if labels else [] for d in DIMENSIONS}
+        self._codes = {d: {label: i for i, label in enumerate(self.labels[d])} for d in DIMENSIONS}
+        self.coords = np.zeros((0, len(DIMENSIONS)), dtype=np.int32) if coords is None else coords
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+        self.rollups = dict(rollups or {})
+
+    @property
+    def shape(self):
+        return tuple(len(self.labels[d]) for d in DIMENSIONS)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def encode(self, facts):
+        """``(n, ndim)`` int32 codes for label tuples, registering new labels."""
+        columns = list(zip(*facts)) or [()] * len(DIMENSIONS)
+        out = np.empty((len(columns[0]), len(DIMENSIONS)), dtype=np.int32)
+        for k, (d, column) in enumerate(zip(DIMENSIONS, columns)):
+            codes, labels = self._codes[d], self.labels[d]
+            for label in [label for label in dict.fromkeys(column) if label not in codes]:
+                codes[label] = len(labels)
+                labels.append(label)
+            out[:, k] = [codes[label] for label in column]
+        return out
+
+    def encode_frame(self, frame):
+        """``encode`` for a ``fact_frame``: one factorisation per column instead of a lookup per label."""
+        out = np.empty((len(frame), len(DIMENSIONS)), dtype=np.int32)
+        for k, d in enumerate(DIMENSIONS):
+            codes, uniques = pd.factorize(frame[d])
+            lookup, labels = self._codes[d], self.labels[d]
+            for label in uniques:
+                if label not in lookup:
+                    lookup[label] = len(labels)
+                    labels.append(label)
+            out[:, k] = np.asarray([lookup[label] for label in uniques], dtype=np.int32)[codes]
+        return out
+
+    def _cell_keys(self, coords):
+        """One sortable int64 key per coordinate row (row-major over the current shape)."""
+        return np.ravel_multi_index(tuple(coords.T), [max(n, 1) for n in self.shape])
+
+    def add(self, facts):
+        """Count more facts (label tuples or a ``fact_frame``); cells and rollups are updated incrementally."""
+        codes = self.encode_frame(facts) if isinstance(facts, pd.DataFrame) else self.encode(facts)
+        if not codes.shape[0]:
+            return codes
+        keys = np.concatenate([self._cell_keys(self.coords), self._cell_keys(codes)])
+        weights = np.concatenate([self.counts, np.ones(codes.shape[0], dtype=np.int64)])
+        cells, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=weights, minlength=cells.size).astype(np.int64)
+        self.coords = np.stack(np.unravel_index(cells, [max(n, 1) for n in self.shape]), axis=1).astype(np.int32)
+
+        shape = self.shape
+        for dims, dense in list(self.rollups.items()):
+            axes = [DIMENSIONS.index(d) for d in dims]
+            grown = np.zeros([shape[a] for a in axes], dtype=np.int64)
+            grown[tuple(slice(0, n) for n in dense.shape)] = dense
+            flat = np.ravel_multi_index(tuple(codes[:, a] for a in axes), grown.shape)
+            self.rollups[dims] = grown + np.bincount(flat, minlength=grown.size).reshape(grown.shape)
+        return codes
+
+    def _reduce(self, dims, mask=None):
+        axes = [DIMENSIONS.index(d) for d in dims]
+        coords, counts = self.coords, self.counts
+        if mask is not None:
+            coords, counts = coords[mask], counts[mask]
+        shape = [self.shape[a] for a in axes]
+        if not axes:
+            return np.asarray(counts.sum(), dtype=np.int64)
+        flat = np.ravel_multi_index(tuple(coords[:, a] for a in axes), shape) if coords.size else np.zeros(0, int)
+        return np.bincount(flat, weights=counts, minlength=int(np.prod(shape))).astype(np.int64).reshape(shape)
+
+    def rollup(self, *dims):
+        """Dense counts over ``dims`` (in that axis order), summed over the rest; memoised."""
+        key = tuple(dims)
+        if key not in self.rollups:
+            self.rollups[key] = self._reduce(key)
+        return self.rollups[key]
+
+    def _mask(self, where):
+        mask = np.ones(self.coords.shape[0], dtype=bool)
+        for d, wanted in where.items():
+            if d == "theme":
+                keep = [i for i, s in enumerate(self.labels["themes"]) if wanted in s.split(THEME_SEP)]
+                d = "themes"
+            else:
+                wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+                keep = [self._codes[d][w] for w in wanted if w in self._codes[d]]
+            mask &= np.isin(self.coords[:, DIMENSIONS.index(d)], keep)
+        return mask
+
+    def slice(self, *dims, **where):
+        """
+        Dense counts over ``dims`` restricted to ``where`` label filters,
+        e.g. ``slice("month", aircraft="Cessna 172", theme="Stall / Stall_spin")``.
+        A value may be one label or a list; ``theme=`` selects every theme set
+        containing that theme.
+        """
+        if not where:
+            return self.rollup(*dims)
+        return self._reduce(dims, self._mask(where))
+
+    def theme_names(self):
+        return sorted({t for s in self.labels["themes"] for t in s.split(THEME_SEP) if t})
+
+    def frame(self, rows, columns=None, **where):
+        """
+        ``slice`` as labelled pandas data – the cube equivalent of
+        ``df.groupby([rows, columns]).size().unstack(fill_value=0)``.
+        """
+        if columns is None:
+            return pd.Series(self.slice(rows, **where), index=self.labels[rows], name="count")
+        return pd.DataFrame(self.slice(rows, columns, **where), index=self.labels[rows],
+                            columns=self.labels[columns])
+
+    # ── persistence ──
+    def arrays(self):
+        arrays = {"coords": self.coords, "counts": self.counts}
+        for d in DIMENSIONS:
+            arrays.update(_string_arrays(f"labels_{d}", self.labels[d]))
+        for dims, dense in self.rollups.items():
+            arrays["rollup_" + "__".join(dims)] = dense
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, rollups):
+        labels = {d: _string_column(arrays, f"labels_{d}").tolist() for d in DIMENSIONS}
+        dense = {tuple(dims): arrays["rollup_" + "__".join(dims)] for dims in rollups}
+        return cls(labels, arrays["coords"], arrays["counts"], dense)
+
+
+def build_cube(facts, rollups=ROLLUPS):
+    cube = Cube(rollups={dims: np.zeros([0] * len(dims), dtype=np.int64) for dims in rollups})
+    cube.add(facts)
+    return cube
+
+
+# ── CACHED CUBE ────────────────────────────────────────
+def open_cube(aircraft_names_path, injury_path, damage_path, extracted_path=None, themes_path=None,
+              file_names=None):
+    """
+    The cube for these sources, cached next to ``aircraft_names_path``.
+
+    Unchanged sources load straight from the ``.npy`` files.  If the sources
+    only gained (aircraft, pdf) pairs and every earlier pair kept its labels,
+    just the new facts are added; anything else rebuilds.  With
+    ``file_names`` (e.g. a corpus_index query) an uncached cube over those
+    pdfs is built instead.
+    """
+    # The month / theme sources are optional: a path that does not exist counts as not given
+    extracted_path, themes_path = (p if p and os.path.exists(p) else None for p in (extracted_path, themes_path))
+    sources = [aircraft_names_path, injury_path, damage_path, extracted_path, themes_path]
+    if file_names is not None:
+        return build_cube(fact_frame(*sources, file_names=set(file_names)))
+
+    directory = cache_dir_for(aircraft_names_path, "cube")
+    meta_path = directory / "meta.json"
+    signature = [_file_sha1(p) if p else None for p in sources]
+    names = ["coords", "counts", "fact_keys_data", "fact_keys_offsets", "fact_codes"]
+    meta = None
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("version") != CUBE_VERSION or [tuple(r) for r in meta["rollups"]] != list(ROLLUPS):
+            meta = None
+    if meta and meta["sources"] == signature:
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in meta["arrays"]}
+        return Cube.from_arrays(arrays, meta["rollups"])
+
+    facts = fact_frame(*sources)
+    keys = (facts["aircraft"].astype(object) + "\x1f" + facts["pdf"]).tolist()
+    cube = None
+    if meta:
+        arrays = {name: np.load(directory / f"{name}.npy") for name in meta["arrays"]}
+        old = Cube.from_arrays(arrays, meta["rollups"])
+        old_keys = _string_column(arrays, "fact_keys").tolist()
+        # Every earlier pair must still be listed with the same labels (its last row, as a dict would keep)
+        rows = pd.Series(np.arange(len(keys)), index=keys)
+        rows = rows[~rows.index.duplicated(keep="last")].reindex(old_keys)
+        unchanged = not rows.isna().any()
+        if unchanged:
+            rows = rows.to_numpy(dtype=np.int64)
+            unchanged = all(
+                np.array_equal(np.asarray(old.labels[d], dtype=object)[arrays["fact_codes"][:, k]],
+                               facts[d].to_numpy(dtype=object)[rows])
+                for k, d in enumerate(DIMENSIONS)
+            )
+        if unchanged:
+            added = ~pd.Index(keys).isin(old_keys)
+            codes = np.concatenate([arrays["fact_codes"], old.add(facts[added])])
+            keys = old_keys + [k for k, new in zip(keys, added.tolist()) if new]
+            cube = old
+    if cube is None:
+        cube = build_cube(())
+        codes = cube.add(facts)
+
+    arrays = cube.arrays()
+    arrays.update(_string_arrays("fact_keys", keys))
+    arrays["fact_codes"] = codes
+    meta = {"version": CUBE_VERSION, "sources": signature, "rollups": [list(r) for r in ROLLUPS],
+            "arrays": sorted(arrays), "n_facts": len(keys)}
+    _save_arrays(directory, arrays, meta)
+    return Cube.from_arrays({name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in arrays},
+                            meta["rollups"])
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build or refresh the aggregate cube and time a few slices.")
+    parser.add_argument("aircraft_names")
+    parser.add_argument("injuries")
+    parser.add_argument("damage")
+    parser.add_argument("--extracted")
+    parser.add_argument("--themes")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    cube = open_cube(args.aircraft_names, args.injuries, args.damage, args.extracted, args.themes)
+    print(f"cube ready in {time.perf_counter() - t0:.3f}s: {cube.total} facts, "
+          f"{cube.coords.shape[0]} cells, shape {dict(zip(DIMENSIONS, cube.shape))}")
+    for dims in ROLLUPS[:3]:
+        t0 = time.perf_counter()
+        cube.rollup(*dims)
+        print(f"  rollup{dims}: {(time.perf_counter() - t0) * 1e6:.1f} µs")
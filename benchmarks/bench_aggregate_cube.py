@@ -0,0 +1,131 @@
+"""
+bench_aggregate_cube.py
+───────────────────────
+Per-aircraft injury / damage aggregation for the cityscape: the original
+loop (one Python set per aircraft, rebuilt on every run) against a
+groupby-max over categorical codes (``severity.group_levels``) and slicing
+``aggregate_cube.Cube`` rollups, plus the cost of building the cube from
+label tuples vs a categorical fact frame and of adding new reports.
+
+Facts are synthetic (aircraft, model, injury, damage, themes, month)
+tuples with the category vocabularies of the real Injuries.txt /
+Aircraft Damage.txt sizes.  Every path is checked for identical scores.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_aggregate_cube
+    python -m benchmarks.bench_aggregate_cube --facts 1000000 --aircraft 20000
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import DIMENSIONS, build_cube
+from severity import group_levels, map_damage_level, map_injury_level, set_levels
+
+INJURIES = ["Unknown", "1 Fatal", "1 Serious", "2 Minor", "1 None"] + [f"{k} Fatal, {k} Minor" for k in range(2, 140)]
+DAMAGES = ["Substantial", "Unknown", "Destroyed", "Minor"]
+THEMES = ["", "Stall / Stall_spin", "Landing_gear failure", "Fuel starvation | Stall / Stall_spin"]
+
+
+def synthetic_facts(n, n_aircraft, seed=0):
+    rng = np.random.default_rng(seed)
+    aircraft = rng.zipf(1.3, n) % n_aircraft
+    injury = rng.choice(len(INJURIES), n, p=np.r_[0.05, 0.1, 0.1, 0.2, 0.45, np.full(len(INJURIES) - 5, 0.1 / (len(INJURIES) - 5))])
+    damage = rng.integers(0, len(DAMAGES), n)
+    month = rng.integers(0, 120, n)
+    return [
+        (f"Aircraft {a}", f"Model {a % 97}", INJURIES[i], DAMAGES[d], THEMES[a % len(THEMES)],
+         f"{2010 + m // 12}-{m % 12 + 1:02d}")
+        for a, i, d, m in zip(aircraft.tolist(), injury.tolist(), damage.tolist(), month.tolist())
+    ]
+
+
+def legacy_levels(facts):
+    grouped = defaultdict(lambda: {'pdf_count': 0, 'injuries': set(), 'damages': set()})
+    for aircraft, _, injury, damage, _, _ in facts:
+        grouped[aircraft]['pdf_count'] += 1
+        grouped[aircraft]['injuries'].add(injury)
+        grouped[aircraft]['damages'].add(damage)
+    return {a: (info['pdf_count'], map_injury_level(info['injuries']), map_damage_level(info['damages']))
+            for a, info in grouped.items()}
+
+
+def columnar_levels(frame):
+    aircraft, injury, damage = frame["aircraft"].array, frame["injury"].array, frame["damage"].array
+    n = len(aircraft.categories)
+    counts = np.bincount(aircraft.codes, minlength=n)
+    return (counts, group_levels(aircraft.codes, injury.codes, list(injury.categories), map_injury_level, n),
+            group_levels(aircraft.codes, damage.codes, list(damage.categories), map_damage_level, n))
+
+
+def cube_levels(cube):
+    counts = cube.rollup("aircraft")
+    injury = set_levels(cube.rollup("aircraft", "injury"), cube.labels["injury"], map_injury_level)
+    damage = set_levels(cube.rollup("aircraft", "damage"), cube.labels["damage"], map_damage_level)
+    return counts, injury, damage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facts", type=int, default=200_000)
+    parser.add_argument("--aircraft", type=int, default=5_000)
+    parser.add_argument("--added", type=int, default=1_000, help="reports appended for the incremental update")
+    args = parser.parse_args()
+
+    facts = synthetic_facts(args.facts + args.added, args.aircraft)
+    base, added = facts[:args.facts], facts[args.facts:]
+
+    t0 = time.perf_counter()
+    legacy = legacy_levels(base)
+    legacy_s = time.perf_counter() - t0
+
+    frame = pd.DataFrame(base, columns=DIMENSIONS).astype("category")
+    t0 = time.perf_counter()
+    counts, injury, damage = columnar_levels(frame)
+    columnar_s = time.perf_counter() - t0
+    names = frame["aircraft"].array.categories
+    assert all(legacy[a] == (counts[k], injury[k], damage[k]) for k, a in enumerate(names))
+
+    t0 = time.perf_counter()
+    build_cube(base)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cube = build_cube(frame)
+    frame_build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    counts, injury, damage = cube_levels(cube)
+    slice_s = time.perf_counter() - t0
+    assert all(legacy[a] == (counts[k], injury[k], damage[k]) for k, a in enumerate(cube.labels["aircraft"]))
+
+    t0 = time.perf_counter()
+    cube.add(added)
+    add_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    repeats = 1000
+    for _ in range(repeats):
+        cube.rollup("aircraft", "injury")
+    lookup_s = (time.perf_counter() - t0) / repeats
+
+    print(f"{args.facts} facts, {len(cube.labels['aircraft'])} aircraft, {cube.coords.shape[0]} non-empty cells")
+    header = f"{'step':<36} {'ms':>10}"
+    print(header)
+    print("─" * len(header))
+    print(f"{'legacy: sets per aircraft + score':<36} {legacy_s * 1000:>10.1f}")
+    print(f"{'columnar: groupby-max over codes':<36} {columnar_s * 1000:>10.1f}")
+    print(f"{'cube: build from tuples':<36} {build_s * 1000:>10.1f}")
+    print(f"{'cube: build from fact frame':<36} {frame_build_s * 1000:>10.1f}")
+    print(f"{'cube: rollups + set_levels':<36} {slice_s * 1000:>10.2f}")
+    print(f"{'cube: rollup lookup':<36} {lookup_s * 1000:>10.4f}")
+    print(f"{f'cube: add {args.added} reports':<36} {add_s * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
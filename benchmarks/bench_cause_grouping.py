@@ -0,0 +1,108 @@
+"""
+bench_cause_grouping.py
+───────────────────────
+Peak memory and run time of cause grouping as the corpus grows.
+
+Compares the dense ``cosine_similarity`` matrix the extraction script used to
+build with the chunked sparse ``cause_grouping.group_similar`` engine.  Peak
+memory is measured with ``tracemalloc`` (NumPy/SciPy buffers are tracked), so
+the sparse column should grow roughly linearly with N while the dense one
+grows with N².
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cause_grouping
+    python -m benchmarks.bench_cause_grouping --sizes 2000 8000 32000 --dense-limit 8000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from cause_grouping import group_similar
+
+CAUSE_TEMPLATES = [
+    "The pilot's exceedance of the airplane's critical angle of attack during {phase}, which resulted in an aerodynamic stall.",
+    "A total loss of engine power due to fuel starvation as a result of the pilot's improper {fuel} management.",
+    "The pilot's failure to maintain directional control during {phase}, which resulted in a {event}.",
+    "The fatigue failure of the {part}, which resulted in a collapse of the landing gear during {phase}.",
+    "The pilot's continued visual flight into instrument meteorological conditions, which resulted in spatial disorientation and {event}.",
+    "The pilot's failure to maintain clearance from {obstacle} during {phase}.",
+]
+FILLERS = {
+    "phase": ["takeoff", "landing", "the initial climb", "a go-around", "cruise flight", "maneuvering at low altitude"],
+    "fuel": ["fuel", "fuel tank selector", "preflight fuel"],
+    "event": ["ground loop", "runway excursion", "loss of control", "collision with terrain", "nose-over"],
+    "part": ["main landing gear brace", "nose gear torque link", "tailwheel spring", "gear actuator rod end"],
+    "obstacle": ["power lines", "trees", "a fence", "terrain", "a parked vehicle"],
+}
+
+
+def synthetic_causes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        template = CAUSE_TEMPLATES[rng.integers(len(CAUSE_TEMPLATES))]
+        fill = {k: v[rng.integers(len(v))] for k, v in FILLERS.items()}
+        out.append(template.format(**fill) + f" Case {rng.integers(1_000_000)}.")
+    return out
+
+
+def dense_groups(matrix, threshold):
+    """The original greedy walk over a dense similarity matrix."""
+    similarity_matrix = cosine_similarity(matrix)
+    n = matrix.shape[0]
+    visited = set()
+    groups = []
+    for i in range(n):
+        if i in visited:
+            continue
+        group = [i]
+        visited.add(i)
+        for j in range(i + 1, n):
+            if j not in visited and similarity_matrix[i][j] >= threshold:
+                group.append(j)
+                visited.add(j)
+        if len(group) > 1:
+            groups.append(group)
+    return groups
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 4_000, 16_000, 64_000])
+    parser.add_argument("--dense-limit", type=int, default=4_000,
+                        help="skip the dense baseline above this many documents")
+    parser.add_argument("--threshold", type=float, default=0.65)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    header = f"{'docs':>7} {'mode':>7} {'time s':>8} {'peak MB':>9} {'groups':>7}"
+    print(header)
+    print("─" * len(header))
+    for n in args.sizes:
+        matrix = TfidfVectorizer(stop_words="english").fit_transform(synthetic_causes(n))
+        modes = [("sparse", lambda m: group_similar(m, args.threshold, args.chunk_size))]
+        if n <= args.dense_limit:
+            modes.insert(0, ("dense", lambda m: dense_groups(m, args.threshold)))
+        for name, fn in modes:
+            elapsed, peak, n_groups = measure(fn, matrix)
+            print(f"{n:>7} {name:>7} {elapsed:>8.2f} {peak / 1e6:>9.1f} {n_groups:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+bench_cityscape.py
+──────────────────
+Compare the legacy one-Mesh3d-per-bar cityscape against the batched
+``cityscape_builder`` traces.
+
+Reports build time, serialized HTML size (without the plotly.js bundle) and
+trace count for synthetic cityscapes of 1k / 10k / 50k bars.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cityscape
+    python -m benchmarks.bench_cityscape --sizes 1000 5000 --legacy-limit 5000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from cityscape_builder import CUBE_CORNERS, CUBE_FACES, build_cityscape_traces, grid_positions
+
+
+def legacy_create_bar(x, y, z, dx, dy, dz, color, hovertext):
+    """Per-bar Mesh3d, as the visualization scripts used to build it."""
+    corners = CUBE_CORNERS * [dx, dy, dz] + [x, y, z]
+    return go.Mesh3d(
+        x=corners[:, 0].tolist(), y=corners[:, 1].tolist(), z=corners[:, 2].tolist(),
+        i=CUBE_FACES[:, 0].tolist(), j=CUBE_FACES[:, 1].tolist(), k=CUBE_FACES[:, 2].tolist(),
+        color=color, opacity=0.85,
+        hovertext=hovertext, hoverinfo="text"
+    )
+
+
+def synthetic_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x, y = grid_positions(n)
+    heights = rng.integers(1, 300, size=n)
+    widths = rng.choice([1.0, 1.5, 2.0, 3.0], size=n)
+    levels = rng.integers(0, 5, size=n)
+    colors = [f"rgba({lvl * 60}, 0, 150, 0.7)" for lvl in levels]
+    texts = [f"Aircraft: Model {b}<br>PDFs: {h}" for b, h in enumerate(heights)]
+    return x, y, widths, heights, colors, texts
+
+
+def build_legacy(x, y, widths, heights, colors, texts):
+    fig = go.Figure()
+    for xi, yi, w, h, c, t in zip(x, y, widths, heights, colors, texts):
+        fig.add_trace(legacy_create_bar(xi, yi, 0, w, w, h, c, t))
+    return fig
+
+
+def build_batched(x, y, widths, heights, colors, texts):
+    return go.Figure(build_cityscape_traces(x, y, widths, widths, heights, texts, color=colors))
+
+
+def measure(builder, bars):
+    t0 = time.perf_counter()
+    fig = builder(*bars)
+    build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    html = fig.to_html(include_plotlyjs=False, full_html=False)
+    export_s = time.perf_counter() - t0
+    return build_s, export_s, len(html.encode("utf-8")), len(fig.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--legacy-limit", type=int, default=50_000,
+                        help="skip the legacy builder above this many bars")
+    args = parser.parse_args()
+
+    header = f"{'bars':>7} {'mode':>8} {'build s':>9} {'export s':>9} {'html MB':>9} {'traces':>7}"
+    print(header)
+    print("─" * len(header))
+    for n in args.sizes:
+        bars = synthetic_bars(n)
+        modes = [("batched", build_batched)]
+        if n <= args.legacy_limit:
+            modes.insert(0, ("legacy", build_legacy))
+        for name, builder in modes:
+            build_s, export_s, size, traces = measure(builder, bars)
+            print(f"{n:>7} {name:>8} {build_s:>9.3f} {export_s:>9.3f} {size / 1e6:>9.2f} {traces:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+bench_clean_text.py
+───────────────────
+Throughput (MB/s of input text) of the cleanup stage's text cleaning and
+term counting, before and after the single-pass tokenizer.
+
+  legacy      the original ``clean_text``: mask protected tokens with a
+              per-match callback, strip punctuation, unmask with one
+              ``str.replace`` per token, collapse whitespace
+  batch       ``clean_texts`` – one ``TOKEN_RE.findall`` per document
+
+Counting compares the original "materialise every token, then Counter"
+against ``count_terms``.  All variants are checked for identical output.
+
+The corpus is the pseudo-analysis text of bench_entity_extraction,
+repeated ``--repeat`` times; ``--hyphens`` appends that many hyphenated
+terms to every document to show the per-token cost of the mask step.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_clean_text
+    python -m benchmarks.bench_clean_text --repeat 20 --hyphens 40
+"""
+
+import argparse
+import collections
+import itertools
+import re
+import time
+
+import Query_based_visualization_data_cleanup as cleanup
+from benchmarks.bench_entity_extraction import CORPUS, corpus_texts
+
+MODEL_PAT = r'\b[A-Z][a-zA-Z]+-\d+\b'
+COMPOUND_PAT = r'\b\w+-\w+\b'
+PRESERVE_RE = re.compile(f'(?:{MODEL_PAT}|{COMPOUND_PAT})')
+
+
+def legacy_clean_text(text):
+    protected = {}
+
+    def _mask(match):
+        key = f"__TOK{len(protected)}__"
+        protected[key] = match.group(0)
+        return key
+
+    text_masked = PRESERVE_RE.sub(_mask, text)
+    text_clean = re.sub(r'[^\w\s-]', ' ', text_masked).lower()
+    for key, original in protected.items():
+        text_clean = text_clean.replace(key.lower(), original.lower())
+    return re.sub(r'\s+', ' ', text_clean).strip()
+
+
+def legacy_counts(docs):
+    all_tokens = list(itertools.chain.from_iterable(doc.split() for doc in docs))
+    return collections.Counter(all_tokens)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="copies of the corpus")
+    parser.add_argument("--hyphens", type=int, default=0, help="extra hyphenated terms per document")
+    args = parser.parse_args()
+
+    extra = " ".join(f"Cessna-{172 + i} nose-down" for i in range(args.hyphens // 2))
+    texts = [f"{t} {extra}" if extra else t for t in corpus_texts(CORPUS)] * args.repeat
+    mb = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+
+    legacy, legacy_s = timed(lambda: [legacy_clean_text(t) for t in texts])
+    batch, batch_s = timed(cleanup.clean_texts, texts)
+    assert legacy == batch, "cleaned text differs"
+
+    old_counts, old_count_s = timed(legacy_counts, batch)
+    new_counts, new_count_s = timed(cleanup.count_terms, batch)
+    assert old_counts == new_counts, "term counts differ"
+
+    print(f"{len(texts)} docs, {mb:.1f} MB, {args.hyphens} extra hyphenated terms/doc")
+    header = f"{'step':<24} {'seconds':>8} {'MB/s':>8} {'speedup':>8}"
+    print(header)
+    print("─" * len(header))
+    for label, secs, base in [
+        ("clean: legacy", legacy_s, legacy_s),
+        ("clean: clean_texts", batch_s, legacy_s),
+        ("count: list + Counter", old_count_s, old_count_s),
+        ("count: streaming", new_count_s, old_count_s),
+    ]:
+        print(f"{label:<24} {secs:>8.3f} {mb / secs:>8.1f} {base / secs:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
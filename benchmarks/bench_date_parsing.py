@@ -0,0 +1,74 @@
+"""
+bench_date_parsing.py
+─────────────────────
+Date parsing throughput: the notebook's per-row ``split(",")`` +
+``datetime.strptime`` loop against ``incident_timeline.parse_dates``.
+
+Dates are synthetic "January 9, 2016, 15:25 Local" strings with a
+``--bad`` fraction of other spellings ("Sept. 5, 2012", "08/18/2009",
+free text).  The loop drops what it cannot parse; parse_dates reports it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_date_parsing
+    python -m benchmarks.bench_date_parsing --rows 1000000 --bad 0.05
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from incident_timeline import parse_dates
+
+ODD = ["Sept. 5, 2012", "08/18/2009", "2021-08-15 16:16", "unknown", "March 3 2016"]
+
+
+def synthetic_dates(n, bad=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2008-01-01") + pd.to_timedelta(rng.integers(0, 15 * 365 * 1440, n), unit="min")
+    dates = [f"{d:%B} {d.day}, {d:%Y, %H:%M} Local" for d in days]
+    for i in np.flatnonzero(rng.random(n) < bad).tolist():
+        dates[i] = ODD[i % len(ODD)]
+    return dates
+
+
+def legacy_parse(dates):
+    parsed = []
+    for date_str in dates:
+        try:
+            date_part = date_str.split(",")[0].strip() + " " + date_str.split(",")[1].strip().split()[0]
+            parsed.append(datetime.strptime(date_part, "%B %d %Y"))
+        except Exception:
+            continue
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--bad", type=float, default=0.01, help="fraction of rows in other spellings")
+    args = parser.parse_args()
+
+    dates = synthetic_dates(args.rows, args.bad)
+
+    t0 = time.perf_counter()
+    legacy = legacy_parse(dates)
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    parsed, method = parse_dates(dates)
+    vector_s = time.perf_counter() - t0
+
+    header = f"{'parser':<26} {'seconds':>8} {'rows/s':>11} {'parsed':>9} {'rejected':>9}"
+    print(header)
+    print("─" * len(header))
+    print(f"{'strptime loop':<26} {legacy_s:>8.3f} {args.rows / legacy_s:>11.0f} {len(legacy):>9} {'(silent)':>9}")
+    print(f"{'parse_dates':<26} {vector_s:>8.3f} {args.rows / vector_s:>11.0f} "
+          f"{int(parsed.notna().sum()):>9} {int(method.eq('rejected').sum()):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+bench_entity_extraction.py
+──────────────────────────
+docs/sec of the spaCy extraction stage, before and after batching.
+
+"before" is the original stage: the full en_core_web_md pipeline, one
+``nlp(text)`` call per document and three separate regex/substring checks
+per sentence.  "after" is ``extract_entities_batch`` from
+Query_based_visualization_data_cleanup.py: ``nlp.pipe`` with unused
+components excluded and a single combined sentence regex.
+
+The bundled corpus (semantic_enriched_output_cleaned.json) has no raw
+Analysis text, so each record's damage/cause sentences are joined back into
+a pseudo-analysis.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_entity_extraction
+    python -m benchmarks.bench_entity_extraction --batch-size 128 --n-process 4
+    python -m benchmarks.bench_entity_extraction --senter
+"""
+
+import argparse
+import collections
+import re
+import time
+from pathlib import Path
+
+import spacy
+
+import Query_based_visualization_data_cleanup as cleanup
+from data_access import load_records
+
+CORPUS = Path(__file__).resolve().parent.parent / "semantic_enriched_output_cleaned.json"
+
+
+def corpus_texts(path, limit=None):
+    records = load_records(path)[:limit]
+    return [" ".join(dict.fromkeys(r["damage_notes"] + r["cause_notes"])) or "No narrative." for r in records]
+
+
+def legacy_extract(nlp, text):
+    doc = nlp(text)
+    ents = collections.defaultdict(list)
+    for ent in doc.ents:
+        if ent.label_ in ("ORG", "GPE", "DATE", "PRODUCT"):
+            ents[ent.label_].append(ent.text)
+    for sent in doc.sents:
+        s = sent.text.strip()
+        low = s.lower()
+        if re.search(r'\b(boeing|cessna|piper|airbus|beech|lancair|ryan|douglas)\b', low):
+            ents["aircraft"].append(s)
+        if "damage" in low or "substantial" in low:
+            ents["damage"].append(s)
+        if re.search(r'\b(failure|stall|loss of engine|loss of control|fatigue)\b', low):
+            ents["cause"].append(s)
+    return {k: list(dict.fromkeys(v)) for k, v in ents.items()}
+
+
+def timed(label, fn, n_docs):
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<8} {n_docs:>6} docs {elapsed:>8.2f} s {n_docs / elapsed:>9.1f} docs/sec")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(CORPUS))
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=cleanup.NLP_BATCH_SIZE)
+    parser.add_argument("--n-process", type=int, default=cleanup.NLP_N_PROCESS)
+    parser.add_argument("--senter", action="store_true",
+                        help="sentences from senter instead of the parser (faster, splits can differ)")
+    args = parser.parse_args()
+
+    texts = corpus_texts(args.corpus, args.limit)
+
+    full_nlp = spacy.load(cleanup.SPACY_MODEL)
+    before = timed("before", lambda: [legacy_extract(full_nlp, t) for t in texts], len(texts))
+    del full_nlp
+
+    cleanup._nlp = cleanup.load_nlp(use_senter=args.senter)
+    after = timed("after", lambda: list(cleanup.extract_entities_batch(
+        texts, batch_size=args.batch_size, n_process=args.n_process)), len(texts))
+
+    same = sum(a == b for a, b in zip(before, after))
+    print(f"identical outputs: {same}/{len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
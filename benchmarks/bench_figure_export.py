@@ -0,0 +1,79 @@
+"""
+bench_figure_export.py
+──────────────────────
+Total artifact size of the dashboard views: the legacy ``fig.write_html``
+(plotly.js inlined into every file) against ``figure_export.write_figure``
+(one shared plotly.min.js plus compact per-view JSON).
+
+Builds ``--views`` synthetic cityscapes of ``--bars`` bars each in a
+temporary directory and reports bytes on disk and export time.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_figure_export
+    python -m benchmarks.bench_figure_export --views 6 --bars 5000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import plotly.graph_objects as go
+
+from benchmarks.bench_cityscape import synthetic_bars
+from cityscape_builder import build_cityscape_traces
+from figure_export import write_figure
+
+
+def _dir_bytes(directory, pattern="*"):
+    return sum(p.stat().st_size for p in Path(directory).rglob(pattern) if p.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--views", type=int, default=3)
+    parser.add_argument("--bars", type=int, default=2_000)
+    args = parser.parse_args()
+
+    figs = []
+    for v in range(args.views):
+        x, y, widths, heights, colors, texts = synthetic_bars(args.bars, seed=v)
+        fig = go.Figure(build_cityscape_traces(x, y, widths, widths, heights, texts, color=colors))
+        fig.update_layout(title=f"View {v}")
+        figs.append(fig)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir, shared_dir = Path(tmp, "legacy"), Path(tmp, "shared")
+        legacy_dir.mkdir()
+        shared_dir.mkdir()
+
+        t0 = time.perf_counter()
+        for v, fig in enumerate(figs):
+            fig.write_html(legacy_dir / f"view{v}.html")
+        legacy_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for v, fig in enumerate(figs):
+            write_figure(fig, shared_dir / f"view{v}.html")
+        shared_s = time.perf_counter() - t0
+
+        legacy = _dir_bytes(legacy_dir)
+        dashboard = _dir_bytes(shared_dir / "figures")
+        views_json = _dir_bytes(shared_dir / "figures", "view*.json")
+        shared_all = _dir_bytes(shared_dir)
+
+    header = f"{'artifacts':<36} {'MB':>8} {'export s':>9}"
+    print(f"{args.views} views × {args.bars} bars")
+    print(header)
+    print("─" * len(header))
+    print(f"{'legacy write_html (inlined js)':<36} {legacy / 1e6:>8.2f} {legacy_s:>9.2f}")
+    print(f"{'dashboard (shared js + JSON)':<36} {dashboard / 1e6:>8.2f} {shared_s:>9.2f}")
+    print(f"{'  of which per-view JSON':<36} {views_json / 1e6:>8.2f}")
+    print(f"{'dashboard + standalone HTML pages':<36} {shared_all / 1e6:>8.2f}")
+    print(f"per-view switch payload: {views_json / args.views / 1e3:.0f} kB "
+          f"vs {legacy / args.views / 1e6:.2f} MB per iframe page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+bench_keywords.py
+─────────────────
+Throughput (docs/s) of the cleanup stage's keyword filtering, before and
+after splitting it across worker processes.
+
+  serial      the original comprehension over every cleaned document
+  workers=N   ``keywords_per_doc`` – chunks of ``--chunk`` documents in N
+              processes, the frozen stop-list sent once per worker
+
+Every variant is checked for output identical to the serial one.  Worker
+counts above the machine's CPUs only show the pool overhead.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_keywords
+    python -m benchmarks.bench_keywords --repeat 200 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+import Query_based_visualization_data_cleanup as cleanup
+from benchmarks.bench_entity_extraction import CORPUS, corpus_texts
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100, help="copies of the corpus")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk", type=int, default=cleanup.KEYWORD_CHUNK)
+    args = parser.parse_args()
+
+    cleaned = cleanup.clean_texts(corpus_texts(CORPUS) * args.repeat)
+    filter_set = cleanup.build_frequency_filters(cleaned)
+    serial, serial_s = timed(lambda: [[t for t in doc.split() if t not in filter_set] for doc in cleaned])
+
+    print(f"{len(cleaned)} docs, {len(filter_set)} filtered terms, {os.cpu_count()} CPUs")
+    header = f"{'step':<16} {'seconds':>8} {'docs/s':>10} {'speedup':>8}"
+    print(header)
+    print("─" * len(header))
+    print(f"{'serial':<16} {serial_s:>8.3f} {len(cleaned) / serial_s:>10.0f} {1:>7.1f}x")
+    for workers in args.workers:
+        keywords, secs = timed(cleanup.keywords_per_doc, cleaned, filter_set, workers=workers,
+                               chunk_size=args.chunk)
+        assert keywords == serial, f"keywords differ with {workers} workers"
+        print(f"{f'workers={workers}':<16} {secs:>8.3f} {len(cleaned) / secs:>10.0f} {serial_s / secs:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
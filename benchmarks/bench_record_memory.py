@@ -0,0 +1,88 @@
+"""
+bench_record_memory.py
+──────────────────────
+Memory of the corpus in its usual in-memory layouts against
+``corpus_model.Corpus``, on the bundled 2,244-record
+semantic_enriched_output_cleaned.json (or any corpus file given).
+
+  dict-of-dicts     ``json.load`` – what ``load_records`` hands out
+  json_normalize    a flat DataFrame of the same records (the dicts freed)
+  Corpus            categorical aircraft / model / injury / damage,
+                    integer pdf ids, text left memory-mapped
+  Corpus + text     the same with every text column decoded into a frame
+
+Python heap is measured with ``tracemalloc``; memory-mapped text is
+reported separately because it is page cache shared with the OS, not heap.
+The columnar cache is built in a temporary ``$RITA_CACHE_DIR`` first, so
+Corpus numbers are for a warm load.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_record_memory
+    python -m benchmarks.bench_record_memory path/to/final_extracted_data.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from corpus_model import load_corpus
+from data_access import CACHE_DIR_ENV
+
+
+def traced(build):
+    """``(result, bytes still allocated by build)``."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default="semantic_enriched_output_cleaned.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[CACHE_DIR_ENV] = tmp
+        load_corpus(args.corpus)                    # cold build of the columnar cache
+
+        def json_load():
+            with open(args.corpus, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        records, dict_bytes = traced(json_load)
+        n_records = len(records)
+        del records
+        _, normalize_bytes = traced(lambda: pd.json_normalize(json_load()))
+
+        corpus, corpus_bytes = traced(lambda: load_corpus(args.corpus))
+        heap, mapped = corpus.memory_bytes()
+        _, text_bytes = traced(lambda: corpus.frame(texts=list(corpus.texts)))
+        del corpus
+        os.environ.pop(CACHE_DIR_ENV)
+
+    header = f"{'layout':<30} {'heap MB':>9} {'vs dicts':>9}"
+    print(f"{args.corpus}: {n_records} records")
+    print(header)
+    print("─" * len(header))
+    for label, size in [
+        ("dict-of-dicts (json.load)", dict_bytes),
+        ("json_normalize frame", normalize_bytes),
+        ("Corpus", corpus_bytes),
+        ("Corpus + decoded text frame", corpus_bytes + text_bytes),
+    ]:
+        print(f"{label:<30} {size / 1e6:>9.2f} {size / dict_bytes:>8.0%}")
+    print(f"Corpus columns: {heap / 1e6:.2f} MB heap, {mapped / 1e6:.2f} MB memory-mapped text")
+
+
+if __name__ == "__main__":
+    main()
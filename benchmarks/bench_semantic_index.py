@@ -0,0 +1,127 @@
+"""
+bench_semantic_index.py
+───────────────────────
+Single-report "find similar accidents" latency: brute-force cosine over
+every document vector against ``semantic_vectors.IVFIndex``.
+
+Vectors are synthetic: ``--topics`` random unit directions with per-report
+noise, shaped like the 300-d en_core_web_md document means, stored in a
+float32 ``.npy`` opened with ``mmap_mode="r"`` as the real cache is.
+Reports build time, mean query time and recall@k of the index against the
+exact answer, then checks ``neighbour_pairs`` – the similarity scripts' pair
+source – on the first ``--pair-reports`` reports: the share of the exact
+pairs (each row's ``k`` most similar rows by brute-force cosine, scoring ≥
+``--threshold``) that the index finds.  Exits with status 1 when either
+recall is below ``--min-recall``.  ``--nprobe`` defaults to the index's own
+choice (``NPROBE_FRACTION`` of its lists).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_semantic_index
+    python -m benchmarks.bench_semantic_index --reports 500000 --nprobe 64
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from semantic_vectors import IVFIndex, neighbour_pairs
+
+
+def synthetic_vectors(n, dim=300, topics=500, noise=0.6, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, topics, n)] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_pairs(vectors, k=10, threshold=0.9, chunk=2048):
+    """``neighbour_pairs``' answer by brute-force cosine: each row's ``k`` best rows scoring ≥ ``threshold``."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    pairs = set()
+    for start in range(0, vectors.shape[0], chunk):
+        scores = vectors[start:start + chunk] @ vectors.T
+        rows = np.arange(scores.shape[0])
+        scores[rows, start + rows] = -np.inf                # a row is not its own neighbour
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for r, j in zip(*np.nonzero(scores[rows[:, None], top] >= threshold)):
+            i, other = start + int(r), int(top[r, j])
+            pairs.add((i, other) if i < other else (other, i))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=100_000)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.6, help="per-report noise around its topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, help="lists scanned per query (default: the index's choice)")
+    parser.add_argument("--pair-reports", type=int, default=10_000, help="reports in the neighbour_pairs check")
+    parser.add_argument("--threshold", type=float, default=0.7, help="cosine threshold of the pair check")
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, "vectors.npy")
+        np.save(path, synthetic_vectors(args.reports, topics=args.topics, noise=args.noise))
+        vectors = np.load(path, mmap_mode="r")
+
+        t0 = time.perf_counter()
+        index = IVFIndex.build(vectors)
+        build_s = time.perf_counter() - t0
+        nlist = index.centroids.shape[0]
+        nprobe = args.nprobe or index.default_nprobe()
+
+        queries = np.random.default_rng(1).choice(args.reports, args.queries, replace=False)
+        brute_s = ivf_s = 0.0
+        hits = 0
+        for i in queries.tolist():
+            query = np.asarray(vectors[i])
+            t0 = time.perf_counter()
+            scores = np.asarray(vectors) @ query
+            exact = np.argpartition(-scores, args.k - 1)[:args.k]
+            brute_s += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            ids, _ = index.search(query, k=args.k, nprobe=nprobe)
+            ivf_s += time.perf_counter() - t0
+            hits += len(set(exact.tolist()) & set(ids.tolist()))
+
+        subset = vectors[:args.pair_reports]
+        subset_index = IVFIndex.build(subset)
+        pair_nprobe = args.nprobe or subset_index.default_nprobe()
+        t0 = time.perf_counter()
+        found = set(neighbour_pairs(subset, subset_index, k=args.k, threshold=args.threshold, nprobe=pair_nprobe))
+        pairs_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        exact = exact_pairs(subset, k=args.k, threshold=args.threshold)
+        exact_s = time.perf_counter() - t0
+        del vectors, subset, index, subset_index
+
+    recall = hits / (args.queries * args.k)
+    pair_recall = len(found & exact) / len(exact) if exact else 1.0
+    print(f"{args.reports} reports, {nlist} lists, nprobe {nprobe}, "
+          f"IVF build {build_s:.2f}s")
+    header = f"{'query':<14} {'ms/query':>9} {'speedup':>8} {f'recall@{args.k}':>10}"
+    print(header)
+    print("─" * len(header))
+    print(f"{'brute force':<14} {brute_s / args.queries * 1000:>9.2f} {1:>7.1f}x {1:>10.3f}")
+    print(f"{'IVF':<14} {ivf_s / args.queries * 1000:>9.2f} {brute_s / ivf_s:>7.1f}x {recall:>10.3f}")
+    print()
+    print(f"neighbour_pairs on {min(args.pair_reports, args.reports)} reports, nprobe {pair_nprobe}, "
+          f"cosine ≥ {args.threshold}: {len(found)} pairs in {pairs_s:.2f}s, "
+          f"brute force {len(exact)} in {exact_s:.2f}s, recall {pair_recall:.3f}")
+    if min(recall, pair_recall) < args.min_recall:
+        print(f"FAILED: recall below {args.min_recall}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
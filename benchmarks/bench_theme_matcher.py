@@ -0,0 +1,96 @@
+"""
+bench_theme_matcher.py
+──────────────────────
+Theme classification over semantic_enriched_output_cleaned.json: one
+``re.search`` per theme (the original loop) versus ``ThemeMatcher``.
+
+Besides the seven built-in ``THEMES``, synthetic theme sets of growing size
+are generated from corpus keywords to show how each approach scales with the
+number of user-defined themes.  Every run checks that both approaches find
+exactly the same themes for every record.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_theme_matcher
+    python -m benchmarks.bench_theme_matcher --theme-counts 7 100 500 1000
+"""
+
+import argparse
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from data_access import load_records
+from theme_matcher import ThemeMatcher
+
+CORPUS = Path(__file__).resolve().parent.parent / "semantic_enriched_output_cleaned.json"
+
+BASE_THEMES = {
+    "Stall / Stall_spin"       : r"stall|critical angle|spin|loss of lift|loss of airspeed",
+    "Fuel starvation"          : r"fuel starvation|fuel selector|water in fuel|tank ran dry",
+    "Landing_gear failure"     : r"landing gear (collapsed|fractured|separated)|ground loop",
+    "Tail_strike"              : r"tailstrike|pitch .*degrees|toga thrust",
+    "Wire / tree strike"       : r"wire strike|power line|struck (trees|power lines)",
+    "Spatial disorientation"   : r"spatial disorientation|entered.*cloud|steep descent",
+    "Engine_component failure" : r"oil starvation|exhaust valve|idle valve|drive gear",
+}
+
+
+def corpus_blobs(path):
+    return [
+        " ".join(r["damage_notes"] + r["cause_notes"] + r["keywords"]).lower()
+        for r in load_records(path)
+    ]
+
+
+def synthetic_themes(blobs, count, seed=0):
+    """``count`` themes: the built-ins plus keyword-pair alternations from the corpus."""
+    themes = dict(BASE_THEMES)
+    vocab = [w for w, c in Counter(" ".join(blobs).split()).most_common(5000) if len(w) > 3 and w.isalpha()]
+    rng = np.random.default_rng(seed)
+    while len(themes) < count:
+        a, b, c = rng.choice(vocab, size=3, replace=False)
+        themes[f"theme_{len(themes)}"] = f"{a} {b}|{c} (failure|damage)|{b}.*{c}"
+    return dict(list(themes.items())[:count])
+
+
+def per_theme_search(themes, blobs):
+    compiled = [(name, re.compile(p)) for name, p in themes.items()]
+    return [[name for name, rx in compiled if rx.search(blob)] for blob in blobs]
+
+
+def single_pass(themes, blobs):
+    matcher = ThemeMatcher(themes)
+    return [matcher.matched(blob) for blob in blobs]
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(CORPUS))
+    parser.add_argument("--theme-counts", type=int, nargs="+", default=[7, 50, 200, 500])
+    args = parser.parse_args()
+
+    blobs = corpus_blobs(args.corpus)
+    mb = sum(len(b) for b in blobs) / 1e6
+    print(f"{len(blobs)} records, {mb:.1f} MB of text")
+    header = f"{'themes':>7} {'per-theme s':>12} {'single-pass s':>14} {'speedup':>8} {'identical':>10}"
+    print(header)
+    print("─" * len(header))
+    for count in args.theme_counts:
+        themes = synthetic_themes(blobs, count)
+        t_old, old = timed(per_theme_search, themes, blobs)
+        t_new, new = timed(single_pass, themes, blobs)
+        print(f"{count:>7} {t_old:>12.3f} {t_new:>14.3f} {t_old / t_new:>7.1f}x {str(old == new):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+regression_suite.py
+───────────────────
+End-to-end throughput / memory regression check of the pipeline stages on
+a synthetic corpus (benchmarks/synthetic_corpus.py) at 1k, 10k, 100k or 1M
+reports.
+
+  parse             final_extracted_data.json, dates and the grouped .txt
+                    files into data_access's columnar cache (cold cache)
+  clean_text        cleanup's ``clean_texts`` + corpus term counts
+  extract_entities  cleanup's ``extract_entities_batch`` (first
+                    ``STAGE_LIMITS`` reports; skipped without the spaCy model)
+  themes            ``ThemeMatcher`` over every report
+  similarity        TF-IDF cause grouping (``cause_grouping.group_similar``)
+  figures           Aircraft_Incident_cityscape_graph.py end to end: cube,
+                    severity, mesh building, write_html + dashboard JSON
+
+Each stage runs inside an ``instrumentation`` span: records/s comes from
+its wall time, memory is the peak RSS sampled while it ran minus the RSS at
+its start.  Results are compared with the baseline for the same scale in
+``--baseline``; a stage fails when its throughput drops by more than
+``--tolerance`` or its memory grows by more than ``--memory-tolerance``
+(plus ``MEMORY_SLACK``), and the exit status is 1.  No baseline is
+committed – throughput only compares on the same machine – so record one
+there with ``--update-baseline`` first; without a baseline for the scale the
+suite exits with status 2 before running anything.
+
+Run from the repository root:
+
+    python -m benchmarks.regression_suite --scale 10k --update-baseline
+    python -m benchmarks.regression_suite --scale 10k
+    python -m benchmarks.regression_suite --scale 1m --data-dir /tmp/rita_1m --report run.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import spacy
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import Query_based_visualization_data_cleanup as cleanup
+import instrumentation
+from benchmarks.bench_theme_matcher import BASE_THEMES
+from benchmarks.synthetic_corpus import write_corpus
+from cause_grouping import group_similar
+from data_access import CACHE_DIR_ENV, load_grouped_columns, load_record_table
+from incident_timeline import load_timeline
+from theme_matcher import ThemeMatcher
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+STAGES = ("parse", "clean_text", "extract_entities", "themes", "similarity", "figures")
+REQUIRES = {name: ("parse",) for name in STAGES[1:]} | {"themes": ("parse", "clean_text")}
+STAGE_LIMITS = {"extract_entities": 5_000, "similarity": 20_000}      # reports fed to the quadratic / slowest stages
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.25
+MEMORY_SLACK = 32 * 2**20               # RSS noise floor, bytes
+
+
+# ── STAGES ─────────────────────────────────────────────
+def stage_parse(ctx):
+    table = load_record_table(ctx["paths"]["extracted"])
+    load_timeline(ctx["paths"]["extracted"])
+    for key in ("aircraft_names", "injuries", "damage"):
+        load_grouped_columns(ctx["paths"][key])
+    ctx["analyses"] = table.column("Analysis").tolist()
+    ctx["causes"] = table.column("Probable Cause and Findings").tolist()
+    ctx["aircraft"] = table.values("Flight Information.Aircraft_model")
+    return len(table)
+
+
+def stage_clean_text(ctx):
+    ctx["cleaned"] = cleanup.clean_texts(ctx["analyses"])
+    cleanup.count_terms(ctx["cleaned"])
+    return len(ctx["cleaned"])
+
+
+def stage_extract_entities(ctx):
+    if not spacy.util.is_package(cleanup.SPACY_MODEL):
+        return f"spaCy model {cleanup.SPACY_MODEL} not installed"
+    texts = ctx["analyses"][:STAGE_LIMITS["extract_entities"]]
+    cleanup._nlp = cleanup.load_nlp()
+    list(cleanup.extract_entities_batch(texts))
+    return len(texts)
+
+
+def stage_themes(ctx):
+    matcher = ThemeMatcher(BASE_THEMES)
+    themes = {}
+    for aircraft, doc, cause in zip(ctx["aircraft"], ctx["cleaned"], ctx["causes"]):
+        for theme in matcher.matched(f"{doc} {cause.lower()}"):
+            themes.setdefault(theme, set()).add(aircraft)
+    ctx["paths"]["themes"] = str(Path(ctx["work"], "aircraft_by_similarity_theme.json"))
+    with open(ctx["paths"]["themes"], "w", encoding="utf-8") as f:
+        json.dump({theme: sorted(a) for theme, a in themes.items()}, f)
+    return len(ctx["cleaned"])
+
+
+def stage_similarity(ctx):
+    causes = ctx["causes"][:STAGE_LIMITS["similarity"]]
+    matrix = TfidfVectorizer(stop_words="english").fit_transform(causes)
+    group_similar(matrix, threshold=0.65, chunk_size=2000)
+    return len(causes)
+
+
+def stage_figures(ctx):
+    from rita import run_script
+
+    paths, work = ctx["paths"], Path(ctx["work"])
+    run_script("Aircraft_Incident_cityscape_graph.py", {
+        "flight_info_path": paths["aircraft_names"], "injury_path": paths["injuries"],
+        "damage_path": paths["damage"], "extracted_path": paths["extracted"], "themes_path": paths.get("themes"),
+        "output_path": str(work / "Aircraft_Incident_Cityscape.html"), "figures_dir": str(work / "figures"),
+        "lod_dir": str(work / "Aircraft_Incident_Cityscape_LOD"),
+    })
+    return ctx["n"]
+
+
+# ── RUN / COMPARE ──────────────────────────────────────
+def run_stages(paths, n, work, stages=STAGES):
+    """``{stage: result}`` with records, seconds, records_per_second, memory_bytes (or ``skipped``)."""
+    ctx = {"paths": dict(paths), "n": n, "work": work}
+    recorder = instrumentation.reset("regression_suite")
+    recorder.start()
+    results = {}
+    for name in stages:
+        before = instrumentation.current_rss() or 0
+        with instrumentation.span(name) as s:
+            records = globals()[f"stage_{name}"](ctx)
+        seconds = recorder.spans[name]["seconds"]
+        if isinstance(records, str):
+            results[name] = {"skipped": records}
+            continue
+        results[name] = {
+            "records": records,
+            "seconds": round(seconds, 4),
+            "records_per_second": round(records / seconds, 1),
+            "memory_bytes": max((s.peak_rss or before) - before, 0),
+        }
+    recorder.stop()
+    return results
+
+
+def regressions(results, baseline, tolerance=TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """``[(stage, message)]`` for stages slower / larger than ``baseline`` allows, or missing from it."""
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None and "skipped" not in result:
+            found.append((name, "no baseline; record one with --update-baseline"))
+            continue
+        if "skipped" in result or "skipped" in base:
+            continue
+        floor = base["records_per_second"] * (1 - tolerance)
+        if result["records_per_second"] < floor:
+            found.append((name, f"{result['records_per_second']:.0f} records/s < {floor:.0f} "
+                                f"(baseline {base['records_per_second']:.0f})"))
+        ceiling = base["memory_bytes"] * (1 + memory_tolerance) + MEMORY_SLACK
+        if result["memory_bytes"] > ceiling:
+            found.append((name, f"{result['memory_bytes'] / 2**20:.0f} MB > {ceiling / 2**20:.0f} MB "
+                                f"(baseline {base['memory_bytes'] / 2**20:.0f} MB)"))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--stages", nargs="*", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep / reuse the generated corpus here (default: temporary)")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed relative throughput drop")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                        help="allowed relative memory growth")
+    parser.add_argument("--report", help="also write the results as JSON")
+    args = parser.parse_args()
+    n = SCALES[args.scale]
+    baselines = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if os.path.exists(args.baseline) else {}
+    if args.scale not in baselines and not args.update_baseline:
+        print(f"no {args.scale} baseline in {args.baseline}; record one with --update-baseline")
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(args.data_dir or Path(tmp, "corpus"))
+        marker = data_dir / f"synthetic-{n}-{args.seed}"
+        if marker.exists():
+            paths = json.loads(marker.read_text(encoding="utf-8"))
+        else:
+            paths = write_corpus(data_dir, n, args.seed)
+            marker.write_text(json.dumps(paths), encoding="utf-8")
+        os.environ[CACHE_DIR_ENV] = str(Path(tmp, "cache"))         # cold columnar cache every run
+        wanted = set(args.stages).union(*(REQUIRES.get(s, ()) for s in args.stages))
+        results = run_stages(paths, n, tmp, [s for s in STAGES if s in wanted])
+
+    found = regressions(results, baselines.get(args.scale, {}), args.tolerance, args.memory_tolerance)
+
+    header = f"{'stage':<18} {'records':>9} {'s':>9} {'records/s':>11} {'memory MB':>10}"
+    print(f"{n} synthetic reports (seed {args.seed})")
+    print(header)
+    print("─" * len(header))
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<18} skipped: {r['skipped']}")
+        else:
+            print(f"{name:<18} {r['records']:>9} {r['seconds']:>9.2f} {r['records_per_second']:>11.0f} "
+                  f"{r['memory_bytes'] / 2**20:>10.1f}")
+
+    if args.report:
+        instrumentation.write_report(args.report, {"scale": args.scale, "n": n, "results": results})
+    if args.update_baseline:
+        baselines[args.scale] = {**baselines.get(args.scale, {}), **results}
+        instrumentation.write_report(args.baseline, baselines)
+        print(f"baseline for {args.scale} written to {args.baseline}")
+        return 0
+    for name, message in found:
+        print(f"REGRESSION {name}: {message}")
+    print("FAILED" if found else "ok")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+synthetic_corpus.py
+───────────────────
+Realistic synthetic accident corpora at any scale (1k … 1M reports) for the
+benchmarks, seeded from the data bundled with the repository:
+
+  • Analysis / Probable Cause sentences are drawn from the damage and cause
+    notes of semantic_enriched_output_cleaned.json; a share of the cause
+    words is replaced with corpus words (by frequency) so causes are as
+    distinct as real reports instead of repeating the same ~1k sentences
+  • aircraft names follow that corpus's aircraft frequencies
+  • injury categories follow the per-category PDF counts of Injuries.txt
+  • damage categories, dates and the "Findings" block follow fixed
+    distributions in the NTSB report layout
+
+``write_corpus(directory, n)`` writes the files the pipeline reads:
+final_extracted_data.json, Aircraft_names.txt, Injuries.txt and
+Aircraft Damage.txt.  The same ``n`` and ``seed`` always give the same
+bytes.
+
+    python -m benchmarks.synthetic_corpus out_dir --records 100000
+"""
+
+import argparse
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from data_access import load_category_map, load_records
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+ENRICHED = REPO_DIR / "semantic_enriched_output_cleaned.json"
+INJURIES = REPO_DIR / "Injuries.txt"
+
+DAMAGES = {"Substantial": 0.80, "Destroyed": 0.12, "Minor": 0.03, "Unknown": 0.05}
+MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August", "September",
+          "October", "November", "December")
+ODD_DATES = ("Sept. 5, 2012", "08/18/2009", "2021-08-15 16:16", "unknown", "")
+ODD_DATE_RATE = 0.01
+CAUSE_HEADER = "The National Transportation Safety Board determines the probable cause(s) of this accident to be:"
+FINDINGS = (
+    ("Aircraft", "Fuel - Fluid management", "Pilot"),
+    ("Aircraft", "Landing gear - Failure", None),
+    ("Aircraft", "Angle of attack - Capability exceeded", None),
+    ("Personnel issues", "Fuel planning", "Pilot"),
+    ("Personnel issues", "Aircraft control", "Pilot"),
+    ("Personnel issues", "Decision making/judgment", "Pilot"),
+    ("Environmental issues", "Wind", "Effect on operation"),
+    ("Environmental issues", "Low visibility", "Decision related to condition"),
+)
+ANALYSIS_SENTENCES = (4, 12)            # sentences per Analysis (uniform, inclusive)
+CAUSE_SENTENCES = (1, 3)
+CAUSE_MUTATION = 0.3                    # share of cause words resampled from the vocabulary
+CHUNK = 10_000                          # records serialised per write
+
+
+# ── SEED DISTRIBUTIONS ─────────────────────────────────
+class Seed:
+    """Vocabularies and weights the generator samples from."""
+
+    def __init__(self, enriched=ENRICHED, injuries=INJURIES):
+        records = load_records(enriched)
+        self.damage_sentences = sorted({s for r in records for s in r["damage_notes"] if s})
+        self.cause_sentences = sorted({s for r in records for s in r["cause_notes"] if s})
+        words = Counter(w for s in self.cause_sentences for w in s.split())
+        self.words, self.word_p = _weights(words)
+        word_id = {w: k for k, w in enumerate(self.words)}
+        self.cause_ids = [np.array([word_id[w] for w in s.split()], dtype=np.int64) for s in self.cause_sentences]
+        aircraft = Counter(a.strip() for r in records for a in r["aircraft"] if a and a.strip())
+        self.aircraft, self.aircraft_p = _weights(aircraft)
+        self.injuries, self.injury_p = _weights(Counter(c for c in load_category_map(injuries).values() if c))
+        self.damages, self.damage_p = list(DAMAGES), np.array(list(DAMAGES.values()))
+
+
+def _weights(counts):
+    labels = sorted(counts)
+    weights = np.array([counts[k] for k in labels], dtype=np.float64)
+    return labels, weights / weights.sum()
+
+
+# ── GENERATION ─────────────────────────────────────────
+def _dates(rng, n):
+    year = rng.integers(2008, 2024, n)
+    month = rng.integers(0, 12, n)
+    day = rng.integers(1, 29, n)
+    hour, minute = rng.integers(0, 24, n), rng.integers(0, 60, n)
+    odd = rng.random(n) < ODD_DATE_RATE
+    odd_pick = rng.integers(0, len(ODD_DATES), n)
+    return [
+        ODD_DATES[o] if is_odd else f"{MONTHS[m]} {d}, {y}, {h:02d}:{mi:02d} Local"
+        for y, m, d, h, mi, is_odd, o in zip(year.tolist(), month.tolist(), day.tolist(), hour.tolist(),
+                                             minute.tolist(), odd.tolist(), odd_pick.tolist())
+    ]
+
+
+def _paragraphs(rng, n, sentences, lengths):
+    counts = rng.integers(lengths[0], lengths[1] + 1, n)
+    picks = rng.integers(0, len(sentences), int(counts.sum())).tolist()
+    out, start = [], 0
+    for k in counts.tolist():
+        out.append(" ".join(sentences[i] for i in picks[start:start + k]))
+        start += k
+    return out
+
+
+def _mutated_paragraphs(rng, n, vocab, lengths, rate):
+    """Cause paragraphs with ``rate`` of their words resampled from the cause vocabulary."""
+    counts = rng.integers(lengths[0], lengths[1] + 1, n)
+    picks = rng.integers(0, len(vocab.cause_ids), int(counts.sum()))
+    ids = np.concatenate([vocab.cause_ids[i] for i in picks.tolist()])
+    sentence_ends = np.cumsum([len(vocab.cause_ids[i]) for i in picks.tolist()])
+    bounds = np.concatenate([[0], sentence_ends[np.cumsum(counts) - 1]])
+    mutate = rng.random(len(ids)) < rate
+    ids[mutate] = rng.choice(len(vocab.words), int(mutate.sum()), p=vocab.word_p)
+    words = np.array(vocab.words, dtype=object)[ids].tolist()
+    return [" ".join(words[a:b]) for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+
+def _findings(rng, n):
+    lines = []
+    for k, first in zip(rng.integers(1, 4, n).tolist(), rng.integers(0, len(FINDINGS), n).tolist()):
+        block = ["Findings"]
+        for category, item, actor in (FINDINGS[(first + j) % len(FINDINGS)] for j in range(k)):
+            block += [category, f"{item} - {actor}" if actor else item]
+        lines.append("\n".join(block))
+    return lines
+
+
+def generate(n, seed=0, start_id=100000, vocab=None):
+    """
+    ``(records, injury, damage)`` for ``n`` reports: records in the
+    final_extracted_data.json layout plus each report's injury and damage
+    category.
+    """
+    vocab = vocab or Seed()
+    rng = np.random.default_rng(seed)
+    aircraft = rng.choice(len(vocab.aircraft), n, p=vocab.aircraft_p).tolist()
+    injury = rng.choice(len(vocab.injuries), n, p=vocab.injury_p).tolist()
+    damage = rng.choice(len(vocab.damages), n, p=vocab.damage_p).tolist()
+    dates = _dates(rng, n)
+    analyses = _paragraphs(rng, n, vocab.damage_sentences + vocab.cause_sentences, ANALYSIS_SENTENCES)
+    causes = _mutated_paragraphs(rng, n, vocab, CAUSE_SENTENCES, CAUSE_MUTATION)
+    findings = _findings(rng, n)
+
+    records = []
+    for k in range(n):
+        name = vocab.aircraft[aircraft[k]]
+        records.append({
+            "File Name": f"{start_id + k}.pdf",
+            "Flight Information": {"Aircraft": name.split()[0], "Aircraft_model": name, "Date & Time": dates[k]},
+            "Analysis": analyses[k],
+            "Probable Cause and Findings": f"{CAUSE_HEADER}\n{causes[k]}\n{findings[k]}",
+        })
+    return (records, [vocab.injuries[i] for i in injury], [vocab.damages[d] for d in damage])
+
+
+# ── FILES ──────────────────────────────────────────────
+def _write_grouped(path, title, names, labels, indent):
+    groups = defaultdict(list)
+    for name, label in zip(names, labels):
+        groups[label].append(name)
+    pad = "  " * indent
+    with open(path, "w", encoding="utf-8") as f:
+        if title:
+            f.write(f"{title}:\n")
+        for label, pdfs in groups.items():
+            f.write(f"{pad}{label}:\n")
+            f.writelines(f"{pad}  {pdf}\n" for pdf in pdfs)
+
+
+def write_corpus(directory, n, seed=0):
+    """Write a synthetic corpus of ``n`` reports into ``directory``; returns ``{name: path}``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    vocab = Seed()
+    paths = {
+        "extracted": directory / "final_extracted_data.json",
+        "aircraft_names": directory / "Aircraft_names.txt",
+        "injuries": directory / "Injuries.txt",
+        "damage": directory / "Aircraft Damage.txt",
+    }
+    names, models, injuries, damages = [], [], [], []
+    with open(paths["extracted"], "w", encoding="utf-8") as f:
+        f.write("[")
+        for start in range(0, n, CHUNK):
+            records, injury, damage = generate(min(CHUNK, n - start), seed=seed + start, start_id=100000 + start,
+                                               vocab=vocab)
+            body = ",\n".join(json.dumps(r, ensure_ascii=False) for r in records)
+            f.write(("\n" if start == 0 else ",\n") + body)
+            names += [r["File Name"] for r in records]
+            models += [r["Flight Information"]["Aircraft_model"] for r in records]
+            injuries += injury
+            damages += damage
+        f.write("\n]\n")
+    _write_grouped(paths["aircraft_names"], None, names, models, 0)
+    _write_grouped(paths["injuries"], "Injuries", names, injuries, 1)
+    _write_grouped(paths["damage"], "Aircraft Damage", names, damages, 1)
+    return {key: str(path) for key, path in paths.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for key, path in write_corpus(args.directory, args.records, args.seed).items():
+        print(f"{key:<16} {path}")
+
+
+if __name__ == "__main__":
+    main()
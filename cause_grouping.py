@@ -0,0 +1,94 @@
+"""
+cause_grouping.py
+─────────────────
+Threshold grouping of documents by TF-IDF cosine similarity without an N×N
+matrix.
+
+TF-IDF rows are L2-normalised, so the cosine similarity of a row block with
+the corpus is a single sparse product.  Each block of ``chunk_size`` rows is
+multiplied, thresholded and reduced to (i, j) edges straight away; the edges
+are merged into a union-find structure and the block is discarded.  Block
+height shrinks as N grows so one block never exceeds a fixed number of
+similarities; peak memory is the TF-IDF matrix (linear in N) plus that
+constant block, rather than an N×N matrix.
+"""
+
+import numpy as np
+
+# ── UNION-FIND ─────────────────────────────────────────
+class UnionFind:
+    """Disjoint-set forest over ``0 … n-1`` with path halving and union by size."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj:
+            return
+        if self.size[ri] < self.size[rj]:
+            ri, rj = rj, ri
+        self.parent[rj] = ri
+        self.size[ri] += self.size[rj]
+
+    def groups(self, min_size=2):
+        """Components as sorted index lists, ordered by their first member."""
+        roots = np.array([self.find(i) for i in range(len(self.parent))], dtype=np.int64)
+        order = np.argsort(roots, kind="stable")
+        bounds = np.flatnonzero(np.diff(roots[order])) + 1
+        groups = [g.tolist() for g in np.split(order, bounds) if g.size >= min_size]
+        return sorted(groups, key=lambda g: g[0])
+
+
+# ── SPARSE THRESHOLDED PAIRS ───────────────────────────
+def threshold_pairs(matrix, threshold, chunk_size=2000, max_block_entries=4_000_000):
+    """
+    Yield ``(rows, cols)`` index arrays of pairs i < j with cosine ≥ threshold.
+
+    ``matrix`` must be a sparse matrix with L2-normalised rows (the default
+    for ``TfidfVectorizer``).  Blocks hold at most ``chunk_size`` rows and
+    are shrunk further so that a block never exceeds ``max_block_entries``
+    similarities even when every pair overlaps, keeping peak memory fixed
+    as N grows.
+    """
+    matrix = matrix.tocsr().astype(np.float32)
+    matrix_t = matrix.T.tocsc()
+    n = matrix.shape[0]
+    step = max(1, min(chunk_size, max_block_entries // max(n, 1)))
+    for start in range(0, n, step):
+        block = (matrix[start:start + step] @ matrix_t).tocsr()
+        rows = np.repeat(np.arange(start, start + block.shape[0], dtype=np.int64), np.diff(block.indptr))
+        cols = block.indices.astype(np.int64)
+        keep = (block.data >= threshold) & (cols > rows)
+        yield rows[keep], cols[keep]
+
+
+def group_pairs(n, pairs, min_size=2):
+    """Connected components over ``0 … n-1`` of an iterable of (i, j) edges."""
+    uf = UnionFind(n)
+    for i, j in pairs:
+        uf.union(i, j)
+    return uf.groups(min_size=min_size)
+
+
+def group_similar(matrix, threshold=0.65, chunk_size=2000, min_size=2, max_block_entries=4_000_000):
+    """
+    Connected components of the "cosine ≥ threshold" graph.
+
+    Returns a list of groups (sorted document indices); singletons are
+    dropped unless ``min_size`` is 1.
+    """
+    edges = (
+        pair
+        for rows, cols in threshold_pairs(matrix, threshold, chunk_size, max_block_entries)
+        for pair in zip(rows.tolist(), cols.tolist())
+    )
+    return group_pairs(matrix.shape[0], edges, min_size=min_size)
@@ -1,50 +1,72 @@
-import json
 import re
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from collections import Counter
 
+from cause_grouping import group_pairs, group_similar
+from cause_text import dedupe_causes, members
+from corpus_model import load_corpus
+from instrumentation import span
+from json_stream import iter_records
+
 # Load the JSON data
 file_path = "C:\\Users\\olaye\\Documents\\final_extracted_data.json"  # Update as needed
-with open(file_path, "r", encoding="utf-8") as f:
-    data = json.load(f)
+STREAMING = False  # read records one at a time, keeping only the cause text and file name
+if STREAMING:
+    data = ((r.get("File Name", "Unknown File"), r.get("Probable Cause and Findings", ""))
+            for r in iter_records(file_path))
+else:
+    corpus = load_corpus(file_path)
+    data = zip(corpus.file_names, corpus.texts["cause"])
 
 # Extract file names and causes
 file_names = []
 causes = []
 
-for record in data:
-    cause = record.get("Probable Cause and Findings", "").strip()
+for file_name, cause in data:
+    cause = cause.strip()
     if cause and cause.lower() != "not found":
         causes.append(cause)
-        file_names.append(record.get("File Name", "Unknown File"))
+        file_names.append(file_name or "Unknown File")
 
-# Vectorize the causes
-vectorizer = TfidfVectorizer(stop_words="english")
-tfidf_matrix = vectorizer.fit_transform(causes)
-similarity_matrix = cosine_similarity(tfidf_matrix)
+# Parse every cause once without its boilerplate (see cause_text.py); reports
+# with the same statement and findings share one distinct cause, and only the
+# distinct causes are vectorised and grouped
+with span("cause_dedupe", records=len(causes)):
+    unique, index = dedupe_causes(causes)
+    unique_files = members(index, len(unique))
+    texts = [cause.text for cause in unique]
 
-# Group similar causes
-threshold = 0.65
-groups = []
-visited = set()
+# Group similar causes: connected components of the "cosine >= threshold"
+# graph.  "tfidf" compares words, computed block by block on the sparse
+# matrix (no N x N matrix); "embedding" compares spaCy word-vector averages
+# through an approximate-nearest-neighbour index, so paraphrases such as
+# "exceedance of critical angle of attack" / "aerodynamic stall" can join.
+# Distinct causes are in first-seen order, so groups (sorted, ordered by first
+# member) stay in file order; a group is kept when it covers at least two files.
+GROUPING = "tfidf"
+with span("cause_groups", records=len(texts)):
+    if GROUPING == "embedding":
+        from semantic_vectors import IVFIndex, embed_texts, load_vector_nlp, neighbour_pairs
 
-for i in range(len(causes)):
-    if i in visited:
-        continue
-    group = [(file_names[i], causes[i])]
-    visited.add(i)
-    for j in range(i + 1, len(causes)):
-        if j not in visited and similarity_matrix[i][j] >= threshold:
-            group.append((file_names[j], causes[j]))
-            visited.add(j)
-    if len(group) > 1:
-        groups.append(group)
+        threshold = 0.85
+        vectors = embed_texts(texts, load_vector_nlp())
+        edges = neighbour_pairs(vectors, IVFIndex.build(vectors), k=10, threshold=threshold)
+        members_list = group_pairs(len(texts), edges, min_size=1)
+    else:
+        vectorizer = TfidfVectorizer(stop_words="english")
+        tfidf_matrix = vectorizer.fit_transform(texts)
+        threshold = 0.65
+        members_list = group_similar(tfidf_matrix, threshold=threshold, chunk_size=2000, min_size=1)
+members_list = [m for m in members_list if sum(len(unique_files[u]) for u in m) >= 2]
+groups = [[([file_names[i] for i in unique_files[u]], unique[u]) for u in m] for m in members_list]
 
-# Helper: Clean and tokenize for summary
-def extract_keywords(texts, top_n=5):
-    words = re.findall(r'\b[a-zA-Z]+\b', " ".join(texts).lower())
-    common = Counter(words).most_common(top_n)
+# Helper: Clean and tokenize for summary; each cause counts once per file
+def extract_keywords(texts, top_n=5, weights=None):
+    words = Counter()
+    for text, weight in zip(texts, weights or [1] * len(texts)):
+        for word in re.findall(r'\b[a-zA-Z]+\b', text.lower()):
+            words[word] += weight
+    common = words.most_common(top_n)
     return [word for word, count in common]
 
 # Save to output file
@@ -52,12 +74,13 @@ output_file = "C:\\Users\\olaye\\Documents\\grouped_causes_summary.txt"
 with open(output_file, "w", encoding="utf-8") as f:
     for idx, group in enumerate(groups, 1):
         f.write(f"Group {idx} (Similar Causes of Accidents):\n")
-        causes_only = []
-        for fname, cause in group:
-            causes_only.append(cause)
-            f.write(f"\nFile: {fname}\nCause:\n{cause}\n")
+        causes_only, weights = [], []
+        for fnames, cause in group:
+            causes_only.append(cause.text)
+            weights.append(len(fnames))
+            f.write(f"\nFile: {', '.join(fnames)}\nCause:\n{cause.render()}\n")
         # Extract keywords
-        keywords = extract_keywords(causes_only)
+        keywords = extract_keywords(causes_only, weights=weights)
         f.write(f"\n📝 Summary Keywords: {', '.join(keywords)}\n")
         f.write("\n" + "="*90 + "\n\n")
 
@@ -0,0 +1,118 @@
+"""
+cause_text.py
+─────────────
+"Probable Cause and Findings" text reduced to what differs between reports.
+
+  • ``parse_cause`` drops the NTSB determination sentence ("The National
+    Transportation Safety Board determines the probable cause(s) of this
+    accident to be:"), page footers ("Page 2 of 5"), case-number lines
+    ("GAA19CA486") and any report sections the extraction ran on into
+    ("Factual Information" …), and splits the rest into the cause statement (wrapped
+    lines re-joined) and the Findings as ``(category, item, actor)`` tuples –
+    ("Personnel issues", "Aircraft control", "Pilot"); ``actor`` is ``None``
+    when the finding names no person ("Angle of attack - Capability
+    exceeded").
+  • ``dedupe_causes`` content-hashes the parsed causes, so grouping and
+    similarity run on every distinct cause once and ``members`` fans the
+    results back out to the reports.
+"""
+
+import hashlib
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+from pdf_extraction import HEADINGS
+
+FINDING_CATEGORIES = ("Aircraft", "Personnel issues", "Environmental issues", "Organizational issues",
+                      "Not determined")
+ACTORS = ("Pilot", "Student pilot", "Flight instructor", "Instructor/check pilot", "Copilot", "Pilot of other aircraft",
+          "Passenger", "Mechanic", "Maintenance personnel", "Owner/builder", "Air traffic controller",
+          "ATC personnel", "Dispatcher", "Company/operator", "Flight crew", "Flight engineer", "Other person",
+          "Ground personnel", "Manufacturer", "Inspector", "Pilot not rated")
+
+DETERMINATION_RE = re.compile(r"^\s*The National Transportation Safety Board determines the probable cause\(s\) "
+                              r"of this (?:accident|incident)(?: to be)?:?\s*", re.IGNORECASE)
+PAGE_RE = re.compile(r"^Page \d+ of \d+$")
+CASE_RE = re.compile(r"^[A-Z]{3}\d{2}[A-Z]{2}\d{3,4}[A-Z]?$")       # NTSB accident number, e.g. CEN19FA305
+CATEGORY_RE = re.compile(r"^(?:" + "|".join(re.escape(c) for c in FINDING_CATEGORIES) + r")(?: \(A\d+\))?$")
+
+
+# ── PARSING ────────────────────────────────────────────
+class Finding(NamedTuple):
+    category: str
+    item: str
+    actor: str = None
+
+
+class Cause(NamedTuple):
+    statement: str
+    findings: tuple = ()
+
+    @property
+    def key(self):
+        """SHA-1 of the statement and findings: equal for reports with the same cause."""
+        payload = "\x1e".join([self.statement] + ["\x1f".join(f"{v or ''}" for v in f) for f in self.findings])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def text(self):
+        """Statement and findings on one line, for vectorising and SequenceMatcher."""
+        return " ".join([self.statement] + [" ".join(v for v in f if v) for f in self.findings])
+
+    def render(self):
+        """Statement plus one indented line per finding (the cause summary's layout)."""
+        lines = [self.statement]
+        if self.findings:
+            lines.append("Findings:")
+            lines += [f"  {f.category or '?'}: {f.item}" + (f" ({f.actor})" if f.actor else "") for f in self.findings]
+        return "\n".join(lines)
+
+
+def parse_cause(text):
+    """``Cause`` of one "Probable Cause and Findings" text, boilerplate removed."""
+    lines = (line.strip() for line in (text or "").splitlines())
+    lines = [line for line in lines if line and not PAGE_RE.match(line) and not CASE_RE.match(line)]
+    end = next((k for k, line in enumerate(lines) if line in HEADINGS), len(lines))
+    lines = lines[:end]
+    split = lines.index("Findings") if "Findings" in lines else len(lines)
+    statement = DETERMINATION_RE.sub("", " ".join(" ".join(lines[:split]).split()), count=1)
+    findings, category = [], None
+    for line in lines[split + 1:]:
+        if CATEGORY_RE.match(line):                # "Personnel issues (A2)" in multi-aircraft reports
+            category = line
+            continue
+        item, sep, actor = line.rpartition(" - ")
+        findings.append(Finding(category, item, actor) if sep and actor in ACTORS else Finding(category, line))
+    return Cause(statement, tuple(findings))
+
+
+# ── DEDUPLICATION ──────────────────────────────────────
+def dedupe_causes(texts):
+    """
+    ``(causes, index)``: the distinct parsed causes in first-seen order and,
+    for every input text, the position of its cause in ``causes``.
+    Repeated raw texts are parsed once.
+    """
+    by_text, by_key, causes = {}, {}, []
+    index = np.empty(len(texts), dtype=np.int64)
+    for k, text in enumerate(texts):
+        u = by_text.get(text)
+        if u is None:
+            cause = parse_cause(text)
+            u = by_key.setdefault(cause.key, len(causes))
+            if u == len(causes):
+                causes.append(cause)
+            by_text[text] = u
+        index[k] = u
+    return causes, index
+
+
+def members(index, n=None):
+    """``[array of input positions]`` per distinct cause, from ``dedupe_causes``'s ``index``."""
+    n = int(index.max()) + 1 if n is None and len(index) else n or 0
+    if not n:
+        return []
+    order = np.argsort(index, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(index, minlength=n))[:-1])
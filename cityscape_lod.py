@@ -0,0 +1,142 @@
+"""
+cityscape_lod.py
+────────────────
+Level-of-detail export for cityscapes with too many aircraft to draw at once.
+
+The overview page bins aircraft by manufacturer (``manufacturers.MANUFACTURERS``)
+into one aggregate tower each: height = total PDFs, footprint grows with the
+number of models.  Clicking a tower opens that manufacturer's drill-down page,
+which holds the original per-model bars.  Drill-down pages are pre-split
+into chunks of at most ``CHUNK_BARS`` bars, so neither the overview nor any
+single page grows with the size of the corpus.
+
+All pages are written into one directory and share a single plotly.min.js
+(``include_plotlyjs="directory"``) instead of inlining it per page.  With
+``figure_path`` the overview is also written there through
+``figure_export.write_figure`` (HTML + dashboard JSON), its drill-down links
+pointing into the LOD directory, so a script's declared output always exists.
+The dashboard follows the same links on click; they resolve when the LOD
+directory is served with the figures (static hosting of a common parent, or
+viz_server for pages below the figures directory's parent).
+"""
+
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+from cityscape_builder import build_cityscape_traces, grid_positions
+from figure_export import write_figure
+from manufacturers import manufacturer_of
+
+LOD_THRESHOLD = 1000        # scripts switch to the overview above this many bars
+CHUNK_BARS = 1000           # bars per drill-down page
+OVERVIEW_FILE = "index.html"
+TOWER_COLOR = "rgba(0, 100, 255, 0.7)"
+
+_CLICK_JS = """
+var plot = document.getElementById('{plot_id}');
+plot.on('plotly_click', function (event) {
+    var target = event.points[0].customdata;
+    if (target) { window.location.href = target; }
+});
+"""
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "block"
+
+
+def manufacturer_blocks(names):
+    """``{manufacturer: [bar index, …]}`` in first-seen order."""
+    blocks = {}
+    for idx, name in enumerate(names):
+        blocks.setdefault(manufacturer_of(name), []).append(idx)
+    return blocks
+
+
+def _page_name(slug, part, n_parts):
+    return f"{slug}.html" if n_parts == 1 else f"{slug}-{part + 1}.html"
+
+
+def _nav_annotation(links):
+    text = " · ".join(f'<a href="{href}">{label}</a>' for label, href in links)
+    return dict(text=text, x=0, y=1, xref="paper", yref="paper",
+                xanchor="left", yanchor="bottom", showarrow=False)
+
+
+def write_lod_cityscape(out_dir, names, heights, widths, colors, texts,
+                        title="Aircraft Cityscape", layout=None, chunk_bars=CHUNK_BARS,
+                        columns=20, spacing=5, opacity=0.7, figure_path=None, figures_dir=None):
+    """
+    Write the overview page plus per-manufacturer drill-down pages to ``out_dir``.
+
+    ``names`` / ``heights`` / ``widths`` / ``colors`` / ``texts`` describe the
+    per-model bars exactly as the flat cityscape would draw them; ``layout``
+    is applied to every page.  ``figure_path`` / ``figures_dir`` also write
+    the overview with ``write_figure``.  Returns the overview path.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    heights = np.asarray(heights, dtype=np.float64)
+    widths = np.broadcast_to(np.asarray(widths, dtype=np.float64), heights.shape)
+    colors = np.broadcast_to(np.asarray(colors, dtype=object), heights.shape)
+    texts = np.asarray(texts, dtype=object)
+    layout = layout or {}
+
+    blocks = manufacturer_blocks(names)
+    tower_names, tower_heights, tower_counts, tower_links = [], [], [], []
+    for maker, idx in blocks.items():
+        idx = np.asarray(idx)
+        slug = _slug(maker)
+        parts = [idx[i:i + chunk_bars] for i in range(0, idx.size, chunk_bars)]
+        for part, sel in enumerate(parts):
+            links = [("← overview", OVERVIEW_FILE)]
+            if part > 0:
+                links.append(("‹ previous", _page_name(slug, part - 1, len(parts))))
+            if part + 1 < len(parts):
+                links.append(("next ›", _page_name(slug, part + 1, len(parts))))
+            x, y = grid_positions(sel.size, columns=columns, spacing=spacing)
+            fig = go.Figure(build_cityscape_traces(
+                x, y, widths[sel], widths[sel], heights[sel], texts[sel], color=colors[sel].tolist(), opacity=opacity
+            ))
+            fig.update_layout(**layout)
+            page_title = maker if len(parts) == 1 else f"{maker} ({part + 1}/{len(parts)})"
+            fig.update_layout(title=f"{title} – {page_title}", annotations=[_nav_annotation(links)])
+            fig.write_html(out_dir / _page_name(slug, part, len(parts)), include_plotlyjs="directory")
+
+        tower_names.append(maker)
+        tower_heights.append(heights[idx].sum())
+        tower_counts.append(idx.size)
+        tower_links.append(_page_name(slug, 0, len(parts)))
+
+    counts = np.asarray(tower_counts, dtype=np.float64)
+    footprint = 1.0 + 3.0 * np.sqrt(counts / counts.max()) if counts.size else counts
+    hover = [
+        f"Manufacturer: {m}<br>Models: {c}<br>PDFs: {int(h)}<br>Click to drill down"
+        for m, c, h in zip(tower_names, tower_counts, tower_heights)
+    ]
+    x, y = grid_positions(len(tower_names), columns=max(1, int(np.ceil(np.sqrt(len(tower_names))))), spacing=spacing)
+
+    def overview_figure(links):
+        fig = go.Figure(build_cityscape_traces(
+            x, y, footprint, footprint, tower_heights, hover, color=TOWER_COLOR, opacity=opacity, customdata=links
+        ))
+        fig.update_layout(**layout)
+        fig.update_layout(title=f"{title} – by manufacturer")
+        return fig
+
+    overview = out_dir / OVERVIEW_FILE
+    overview_figure(tower_links).write_html(overview, include_plotlyjs="directory", post_script=_CLICK_JS)
+    if figure_path:
+        base = os.path.relpath(out_dir, Path(figure_path).parent)
+        write_figure(overview_figure([Path(base, link).as_posix() for link in tower_links]), figure_path,
+                     figures_dir, post_script=_CLICK_JS, links=True)
+    return overview
+
+
+def use_lod(mode, n_bars):
+    """``mode`` is True / False or ``"auto"`` (LOD only above ``LOD_THRESHOLD`` bars)."""
+    return n_bars > LOD_THRESHOLD if mode == "auto" else bool(mode)
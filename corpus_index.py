@@ -0,0 +1,401 @@
+"""
+corpus_index.py
+───────────────
+On-disk inverted index and query API over the enriched corpus
+(semantic_enriched_output_cleaned.json).
+
+Indexed fields
+  • keywords  – the ``keywords`` token list
+  • cause     – ``cause_notes`` sentences
+  • damage    – ``damage_notes`` sentences
+  • aircraft  – ``aircraft`` strings
+
+Postings are positional: for every (field, term) the sorted document ids and,
+per document, the token positions, both delta-encoded into uint32 arrays and
+stored with ``np.savez_compressed``.  Values of a multi-valued field are
+separated by a position gap so phrases never span two sentences.
+
+Documents also carry facet codes – aircraft, injury (Injuries.txt) and
+damage (Aircraft Damage.txt) – so facet counts for any result set are one
+``np.bincount``.
+
+Query syntax
+    fatigue "landing gear"                 implicit AND, quoted phrase
+    cause:fatigue AND aircraft:cessna      field-restricted terms
+    (stall OR spin) AND NOT damage:destroyed
+
+``QueryResult.file_names`` / ``.records()`` feed the visualization scripts.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+from data_access import _file_sha1, cache_dir_for, load_category_map, load_records
+
+FIELDS = {
+    "keywords": "keywords",
+    "cause": "cause_notes",
+    "damage": "damage_notes",
+    "aircraft": "aircraft",
+}
+FIELD_ALIASES = {"kw": "keywords", "cause_notes": "cause", "damage_notes": "damage"}
+FACETS = ("aircraft", "injury", "damage")
+POSITION_GAP = 100
+INDEX_VERSION = 1
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def _field_values(rec, field):
+    values = rec.get(FIELDS[field]) or []
+    return [values] if isinstance(values, str) else values
+
+
+def _key(field, term):
+    return f"{field}\x1f{term}"
+
+
+def _codes(values):
+    """Dictionary-encode ``values`` → (code array, value table)."""
+    table = {}
+    codes = np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(table)
+
+
+# ── BUILD ──────────────────────────────────────────────
+def build_index(corpus_path, index_dir=None, injury_path=None, damage_path=None):
+    """Index ``corpus_path`` into ``index_dir`` (default: next to it under .rita_cache)."""
+    corpus_path = Path(corpus_path)
+    index_dir = Path(index_dir or cache_dir_for(corpus_path, "index"))
+    records = load_records(corpus_path)
+    injury_map = load_category_map(injury_path) if injury_path else {}
+    damage_map = load_category_map(damage_path) if damage_path else {}
+
+    postings = {}                                   # key -> {doc: [positions]}
+    for doc, rec in enumerate(records):
+        for field in FIELDS:
+            pos = 0
+            for value in _field_values(rec, field):
+                for tok in tokenize(value):
+                    postings.setdefault(_key(field, tok), {}).setdefault(doc, []).append(pos)
+                    pos += 1
+                pos += POSITION_GAP
+
+    keys = sorted(postings)
+    doc_offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    doc_deltas, pos_counts, pos_deltas = [], [], []
+    for k, key in enumerate(keys):
+        docs = sorted(postings[key])
+        doc_offsets[k + 1] = doc_offsets[k] + len(docs)
+        doc_deltas.append(np.diff(docs, prepend=0))
+        for doc in docs:
+            positions = postings[key][doc]
+            pos_counts.append(len(positions))
+            pos_deltas.append(np.diff(positions, prepend=0))
+    pos_offsets = np.zeros(len(pos_counts) + 1, dtype=np.int64)
+    np.cumsum(pos_counts, out=pos_offsets[1:])
+
+    file_names = [rec.get("file_name", "") for rec in records]
+    aircraft_lists = [_field_values(rec, "aircraft") for rec in records]
+    aircraft_codes, aircraft_table = _codes([a for lst in aircraft_lists for a in lst])
+    aircraft_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum([len(lst) for lst in aircraft_lists], out=aircraft_offsets[1:])
+    injury_codes, injury_table = _codes([injury_map.get(f, "Unknown") or "Unknown" for f in file_names])
+    damage_codes, damage_table = _codes([damage_map.get(f, "Unknown") or "Unknown" for f in file_names])
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        index_dir / "postings.npz",
+        keys=np.asarray(keys, dtype=str),
+        doc_offsets=doc_offsets,
+        doc_deltas=np.concatenate(doc_deltas).astype(np.uint32) if doc_deltas else np.zeros(0, np.uint32),
+        pos_offsets=pos_offsets,
+        pos_deltas=np.concatenate(pos_deltas).astype(np.uint32) if pos_deltas else np.zeros(0, np.uint32),
+        file_names=np.asarray(file_names, dtype=str),
+        aircraft_codes=aircraft_codes,
+        aircraft_offsets=aircraft_offsets,
+        injury_codes=injury_codes,
+        damage_codes=damage_codes,
+    )
+    meta = {
+        "version": INDEX_VERSION,
+        "corpus": str(corpus_path),
+        "corpus_sha1": _file_sha1(corpus_path),
+        "injury_sha1": _file_sha1(injury_path) if injury_path else None,
+        "damage_sha1": _file_sha1(damage_path) if damage_path else None,
+        "n_docs": len(records),
+        "facets": {"aircraft": aircraft_table, "injury": injury_table, "damage": damage_table},
+    }
+    (index_dir / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    return CorpusIndex(index_dir)
+
+
+def open_index(corpus_path, index_dir=None, injury_path=None, damage_path=None):
+    """Open the index for ``corpus_path``, rebuilding it if any source changed."""
+    corpus_path = Path(corpus_path)
+    index_dir = Path(index_dir or cache_dir_for(corpus_path, "index"))
+    meta_path = index_dir / "meta.json"
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        fresh = (
+            meta.get("version") == INDEX_VERSION
+            and meta["corpus_sha1"] == _file_sha1(corpus_path)
+            and meta["injury_sha1"] == (_file_sha1(injury_path) if injury_path else None)
+            and meta["damage_sha1"] == (_file_sha1(damage_path) if damage_path else None)
+        )
+        if fresh:
+            return CorpusIndex(index_dir)
+    return build_index(corpus_path, index_dir, injury_path, damage_path)
+
+
+# ── QUERY PARSING ──────────────────────────────────────
+_QUERY_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|(?:(\w+):)?"([^"]*)"|(?:(\w+):)?([^\s()"]+))')
+
+
+def _lex(query):
+    pos, out = 0, []
+    query = query.strip()
+    while pos < len(query):
+        m = _QUERY_TOKEN_RE.match(query, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"cannot parse query near {query[pos:]!r}")
+        lparen, rparen, pfield, phrase, tfield, term = m.groups()
+        if lparen:
+            out.append(("(",))
+        elif rparen:
+            out.append((")",))
+        elif phrase is not None:
+            out.append(("phrase", pfield, tokenize(phrase)))
+        elif term in ("AND", "OR", "NOT") and tfield is None:
+            out.append((term,))
+        else:
+            out.append(("phrase", tfield, tokenize(term)))
+        pos = m.end()
+    return out
+
+
+class _Parser:
+    """``or := and (OR and)*``, ``and := not (AND? not)*``, ``not := NOT not | atom``."""
+
+    def __init__(self, tokens):
+        self.tokens, self.i = tokens, 0
+
+    def peek(self):
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def take(self):
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected {self.peek()!r} in query")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == "OR":
+            self.take()
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() in ("AND", "NOT", "(", "phrase"):
+            if self.peek() == "AND":
+                self.take()
+            node = ("and", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.parse_not())
+        if self.peek() == "(":
+            self.take()
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise ValueError("missing ')' in query")
+            self.take()
+            return node
+        if self.peek() == "phrase":
+            _, field, words = self.take()
+            if field is not None:
+                field = FIELD_ALIASES.get(field, field)
+                if field not in FIELDS:
+                    raise ValueError(f"unknown field {field!r}; use one of {sorted(FIELDS)}")
+            return ("phrase", field, words)
+        raise ValueError(f"unexpected {self.peek()!r} in query")
+
+
+def parse_query(query):
+    return _Parser(_lex(query)).parse()
+
+
+# ── INDEX ──────────────────────────────────────────────
+class QueryResult:
+    """Matching documents of a query, as sorted doc ids."""
+
+    def __init__(self, index, doc_ids):
+        self.index = index
+        self.doc_ids = doc_ids
+
+    def __len__(self):
+        return int(self.doc_ids.size)
+
+    @property
+    def file_names(self):
+        return self.index.file_names[self.doc_ids].tolist()
+
+    def records(self):
+        """The matching records from the indexed corpus file."""
+        records = load_records(self.index.meta["corpus"])
+        return [records[i] for i in self.doc_ids.tolist()]
+
+    def facets(self, names=FACETS, top=None):
+        """``{facet: [(value, count), …]}`` sorted by count, for this result set."""
+        return {name: self.index.facet_counts(name, self.doc_ids, top) for name in names}
+
+
+class CorpusIndex:
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        self.meta = json.loads((self.index_dir / "meta.json").read_text(encoding="utf-8"))
+        with np.load(self.index_dir / "postings.npz") as z:
+            arrays = {name: z[name] for name in z.files}
+        self._lookup = {key: k for k, key in enumerate(arrays.pop("keys").tolist())}
+        self.file_names = arrays.pop("file_names")
+        self.__dict__.update({f"_{name}": arr for name, arr in arrays.items()})
+        self.n_docs = self.meta["n_docs"]
+        self._all = np.arange(self.n_docs, dtype=np.int64)
+
+    # postings ------------------------------------------
+    def _entries(self, field, term):
+        k = self._lookup.get(_key(field, term))
+        if k is None:
+            return None
+        return int(self._doc_offsets[k]), int(self._doc_offsets[k + 1])
+
+    def postings(self, field, term):
+        """Sorted doc ids containing ``term`` in ``field``."""
+        span = self._entries(field, term)
+        if span is None:
+            return np.zeros(0, dtype=np.int64)
+        lo, hi = span
+        return np.cumsum(self._doc_deltas[lo:hi], dtype=np.int64)
+
+    def _positions(self, entry):
+        lo, hi = self._pos_offsets[entry], self._pos_offsets[entry + 1]
+        return np.cumsum(self._pos_deltas[lo:hi], dtype=np.int64)
+
+    def _phrase_in_field(self, field, words):
+        spans = [self._entries(field, w) for w in words]
+        if any(s is None for s in spans):
+            return np.zeros(0, dtype=np.int64)
+        docs = [self.postings(field, w) for w in words]
+        common = docs[0]
+        for d in docs[1:]:
+            common = np.intersect1d(common, d, assume_unique=True)
+        if len(words) == 1 or common.size == 0:
+            return common
+        entry_of = [dict(zip(d.tolist(), range(s[0], s[1]))) for d, s in zip(docs, spans)]
+        hits = []
+        for doc in common.tolist():
+            starts = self._positions(entry_of[0][doc])
+            for offset, lookup in enumerate(entry_of[1:], start=1):
+                starts = np.intersect1d(starts, self._positions(lookup[doc]) - offset, assume_unique=True)
+                if starts.size == 0:
+                    break
+            if starts.size:
+                hits.append(doc)
+        return np.asarray(hits, dtype=np.int64)
+
+    def _eval(self, node):
+        op = node[0]
+        if op == "phrase":
+            _, field, words = node
+            if not words:
+                return self._all
+            fields = [field] if field else list(FIELDS)
+            result = np.zeros(0, dtype=np.int64)
+            for f in fields:
+                result = np.union1d(result, self._phrase_in_field(f, words))
+            return result
+        if op == "and":
+            return np.intersect1d(self._eval(node[1]), self._eval(node[2]), assume_unique=True)
+        if op == "or":
+            return np.union1d(self._eval(node[1]), self._eval(node[2]))
+        if op == "not":
+            return np.setdiff1d(self._all, self._eval(node[1]), assume_unique=True)
+        raise ValueError(f"bad query node {node!r}")
+
+    def search(self, query):
+        """Evaluate a boolean/phrase query (see module docstring)."""
+        if not query or not query.strip():
+            return QueryResult(self, self._all)
+        return QueryResult(self, self._eval(parse_query(query)))
+
+    # facets --------------------------------------------
+    def facet_counts(self, name, doc_ids=None, top=None):
+        table = self.meta["facets"][name]
+        doc_ids = self._all if doc_ids is None else doc_ids
+        if name == "aircraft":
+            lo, hi = self._aircraft_offsets[doc_ids], self._aircraft_offsets[doc_ids + 1]
+            idx = np.concatenate([np.arange(a, b) for a, b in zip(lo.tolist(), hi.tolist())] or [np.zeros(0, np.int64)])
+            codes = self._aircraft_codes[idx]
+        else:
+            codes = getattr(self, f"_{name}_codes")[doc_ids]
+        counts = np.bincount(codes, minlength=len(table))
+        order = np.argsort(-counts, kind="stable")
+        order = order[counts[order] > 0][:top]
+        return [(table[c], int(counts[c])) for c in order.tolist()]
+
+
+def query_file_names(query, corpus_path, injury_path=None, damage_path=None):
+    """File names matching ``query`` – the input set for the visualization scripts."""
+    return open_index(corpus_path, injury_path=injury_path, damage_path=damage_path).search(query).file_names
+
+
+def restrict_grouped(grouped, file_names):
+    """Keep only ``file_names`` in a ``{group: [pdf, …]}`` mapping, dropping empty groups."""
+    keep = set(file_names)
+    restricted = {}
+    for group, pdfs in grouped.items():
+        kept = [p for p in pdfs if p in keep]
+        if kept:
+            restricted[group] = kept
+    return restricted
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Query the enriched-corpus inverted index.")
+    parser.add_argument("corpus", help="semantic_enriched_output*.json")
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--injuries", help="Injuries.txt for the injury facet")
+    parser.add_argument("--damage", help="Aircraft Damage.txt for the damage facet")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    index = open_index(args.corpus, injury_path=args.injuries, damage_path=args.damage)
+    t0 = time.perf_counter()
+    result = index.search(args.query)
+    facets = result.facets(top=args.top)
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(f"{len(result)} documents ({elapsed:.1f} ms)")
+    print("  " + ", ".join(result.file_names[:args.top]) + (" …" if len(result) > args.top else ""))
+    for name, counts in facets.items():
+        print(f"{name}:")
+        for value, count in counts:
+            print(f"  {count:>5}  {value}")
@@ -0,0 +1,211 @@
+"""
+corpus_model.py
+───────────────
+One compact in-memory model of the accident corpus for every script,
+instead of lists of nested dicts, ``json_normalize`` frames and ad-hoc
+``records.append({...})`` dicts.
+
+  • Every report gets an integer ``pdf_id`` (its row); file names are
+    stored once in ``file_names``.  Injury / damage categories are joined
+    on the file name with one vectorised merge.
+  • Aircraft, model, injury and damage are ``pd.Categorical`` columns:
+    each distinct string is kept once, rows hold small integer codes.
+    Multi-valued fields (the enriched corpus's ``aircraft`` lists) are
+    ``CategoryList`` – flat codes + row offsets.
+  • Free text (Analysis, notes, keywords …) stays in data_access's
+    memory-mapped UTF-8 columns and is decoded only when read.
+  • ``Corpus[i]`` is an ``AccidentRecord``: a frozen, slotted dataclass.
+
+Both corpus layouts load through ``load_corpus``: final_extracted_data.json
+("File Name", "Flight Information" {...}) and semantic_enriched_output*.json
+("file_name", list fields).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import category_codes
+from data_access import ListColumn, load_record_table
+from incident_timeline import UNKNOWN, load_timeline
+from severity import group_levels, map_damage_level, map_injury_level
+
+EXTRACTED_TEXT = {"analysis": "Analysis", "cause": "Probable Cause and Findings"}
+ENRICHED_TEXT = {"damage_notes": "damage_notes", "cause_notes": "cause_notes", "keywords": "keywords"}
+
+
+# ── RECORDS ────────────────────────────────────────────
+@dataclass(frozen=True, slots=True)
+class AccidentRecord:
+    pdf_id: int
+    file_name: str
+    aircraft: str
+    model: str
+    injury: str
+    damage: str
+    date: object = None         # pd.Timestamp, or None when unparsed / not loaded
+
+
+class CategoryList:
+    """Per-row lists of interned strings: flat ``pd.Categorical`` + int64 row offsets."""
+
+    __slots__ = ("values", "offsets")
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_lists(cls, rows):
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=offsets[1:])
+        return cls(pd.Categorical([x for r in rows for x in r]), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        categories = self.values.categories
+        return [categories[c] for c in self.values.codes[self.offsets[i]:self.offsets[i + 1]]]
+
+    def first(self, default=UNKNOWN):
+        """Categorical of each row's first entry (``default`` for empty rows)."""
+        starts, lengths = self.offsets[:-1], np.diff(self.offsets)
+        codes = np.full(len(self), -1, dtype=self.values.codes.dtype)
+        codes[lengths > 0] = self.values.codes[starts[lengths > 0]]
+        first = pd.Categorical.from_codes(codes, self.values.categories)
+        if (codes < 0).any():
+            first = first.add_categories([default]) if default not in first.categories else first
+            first = first.fillna(default)
+        return first
+
+
+# ── CORPUS ─────────────────────────────────────────────
+class Corpus:
+    """Column-oriented accident corpus; see the module docstring."""
+
+    def __init__(self, file_names, categories, texts, dates=None, lists=None):
+        self.file_names = file_names
+        self.categories = categories            # name -> pd.Categorical, one entry per report
+        self.texts = texts                      # name -> StringColumn / ListColumn
+        self.dates = dates                      # datetime64[ns] array or None
+        self.lists = lists or {}                # name -> CategoryList
+        self._ids = None
+
+    def __len__(self):
+        return len(self.file_names)
+
+    def pdf_id(self, file_name):
+        if self._ids is None:
+            self._ids = {name: i for i, name in enumerate(self.file_names)}
+        return self._ids[file_name]
+
+    def _label(self, name, i):
+        column = self.categories.get(name)
+        if column is None:
+            return UNKNOWN
+        code = column.codes[i]
+        return column.categories[code] if code >= 0 else UNKNOWN
+
+    def __getitem__(self, i):
+        date = None
+        if self.dates is not None and not np.isnat(self.dates[i]):
+            date = pd.Timestamp(self.dates[i])
+        return AccidentRecord(i, self.file_names[i], self._label("aircraft", i), self._label("model", i),
+                              self._label("injury", i), self._label("damage", i), date)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def text(self, name, i):
+        """Decoded text (or list of strings) of field ``name`` for report ``i``."""
+        return self.texts[name][i]
+
+    def frame(self, texts=()):
+        """
+        DataFrame with ``pdf_id`` index, the categorical columns, ``date`` and
+        the requested text columns – no nested dicts, no repeated strings.
+        """
+        data = {"file_name": self.file_names}
+        data.update(self.categories)
+        if self.dates is not None:
+            data["date"] = self.dates
+        for name in texts:
+            column = self.texts[name]
+            data[name] = [list(v) for v in column] if isinstance(column, ListColumn) else column.tolist()
+        frame = pd.DataFrame(data)
+        frame.index.name = "pdf_id"
+        return frame
+
+    def group_file_names(self, by="aircraft"):
+        """``{label: [file_name, …]}`` in first-seen label order (the scripts' grouped dicts)."""
+        column = self.categories[by]
+        codes = column.codes
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        groups = {}
+        for block in np.split(order, bounds) if order.size else []:
+            code = codes[block[0]]
+            if code >= 0:
+                groups[block[0], column.categories[code]] = [self.file_names[i] for i in block.tolist()]
+        return {label: names for (_, label), names in sorted(groups.items())}
+
+    def severity(self, by="aircraft"):
+        """
+        ``injury_level`` / ``damage_level`` per ``by`` label – the
+        ``map_*_level`` score of each group's category set, as a groupby-max
+        over the categorical codes.
+        """
+        groups = self.categories[by]
+        levels = {}
+        for name, score in (("injury", map_injury_level), ("damage", map_damage_level)):
+            column = self.categories[name]
+            levels[f"{name}_level"] = group_levels(groups.codes, column.codes, list(column.categories), score,
+                                                   len(groups.categories))
+        return pd.DataFrame(levels, index=pd.Index(groups.categories, name=by))
+
+    def memory_bytes(self):
+        """``(heap, mapped)``: bytes of in-memory columns and of memory-mapped text buffers."""
+        heap = sum(pd.Series(c).memory_usage(deep=True, index=False) for c in self.categories.values())
+        heap += sum(c.values.nbytes + c.offsets.nbytes for c in self.lists.values())
+        heap += pd.Series(self.file_names).memory_usage(deep=True, index=False)
+        heap += 0 if self.dates is None else self.dates.nbytes
+        mapped = 0
+        for column in self.texts.values():
+            strings = column.values if isinstance(column, ListColumn) else column
+            mapped += strings.data.nbytes + strings.offsets.nbytes
+        return int(heap), int(mapped)
+
+
+# ── LOADING ────────────────────────────────────────────
+def load_corpus(corpus_path, injury_path=None, damage_path=None):
+    """
+    ``Corpus`` for final_extracted_data.json or semantic_enriched_output*.json,
+    served from data_access's columnar cache.  Injury / damage categories are
+    joined from Injuries.txt / Aircraft Damage.txt when given.
+    """
+    table = load_record_table(corpus_path)
+    columns = {".".join(path) for path in table.columns}
+    categories, texts, lists, dates = {}, {}, {}, None
+
+    if "File Name" in columns:
+        timeline, _ = load_timeline(corpus_path)
+        file_names = timeline["file_name"].tolist()
+        categories["aircraft"] = timeline["aircraft"].array
+        categories["model"] = timeline["model"].array
+        dates = timeline["date"].to_numpy("datetime64[ns]")
+        texts = {name: table.column(field) for name, field in EXTRACTED_TEXT.items() if field in columns}
+    else:
+        file_names = [str(v or "") for v in table.values("file_name", default="")]
+        if "aircraft" in columns:
+            aircraft = table.values("aircraft", default=[])
+            lists["aircraft"] = CategoryList.from_lists([a if isinstance(a, list) else [a] for a in aircraft])
+            categories["aircraft"] = lists["aircraft"].first()
+        texts = {name: table.column(field) for name, field in ENRICHED_TEXT.items() if field in columns}
+
+    for name, path in (("injury", injury_path), ("damage", damage_path)):
+        if path:
+            codes, labels = category_codes(file_names, path)
+            categories[name] = pd.Categorical(np.asarray(labels, dtype=object)[codes])
+    return Corpus(file_names, categories, texts, dates, lists)
@@ -0,0 +1,357 @@
+"""
+data_access.py
+──────────────
+Shared loaders for every source file the scripts read, backed by a columnar
+on-disk cache.
+
+Sources
+  • JSON record arrays (final_extracted_data.json, semantic_enriched_output*.json)
+  • "grouped" text files – a header line followed by ``*.pdf`` lines
+    (Aircraft_names.txt, Injuries.txt, Aircraft Damage.txt)
+
+Each source is parsed once and written to ``.rita_cache/<file>.<kind>/`` next
+to it (or under ``$RITA_CACHE_DIR``) as plain ``.npy`` arrays: strings are
+stored Arrow-style as a UTF-8 byte buffer plus int64 offsets, so every array
+can be opened with ``mmap_mode="r"``.  A cache entry is valid while the
+source's size and mtime match; if only the mtime changed the SHA-1 of the
+content is compared before reparsing.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from instrumentation import count, span
+
+CACHE_DIR_ENV = "RITA_CACHE_DIR"
+CACHE_DIR_NAME = ".rita_cache"
+CACHE_VERSION = 1
+
+# Column state codes for JSON records
+MISSING, NULL, PRESENT = 0, 1, 2
+
+
+# ── STRING COLUMNS ─────────────────────────────────────
+class StringColumn:
+    """Read-only sequence of strings stored as a UTF-8 buffer plus offsets."""
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        buf = memoryview(np.ascontiguousarray(self.data))
+        offsets = self.offsets.tolist()
+        for lo, hi in zip(offsets, offsets[1:]):
+            yield str(buf[lo:hi], "utf-8")
+
+    def tolist(self):
+        return list(self)
+
+
+class ListColumn:
+    """Sequence of string lists: one flat ``StringColumn`` plus row offsets."""
+
+    __slots__ = ("values", "offsets")
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return [self.values[k] for k in range(self.offsets[i], self.offsets[i + 1])]
+
+    def tolist(self):
+        flat = self.values.tolist()
+        offsets = self.offsets.tolist()
+        return [flat[lo:hi] for lo, hi in zip(offsets, offsets[1:])]
+
+
+# ── CACHE PLUMBING ─────────────────────────────────────
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_dir_for(source_path, kind):
+    source_path = Path(source_path)
+    root = Path(os.environ.get(CACHE_DIR_ENV) or source_path.parent / CACHE_DIR_NAME)
+    return root / f"{source_path.name}.{kind}"
+
+
+def _save_arrays(directory, arrays, meta):
+    tmp = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", arr, allow_pickle=False)
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    shutil.rmtree(directory, ignore_errors=True)
+    tmp.rename(directory)
+
+
+def _load_arrays(directory, names):
+    return {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in names}
+
+
+def _cached(source_path, kind, build):
+    """
+    Return ``(arrays, meta)`` for ``source_path``, rebuilding when stale.
+
+    ``build(path)`` parses the source and returns ``(arrays, extra_meta)``.
+    """
+    source_path = Path(source_path)
+    directory = cache_dir_for(source_path, kind)
+    stat = source_path.stat()
+    meta_path = directory / "meta.json"
+
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("version") == CACHE_VERSION:
+            if meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+                count(f"load.cache_hit.{kind}")
+                return _load_arrays(directory, meta["arrays"]), meta
+            if meta["size"] == stat.st_size and meta["sha1"] == _file_sha1(source_path):
+                count(f"load.cache_hit.{kind}")
+                meta["mtime_ns"] = stat.st_mtime_ns
+                meta_path.write_text(json.dumps(meta), encoding="utf-8")
+                return _load_arrays(directory, meta["arrays"]), meta
+
+    count(f"load.cache_miss.{kind}")
+    with span(f"load.parse.{kind}"):
+        arrays, extra = build(source_path)
+    meta = dict(extra, version=CACHE_VERSION, size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns, sha1=_file_sha1(source_path),
+                arrays=sorted(arrays))
+    _save_arrays(directory, arrays, meta)
+    return _load_arrays(directory, meta["arrays"]), meta
+
+
+def _string_arrays(prefix, strings):
+    col = StringColumn.from_strings(strings)
+    return {f"{prefix}_data": col.data, f"{prefix}_offsets": col.offsets}
+
+
+def _string_column(arrays, prefix):
+    return StringColumn(arrays[f"{prefix}_data"], arrays[f"{prefix}_offsets"])
+
+
+# ── GROUPED TEXT FILES ─────────────────────────────────
+def _build_grouped(path):
+    headers, pdfs, blocks = [], [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if not line.endswith(".pdf"):
+                headers.append(line.rstrip(":"))
+            else:
+                pdfs.append(line)
+                blocks.append(len(headers) - 1)
+    arrays = {}
+    arrays.update(_string_arrays("headers", headers))
+    arrays.update(_string_arrays("pdfs", pdfs))
+    arrays["pdf_block"] = np.asarray(blocks, dtype=np.int32)
+    return arrays, {}
+
+
+def load_grouped_columns(file_path):
+    """``(headers, pdfs, pdf_block)``: header occurrences, pdf lines, and each pdf's header index (-1 if none)."""
+    arrays, _ = _cached(file_path, "grouped", _build_grouped)
+    return _string_column(arrays, "headers"), _string_column(arrays, "pdfs"), arrays["pdf_block"]
+
+
+def load_grouped_pdfs(file_path):
+    """
+    ``{header: [pdf, …]}`` for a header/pdf listing such as Aircraft_names.txt.
+
+    Same result as the scripts' former ``load_flight_info`` /
+    ``load_aircraft_data`` helpers: a repeated header restarts its list.
+    """
+    headers, pdfs, pdf_block = load_grouped_columns(file_path)
+    header_list, pdf_list = headers.tolist(), pdfs.tolist()
+    block_list = pdf_block.tolist()
+    grouped = {}
+    lists = []
+    for header in header_list:
+        grouped[header] = []
+        lists.append(grouped[header])
+    for pdf, block in zip(pdf_list, block_list):
+        if block >= 0:
+            lists[block].append(pdf)
+    return grouped
+
+
+def load_category_map(file_path):
+    """``{pdf: category}`` for Injuries.txt / Aircraft Damage.txt (former ``parse_category_file``)."""
+    headers, pdfs, pdf_block = load_grouped_columns(file_path)
+    header_list = headers.tolist()
+    return {
+        pdf: header_list[block] if block >= 0 else None
+        for pdf, block in zip(pdfs.tolist(), pdf_block.tolist())
+    }
+
+
+# ── JSON RECORDS ───────────────────────────────────────
+def _flatten_paths(records):
+    """Ordered leaf paths (tuples of keys) across all records; dicts are recursed into."""
+    paths = {}
+
+    def walk(obj, prefix):
+        for key, value in obj.items():
+            path = prefix + (key,)
+            if isinstance(value, dict) and value:
+                walk(value, path)
+            else:
+                paths.setdefault(path, None)
+
+    for rec in records:
+        walk(rec, ())
+    return list(paths)
+
+
+def _get_path(rec, path):
+    for key in path:
+        if not isinstance(rec, dict) or key not in rec:
+            return MISSING, None
+        rec = rec[key]
+    if isinstance(rec, dict) and rec:
+        return MISSING, None    # stored through its own sub-columns
+    return (NULL, None) if rec is None else (PRESENT, rec)
+
+
+def _build_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise ValueError(f"{path}: expected a JSON array of records")
+
+    arrays, columns = {}, []
+    for c, col_path in enumerate(_flatten_paths(records)):
+        states, values = zip(*(_get_path(rec, col_path) for rec in records)) if records else ((), ())
+        present = [v for s, v in zip(states, values) if s == PRESENT]
+        if all(isinstance(v, str) for v in present):
+            kind = "str"
+            arrays.update(_string_arrays(f"c{c}", [v if s == PRESENT else "" for s, v in zip(states, values)]))
+        elif all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in present):
+            kind = "list_str"
+            rows = [v if s == PRESENT else [] for s, v in zip(states, values)]
+            offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum([len(r) for r in rows], out=offsets[1:])
+            arrays.update(_string_arrays(f"c{c}", [x for r in rows for x in r]))
+            arrays[f"c{c}_rows"] = offsets
+        else:
+            kind = "json"
+            arrays.update(_string_arrays(
+                f"c{c}", [json.dumps(v, ensure_ascii=False) if s == PRESENT else "" for s, v in zip(states, values)]
+            ))
+        arrays[f"c{c}_state"] = np.asarray(states, dtype=np.int8)
+        columns.append({"path": list(col_path), "kind": kind})
+    return arrays, {"columns": columns, "n_records": len(records)}
+
+
+class RecordTable:
+    """Columnar, memory-mapped view of a cached JSON record array."""
+
+    def __init__(self, arrays, meta):
+        self._arrays = arrays
+        self.n_records = meta["n_records"]
+        self.columns = [tuple(c["path"]) for c in meta["columns"]]
+        self._kinds = {tuple(c["path"]): (i, c["kind"]) for i, c in enumerate(meta["columns"])}
+
+    def __len__(self):
+        return self.n_records
+
+    def _key(self, name):
+        return tuple(name.split(".")) if isinstance(name, str) else tuple(name)
+
+    def state(self, name):
+        """int8 array: 0 = key missing, 1 = null, 2 = value present."""
+        c, _ = self._kinds[self._key(name)]
+        return self._arrays[f"c{c}_state"]
+
+    def column(self, name):
+        """Raw column for a dotted path such as ``"Flight Information.Aircraft"``."""
+        c, kind = self._kinds[self._key(name)]
+        values = _string_column(self._arrays, f"c{c}")
+        if kind == "list_str":
+            return ListColumn(values, self._arrays[f"c{c}_rows"])
+        return values
+
+    def values(self, name, default=None):
+        """Python list of decoded values; missing / null entries become ``default``."""
+        key = self._key(name)
+        c, kind = self._kinds[key]
+        raw = self.column(key).tolist()
+        if kind == "json":
+            raw = [json.loads(v) if v else None for v in raw]
+        return [v if s == PRESENT else default for v, s in zip(raw, self.state(key).tolist())]
+
+    def to_records(self):
+        """Rebuild the original list of (nested) dicts."""
+        records = [{} for _ in range(self.n_records)]
+        for path in self.columns:
+            c, kind = self._kinds[path]
+            raw = self.column(path).tolist()
+            for rec, value, state in zip(records, raw, self.state(path).tolist()):
+                if state == MISSING:
+                    continue
+                if state == NULL:
+                    value = None
+                elif kind == "json":
+                    value = json.loads(value)
+                target = rec
+                for key in path[:-1]:
+                    target = target.setdefault(key, {})
+                target[path[-1]] = value
+        return records
+
+
+def load_record_table(file_path):
+    """Cached columnar view of a JSON array of records."""
+    with span("load") as s:
+        arrays, meta = _cached(file_path, "records", _build_records)
+        table = RecordTable(arrays, meta)
+        s.records = len(table)
+    return table
+
+
+def load_records(file_path):
+    """
+    Whole records of a JSON array (plain ``json.load``, faster than
+    rebuilding every dict from the cache); use ``load_record_table`` when
+    only some columns are needed.
+    """
+    with span("load") as s, open(file_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+        s.records = len(records)
+    return records
@@ -0,0 +1,174 @@
+"""
+figure_export.py
+────────────────
+Export pipeline shared by the visualization scripts and main_dashboard.html.
+
+``write_figure`` writes two artifacts per view:
+
+  • the standalone HTML page, referencing a shared ``plotly.min.js`` next to
+    it (``include_plotlyjs="directory"``) instead of inlining ~3.5 MB per file
+  • ``<figures_dir>/<view>.json`` – compact figure JSON for the dashboard:
+    numeric arrays are downcast (float64 → float32) and emitted by plotly as
+    base64 typed arrays; hover text repeated on every vertex of a bar is
+    stored once as ``{"_repeat": k, "values": […]}`` (expanded by the
+    dashboard); the layout template is stored once per distinct template in
+    ``template-<hash>.json`` and referenced by name
+
+``manifest.json`` lists every view in ``figures_dir``; the dashboard reads
+it, loads plotly.min.js once and swaps views in a single plot div with
+``Plotly.react``.  A view written with ``links=True`` (the LOD cityscape
+overview) stores ``"links"``, the HTML page's directory relative to
+``figures_dir``; the dashboard opens a clicked point's ``customdata``
+relative to it, as the page's own click script does.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+
+from instrumentation import span
+
+PLOTLY_JS = "plotly.min.js"
+TEMPLATE_PREFIX = "template-"
+MANIFEST_FILE = "manifest.json"
+MIN_ARRAY = 8           # shorter lists stay plain JSON
+
+
+# ── COMPACTION ─────────────────────────────────────────
+def _compact_array(value):
+    """float64 → float32 ndarray for numeric sequences; anything else unchanged."""
+    if isinstance(value, (list, tuple)):
+        if len(value) < MIN_ARRAY or not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) for v in value
+        ):
+            return value
+        value = np.asarray(value)
+    if isinstance(value, np.ndarray) and value.dtype.kind == "f":
+        return value.astype(np.float32)
+    return value
+
+
+def _repeat_factor(values):
+    """``k`` if ``values`` is each item repeated ``k`` times in a row, else 1."""
+    run = 1
+    while run < len(values) and values[run] == values[0]:
+        run += 1
+    arr = np.asarray(values, dtype=object)
+    for k in range(min(run, len(values) // 2), 1, -1):
+        if run % k == 0 and len(values) % k == 0:
+            blocks = arr.reshape(-1, k)
+            if (blocks == blocks[:, :1]).all():
+                return k
+    return 1
+
+
+def _pack_repeats(trace):
+    """Hover/text arrays repeated per vertex → ``{"_repeat": k, "values": […]}``."""
+    for key in ("hovertext", "text", "customdata"):
+        values = trace.get(key)
+        if isinstance(values, list) and len(values) >= MIN_ARRAY:
+            k = _repeat_factor(values)
+            if k > 1:
+                trace[key] = {"_repeat": k, "values": values[::k]}
+    return trace
+
+
+def _compact(obj):
+    if isinstance(obj, dict):
+        return {k: _compact(v) for k, v in obj.items()}
+    compacted = _compact_array(obj)
+    if compacted is not obj or isinstance(obj, np.ndarray):
+        return compacted
+    if isinstance(obj, (list, tuple)):
+        return [_compact(v) for v in obj]
+    return obj
+
+
+def compact_figure_json(fig):
+    """``(figure JSON without its layout template, template)`` for ``fig``."""
+    spec = fig.to_plotly_json()
+    compact = go.Figure(data=[_compact(trace) for trace in spec["data"]], layout=spec["layout"])
+    payload = json.loads(compact.to_json())
+    payload["data"] = [_pack_repeats(trace) for trace in payload["data"]]
+    return payload, payload["layout"].pop("template", None)
+
+
+def template_file(template):
+    """``(file name, JSON text)`` of a layout template; the name is a hash of the text."""
+    text = json.dumps(template, separators=(",", ":"), sort_keys=True)
+    return f"{TEMPLATE_PREFIX}{hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]}.json", text
+
+
+# ── WRITING ────────────────────────────────────────────
+def _write_text(path, text):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _ensure_plotlyjs(directory):
+    """Write the shared plotly.min.js into ``directory`` once."""
+    path = Path(directory) / PLOTLY_JS
+    bundle = get_plotlyjs()
+    if not path.exists() or path.stat().st_size != len(bundle.encode("utf-8")):
+        _write_text(path, bundle)
+    return path
+
+
+def update_manifest(figures_dir):
+    """Rebuild ``manifest.json`` from the view files present in ``figures_dir``."""
+    figures_dir = Path(figures_dir)
+    views = []
+    for path in sorted(figures_dir.glob("*.json")):
+        if path.name == MANIFEST_FILE or path.name.startswith(TEMPLATE_PREFIX):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            title = json.load(f).get("layout", {}).get("title", {})
+        title = title.get("text") if isinstance(title, dict) else title
+        views.append({"name": path.stem, "file": path.name, "title": title or path.stem})
+    _write_text(figures_dir / MANIFEST_FILE, json.dumps({"views": views}, ensure_ascii=False, indent=1))
+    return views
+
+
+def write_figure(fig, html_path, figures_dir=None, view=None, post_script=None, links=False):
+    """
+    Write ``fig`` as HTML (shared plotly.min.js) and as dashboard JSON.
+
+    ``figures_dir`` defaults to ``figures/`` beside ``html_path``; ``view``
+    (the dashboard entry name) defaults to the HTML file stem;
+    ``post_script`` is passed on to ``write_html``.  ``links``: the traces'
+    ``customdata`` are links relative to ``html_path`` that the dashboard
+    follows on click.  Returns the JSON path.
+    """
+    html_path = Path(html_path)
+    figures_dir = Path(figures_dir) if figures_dir else html_path.parent / "figures"
+    figures_dir.mkdir(parents=True, exist_ok=True)
+    view = view or html_path.stem
+
+    with span("write_html"):
+        fig.write_html(html_path, include_plotlyjs="directory", post_script=post_script)
+        _ensure_plotlyjs(figures_dir)
+
+    with span("write_figure_json"):
+        base = Path(os.path.relpath(html_path.parent, figures_dir)).as_posix() if links else None
+        return _write_figure_json(fig, figures_dir, view, base)
+
+
+def _write_figure_json(fig, figures_dir, view, links=None):
+    payload, template = compact_figure_json(fig)
+    if links is not None:
+        payload["links"] = links
+    if template is not None:
+        name, text = template_file(template)
+        if not (figures_dir / name).exists():
+            _write_text(figures_dir / name, text)
+        payload["template"] = name
+    json_path = figures_dir / f"{view}.json"
+    _write_text(json_path, json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+    update_manifest(figures_dir)
+    return json_path
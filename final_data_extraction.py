@@ -0,0 +1,32 @@
+"""
+final_data_extraction.py
+────────────────────────
+Pipeline stage that builds final_extracted_data.json from a directory of
+NTSB final-report PDFs (see pdf_extraction.py).  Runs in parallel, skips
+PDFs whose SHA-1 is already in the journal and can be interrupted and
+rerun at any point.
+"""
+
+import time
+
+from pdf_extraction import extract_directory
+
+# ── CONFIG ─────────────────────────────────────────────
+PDF_DIR = r"C:\\Users\\olaye\\Documents\\UARC\\pdfs"
+OUTPUT_JSON = r"C:\\Users\\olaye\\Documents\\UARC\\final_extracted_data.json"
+WORKERS = None          # extraction processes (None = one per CPU)
+RETRIES = 2             # isolated retries of a PDF that failed in the pool
+
+
+def main():
+    t0 = time.perf_counter()
+    summary = extract_directory(PDF_DIR, OUTPUT_JSON, workers=WORKERS, retries=RETRIES)
+    print(f"[✔] {summary['extracted']} PDFs extracted, {summary['reused']} unchanged, "
+          f"{summary['removed']} removed, {summary['failed']} failed "
+          f"in {time.perf_counter() - t0:.1f}s → {OUTPUT_JSON}")
+    if summary["failed"]:
+        print(f"[!] failures listed in {OUTPUT_JSON}.errors.json")
+
+
+if __name__ == "__main__":
+    main()
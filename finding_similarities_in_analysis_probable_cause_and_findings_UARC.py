@@ -1,8 +1,10 @@
 import json
-import os
-from collections import defaultdict
-from difflib import SequenceMatcher
-from concurrent.futures import ThreadPoolExecutor
+
+from cause_text import parse_cause
+from data_access import load_record_table
+from instrumentation import span
+from json_stream import is_jsonl, iter_records
+from similarity_engine import find_similar_pairs
 
 
 def clean_text(text):
@@ -10,70 +12,80 @@ def clean_text(text):
     return ' '.join(text.splitlines())
 
 
-def calculate_similarity(text1, text2):
-
-    return SequenceMatcher(None, text1, text2).ratio()
+# backend picks how candidate pairs are found: "exhaustive" (the default)
+# scores every pair like the original script, "tfidf" / "minhash" only
+# rescore likely matches and so write a subset of the pairs,
+# "embedding" proposes paraphrases via word vectors (threshold is then the
+# vector cosine, e.g. 0.8; see semantic_vectors.py for single-report lookups).
+# Pairs are written as soon as their chunk is scored (as JSON Lines when the
+# output path ends in .jsonl); streaming=True reads the input one record at a
+# time and keeps only the two compared fields.  The cause is compared without
+# its boilerplate (determination sentence, page footers, case numbers; see
+# cause_text.py), and with dedupe=True reports with identical fields are
+# scored once and reported as 1.0 pairs.
+def find_similarities(json_path, output_txt_path, backend="exhaustive", threshold=0.3, top_k=None,
+                      min_similarity=None, workers=None, streaming=False, dedupe=True):
 
+    analyses, probable_causes = [], []
 
-def compare_entries(i, analyses, probable_causes):
+    if streaming:
 
-    similarities = []
+        columns = ((entry["Analysis"], entry["Probable Cause and Findings"]) for entry in iter_records(json_path))
 
-    for j in range(i + 1, len(analyses)):
+    else:
 
-        analysis_similarity = calculate_similarity(analyses[i], analyses[j])
+        table = load_record_table(json_path)
 
-        cause_similarity = calculate_similarity(probable_causes[i], probable_causes[j])
+        columns = zip(table.column("Analysis"), table.column("Probable Cause and Findings"))
 
-        similarities.append({
+    for analysis, cause in columns:
 
-            'Entry1': i,
+        analyses.append(clean_text(analysis))
 
-            'Entry2': j,
+        probable_causes.append(parse_cause(cause).text)
 
-            'Analysis_Similarity': analysis_similarity,
 
-            'Probable_Cause_Similarity': cause_similarity
+    backend_kwargs = {}
 
-        })
+    if backend in ("tfidf", "embedding"):
 
-    return similarities
+        backend_kwargs = {"threshold": threshold, "top_k": top_k}
 
 
-def find_similarities(json_path, output_txt_path):
+    as_jsonl = is_jsonl(output_txt_path)
 
-    with open(json_path, 'r', encoding='utf-8') as file:
+    written = 0
 
-        data = json.load(file)
+    with span("similarity", records=len(analyses)), open(output_txt_path, 'w', encoding='utf-8') as output_file:
 
+        for i, j, (analysis_similarity, cause_similarity) in find_similar_pairs(
 
-    analyses = [clean_text(entry["Analysis"]) for entry in data]
+                [analyses, probable_causes], backend=backend, min_similarity=min_similarity,
 
-    probable_causes = [clean_text(entry["Probable Cause and Findings"]) for entry in data]
+                workers=workers, dedupe=dedupe, **backend_kwargs):
 
+            if as_jsonl:
 
-    similarities = []
+                output_file.write(json.dumps({"Entry1": i, "Entry2": j,
 
-    with ThreadPoolExecutor() as executor:
+                                              "Analysis_Similarity": analysis_similarity,
 
-        futures = [executor.submit(compare_entries, i, analyses, probable_causes) for i in range(len(analyses))]
+                                              "Probable_Cause_Similarity": cause_similarity}) + "\n")
 
-        for future in futures:
+            else:
 
-            similarities.extend(future.result())
+                output_file.write(f"Entry1: {i}, Entry2: {j}\n")
 
+                output_file.write(f"Analysis Similarity: {analysis_similarity}\n")
 
-    with open(output_txt_path, 'w', encoding='utf-8') as output_file:
+                output_file.write(f"Probable Cause Similarity: {cause_similarity}\n")
 
-        for similarity in similarities:
+                output_file.write("\n")
 
-            output_file.write(f"Entry1: {similarity['Entry1']}, Entry2: {similarity['Entry2']}\n")
+            written += 1
 
-            output_file.write(f"Analysis Similarity: {similarity['Analysis_Similarity']}\n")
 
-            output_file.write(f"Probable Cause Similarity: {similarity['Probable_Cause_Similarity']}\n")
-
-            output_file.write("\n")
+    print(f"✅ {written} similar pairs saved to: {output_txt_path}")
 
 
 # Define paths
@@ -83,6 +95,8 @@ json_path = "C:\\Users\\olaye\\Documents\\final_extracted_data.json"
 output_txt_path = "C:\\Users\\olaye\\Documents\\similarities.txt"
 
 
-# Run the script
+# Run the script (guarded: the scoring workers re-import this module)
+
+if __name__ == "__main__":
 
-find_similarities(json_path, output_txt_path)
\ No newline at end of file
+    find_similarities(json_path, output_txt_path, backend="exhaustive")
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+incident_timeline.py
+────────────────────
+Accident dates parsed once for the whole corpus, and the resampled
+accident-count series the animated / time-sliced views are built from.
+
+Parsing
+  ``Flight Information → Date & Time`` ("January 9, 2016, 15:25 Local") is
+  deduplicated first and only distinct strings are parsed.  The report
+  layout "Month D, YYYY[, HH:MM] [zone]" is split into year / month / day /
+  hour / minute columns by one regex and assembled with a single
+  ``pd.to_datetime`` call (``%B`` formats go through pandas' slow
+  per-element strptime path).  The rest is normalised (time-zone words such
+  as "Local" dropped, whitespace collapsed) and tried against
+  ``DATE_FORMATS`` one ``pd.to_datetime(format=…, errors="coerce")`` pass
+  at a time, each pass only over the strings still unparsed, and finally
+  the per-element ``format="mixed"`` fallback.  Rows that still fail are
+  *rejected* and listed in the report instead of being silently dropped.
+
+Cache
+  File name, aircraft, model and the typed ``datetime64[ns]`` column are
+  stored with data_access's columnar cache under
+  ``.rita_cache/<file>.timeline/``, together with the parse report, and are
+  rebuilt only when the source changes.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from data_access import _cached, _string_arrays, _string_column, load_record_table
+
+DATE_FIELD = "Flight Information.Date & Time"
+AIRCRAFT_FIELD = "Flight Information.Aircraft"
+MODEL_FIELD = "Flight Information.Aircraft_model"
+UNKNOWN = "Unknown"
+
+DATE_FORMATS = (
+    "%B %d, %Y, %H:%M",
+    "%B %d, %Y %H:%M",
+    "%B %d, %Y",
+    "%b %d, %Y, %H:%M",
+    "%b %d, %Y",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+)
+REPORT_LAYOUT = "Month D, YYYY[, HH:MM]"
+REPORT_DATE_RE = re.compile(
+    r'\s*([A-Za-z]{3,9})\.?\s+(\d{1,2}),?\s+(\d{4})(?:,?\s+(\d{1,2}):(\d{2}))?,?(?:\s+[A-Za-z]{1,5}\.?)?\s*$'
+)
+MONTHS = {
+    name.lower(): number
+    for number, full in enumerate(pd.date_range("2000-01-01", periods=12, freq="MS").month_name(), start=1)
+    for name in (full, full[:3], full[:4])
+}
+FALLBACK = "mixed"
+TZ_WORDS_RE = r'(?i)\s*\b(?:local|utc|gmt|[a-z]{1,3}[sd]t|z)\b\.?\s*$'
+REPORT_SAMPLE = 50
+
+
+# ── PARSING ────────────────────────────────────────────
+def normalise_date_text(raw):
+    """Strip trailing time-zone words, periods after month abbreviations and repeated whitespace."""
+    text = pd.Series(raw, dtype="string").fillna("")
+    text = text.str.replace(TZ_WORDS_RE, "", regex=True)
+    text = text.str.replace(r'\b([A-Za-z]{3,4})\.(?=\s)', r'\1', regex=True)
+    return text.str.replace(r'\s+', ' ', regex=True).str.strip(" ,")
+
+
+def _parse_report_layout(strings):
+    """datetime64 array for "Month D, YYYY[, HH:MM]" strings, NaT where the layout or date is invalid."""
+    no_match = (None,) * 5
+    groups = [m.groups() if m else no_match for m in map(REPORT_DATE_RE.match, strings)]
+    parts = pd.DataFrame(groups, columns=["name", "day", "year", "hour", "minute"], dtype=object)
+    month = parts["name"].str.lower().map(MONTHS)
+    known = month.notna().to_numpy()
+    out = np.full(len(strings), np.datetime64("NaT"), dtype="datetime64[ns]")
+    if known.any():
+        columns = {
+            "year": parts["year"][known].astype(np.int64), "month": month[known].astype(np.int64),
+            "day": parts["day"][known].astype(np.int64),
+            "hour": parts["hour"][known].fillna("0").astype(np.int64),
+            "minute": parts["minute"][known].fillna("0").astype(np.int64),
+        }
+        out[known] = pd.to_datetime(pd.DataFrame(columns), errors="coerce").to_numpy("datetime64[ns]")
+    return out
+
+
+def _parse_unique(strings, formats):
+    dates = _parse_report_layout(strings)
+    method = np.where(np.isnat(dates), "rejected", REPORT_LAYOUT).astype(object)
+    method[[s == "" for s in strings]] = "missing"
+    todo = np.flatnonzero(method == "rejected")
+    if todo.size:
+        text = normalise_date_text([strings[i] for i in todo.tolist()])
+        for fmt in list(formats) + [FALLBACK]:
+            if not todo.size:
+                break
+            parsed = pd.to_datetime(text, format=fmt, errors="coerce").to_numpy("datetime64[ns]")
+            hit = ~np.isnat(parsed)
+            dates[todo[hit]] = parsed[hit]
+            method[todo[hit]] = fmt
+            todo, text = todo[~hit], text[~hit]
+    return dates, method
+
+
+def parse_dates(raw, formats=DATE_FORMATS):
+    """
+    ``(dates, method)`` for a sequence of raw date strings.
+
+    ``dates`` is a ``datetime64[ns]`` Series (NaT where unparsed); ``method``
+    names what parsed each row: ``REPORT_LAYOUT``, one of ``formats``,
+    ``"mixed"`` for the fallback, ``"missing"`` for empty input and
+    ``"rejected"`` for failures.
+    """
+    codes, uniques = pd.factorize(pd.Series(list(raw), dtype=object).fillna(""))
+    dates, method = _parse_unique([str(u) for u in uniques], formats)
+    return pd.Series(dates[codes], dtype="datetime64[ns]"), pd.Series(method[codes], dtype=object)
+
+
+def _build_timeline(path):
+    table = load_record_table(path)
+
+    def column(name):
+        return table.values(name) if tuple(name.split(".")) in table.columns else [None] * len(table)
+
+    names = [str(v or "") for v in column("File Name")]
+    raw = [v if isinstance(v, str) else None for v in column(DATE_FIELD)]
+    dates, method = parse_dates(raw)
+
+    rejected = method.eq("rejected").to_numpy()
+    report = {
+        "n_records": len(names),
+        "parsed": int(dates.notna().sum()),
+        "missing": int(method.eq("missing").sum()),
+        "rejected": int(rejected.sum()),
+        "by_format": {k: int(v) for k, v in method.value_counts().items() if k not in ("missing", "rejected")},
+        "rejected_rows": [
+            {"row": int(i), "File Name": names[i], "raw": raw[i]}
+            for i in np.flatnonzero(rejected)[:REPORT_SAMPLE].tolist()
+        ],
+    }
+    arrays = {"date_ns": dates.to_numpy("datetime64[ns]").view(np.int64)}
+    arrays.update(_string_arrays("file_name", names))
+    arrays.update(_string_arrays("aircraft", [str(v) if v else "" for v in column(AIRCRAFT_FIELD)]))
+    arrays.update(_string_arrays("model", [str(v) if v else "" for v in column(MODEL_FIELD)]))
+    return arrays, {"report": report}
+
+
+# ── CACHED TIMELINE ────────────────────────────────────
+def load_timeline(extracted_path):
+    """
+    ``(frame, report)`` for final_extracted_data.json.
+
+    ``frame`` has ``file_name``, ``aircraft`` / ``model`` (categoricals, NaN
+    where the field is missing or empty) and
+    ``date`` (``datetime64[ns]``, NaT for missing / rejected rows) in record
+    order; ``report`` counts rows per format and lists rejected rows.
+    """
+    arrays, meta = _cached(extracted_path, "timeline", _build_timeline)
+    frame = pd.DataFrame({
+        "file_name": _string_column(arrays, "file_name").tolist(),
+        "aircraft": pd.Categorical([s or None for s in _string_column(arrays, "aircraft")]),
+        "model": pd.Categorical([s or None for s in _string_column(arrays, "model")]),
+        "date": np.asarray(arrays["date_ns"]).view("datetime64[ns]"),
+    })
+    return frame, meta["report"]
+
+
+def format_report(report):
+    lines = [f"{report['parsed']}/{report['n_records']} dates parsed, "
+             f"{report['missing']} missing, {report['rejected']} rejected"]
+    lines += [f"  {count:>7}  {fmt}" for fmt, count in sorted(report["by_format"].items(), key=lambda kv: -kv[1])]
+    lines += [f"  rejected row {r['row']} ({r['File Name']}): {r['raw']!r}" for r in report["rejected_rows"]]
+    return "\n".join(lines)
+
+
+# ── SERIES ─────────────────────────────────────────────
+def rate_series(frame, by=None, freq="MS", top=None, normalize=False, cumulative=False):
+    """
+    Accidents per ``freq`` period (pandas offset alias: "D", "W", "MS", "QS", "YS").
+
+    ``by=None`` gives one Series; ``by="aircraft"`` / ``"model"`` a DataFrame
+    with one column per group, limited to the ``top`` most frequent.  Periods
+    without accidents are zero so every column shares one time axis.
+    ``normalize`` turns counts into each group's share of the period's
+    accidents among the selected groups; ``cumulative`` gives running totals (for animated growth).
+    """
+    dated = frame[frame["date"].notna()]
+    if by is None:
+        series = dated.set_index("date").resample(freq).size().rename("accidents")
+    else:
+        groups = dated[by].astype(object)
+        if top:
+            groups = groups.where(groups.isin(groups.value_counts().index[:top]))
+        counts = dated.assign(group=groups).dropna(subset=["group"])
+        series = (counts.groupby([pd.Grouper(key="date", freq=freq), "group"]).size()
+                  .unstack("group", fill_value=0))
+        if not series.empty:
+            series = series.resample(freq).sum()
+        series.columns.name = by
+    if normalize and by is not None:
+        series = series.div(series.sum(axis=1).replace(0, np.nan), axis=0).fillna(0.0)
+    if cumulative:
+        series = series.cumsum()
+    return series
+
+
+def time_slices(frame, by="model", freq="YS", top=None, cumulative=False):
+    """Yield ``(period_start, counts_by_group)`` – one frame of an animated view per period."""
+    series = rate_series(frame, by=by, freq=freq, top=top, cumulative=cumulative)
+    for period, counts in series.iterrows():
+        yield period, counts[counts > 0]
+
+
+if __name__ == "__main__":
+    import sys
+
+    timeline, parse_report = load_timeline(sys.argv[1])
+    print(format_report(parse_report))
+    print(rate_series(timeline, freq="YS").to_string())
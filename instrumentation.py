@@ -0,0 +1,322 @@
+"""
+instrumentation.py
+──────────────────
+Lightweight timing / counting / memory instrumentation shared by the
+pipeline scripts, and the JSON run report built from it.
+
+    from instrumentation import count, span
+
+    with span("ner", records=len(texts)):
+        ...
+    count("similarity.pairs_scored", n)
+
+Spans nest ("load/load.parse.records"); repeated spans with the same path
+are aggregated into calls / seconds / records.  While a run is active
+(``start()``, done by ``rita.py`` for every stage, or ``RITA_REPORT=path``
+for a standalone script) a background thread samples the resident set size
+every ``SAMPLE_INTERVAL`` seconds so each span, and the run as a whole
+(``peak_rss_bytes``), reports the peak RSS seen while it was open.  RSS is
+this process's only.  ``process_peak_rss_bytes`` /
+``process_peak_rss_children_bytes`` are the OS lifetime peaks of the process
+and of the children it reaped (worker pools); they cover one stage only when
+the stage ran in a fresh process, as under ``rita.py``.
+
+``profile(mode, path)`` optionally wraps a block in ``cProfile`` (``.prof``
+for pstats / snakeviz) or ``pyinstrument`` (``.html``) when installed.
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+REPORT_ENV = "RITA_REPORT"
+SAMPLE_INTERVAL = 0.05
+REPORT_VERSION = 2
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+# ── MEMORY ─────────────────────────────────────────────
+def current_rss():
+    """Resident set size of this process in bytes, or ``None`` if it cannot be read."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def peak_rss(children=False):
+    """Lifetime peak RSS in bytes of this process (or its reaped children), or ``None``."""
+    try:
+        import resource
+    except ImportError:                             # Windows
+        if children:
+            return None
+        try:
+            import psutil
+
+            return getattr(psutil.Process().memory_info(), "peak_wset", None)
+        except ImportError:
+            return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+# ── RECORDER ───────────────────────────────────────────
+class _Span:
+    __slots__ = ("path", "records", "peak_rss")
+
+    def __init__(self, path, records):
+        self.path = path
+        self.records = records
+        self.peak_rss = None
+
+    def observe(self, rss):
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+
+class Recorder:
+    """Aggregated spans and counters of one run (one pipeline stage)."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.spans = {}
+        self.counters = {}
+        self.started = None
+        self.t0 = None
+        self._local = threading.local()
+        self._open = set()
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop = threading.Event()
+        self._run = _Span(name, None)           # peak RSS sampled between start() and stop()
+
+    # spans / counters
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name, records=None):
+        stack = self._stack()
+        current = _Span(f"{stack[-1].path}/{name}" if stack else name, records)
+        current.observe(current_rss() if self._sampler else None)
+        stack.append(current)
+        with self._lock:
+            self._open.add(current)
+        t0 = time.perf_counter()
+        try:
+            yield current
+        finally:
+            seconds = time.perf_counter() - t0
+            stack.pop()
+            rss = current_rss() if self._sampler else None
+            with self._lock:
+                current.observe(rss)
+                self._run.observe(rss)
+                self._open.discard(current)
+                entry = self.spans.setdefault(current.path, {"calls": 0, "seconds": 0.0, "records": 0,
+                                                             "peak_rss_bytes": None})
+                entry["calls"] += 1
+                entry["seconds"] += seconds
+                entry["records"] += current.records or 0
+                if current.peak_rss is not None:
+                    entry["peak_rss_bytes"] = max(entry["peak_rss_bytes"] or 0, current.peak_rss)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # sampling
+    def start(self, interval=SAMPLE_INTERVAL):
+        self.started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.t0 = time.perf_counter()
+        self._run.observe(current_rss())
+        if self._sampler is None and current_rss() is not None:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, args=(interval,), daemon=True)
+            self._sampler.start()
+
+    def _sample(self, interval):
+        while not self._stop.wait(interval):
+            rss = current_rss()
+            with self._lock:
+                self._run.observe(rss)
+                for open_span in self._open:
+                    open_span.observe(rss)
+
+    def stop(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def report(self):
+        """JSON-serialisable summary of the run so far."""
+        spans = [dict(path=path, **entry) for path, entry in self.spans.items()]
+        for entry in spans:
+            entry["seconds"] = round(entry["seconds"], 6)
+            entry["records_per_second"] = (round(entry["records"] / entry["seconds"], 1)
+                                           if entry["records"] and entry["seconds"] else None)
+        return {
+            "version": REPORT_VERSION,
+            "name": self.name,
+            "started": self.started,
+            "seconds": round(time.perf_counter() - self.t0, 6) if self.t0 is not None else None,
+            "peak_rss_bytes": self._run.peak_rss,
+            "process_peak_rss_bytes": peak_rss(),
+            "process_peak_rss_children_bytes": peak_rss(children=True),
+            "spans": sorted(spans, key=lambda e: e["path"]),
+            "counters": dict(sorted(self.counters.items())),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        }
+
+
+_RUN = Recorder()
+
+
+def reset(name=None):
+    """Start a fresh recorder (e.g. per pipeline stage) and return it."""
+    global _RUN
+    _RUN.stop()
+    _RUN = Recorder(name)
+    return _RUN
+
+
+def recorder():
+    return _RUN
+
+
+def span(name, records=None):
+    """Context manager timing a block; ``records`` (or ``as s: s.records = n``) feeds throughput."""
+    return _RUN.span(name, records)
+
+
+def count(name, n=1):
+    _RUN.count(name, n)
+
+
+def timed(name):
+    """Decorator form of ``span``."""
+    def wrap(fn):
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        inner.__name__, inner.__doc__, inner.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return inner
+    return wrap
+
+
+# ── PROFILING ──────────────────────────────────────────
+@contextlib.contextmanager
+def profile(mode, path):
+    """Profile the block with ``mode`` ("cprofile" / "pyinstrument"; falsy = off) into ``path``."""
+    if not mode:
+        yield None
+        return
+    if mode not in PROFILERS:
+        raise ValueError(f"unknown profiler {mode!r}; choose from {PROFILERS}")
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            mode = "cprofile"
+            path = os.path.splitext(path)[0] + ".prof"
+    if mode == "cprofile":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield path
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    else:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield path
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+
+
+def profile_suffix(mode):
+    return ".html" if mode == "pyinstrument" else ".prof"
+
+
+# ── REPORTS ────────────────────────────────────────────
+def write_report(path, report):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_report(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _timings(report):
+    """``{"stage" / "stage/span path": seconds}`` of a run report (rita) or a single stage report."""
+    stages = report.get("stages") or {report.get("name") or "run": {"report": report}}
+    out = {}
+    for name, stage in stages.items():
+        rep = stage.get("report") or {}
+        if rep.get("seconds") is not None:
+            out[name] = rep["seconds"]
+        for entry in rep.get("spans", []):
+            out[f"{name}/{entry['path']}"] = entry["seconds"]
+    return out
+
+
+def compare_reports(old, new, threshold=0.2, min_seconds=0.05):
+    """
+    ``[(key, old_s, new_s, ratio)]`` for stages / spans that got slower by
+    more than ``threshold`` (and by at least ``min_seconds``), slowest first.
+    """
+    before, after = _timings(old), _timings(new)
+    rows = []
+    for key, new_s in after.items():
+        old_s = before.get(key)
+        if old_s and new_s - old_s >= min_seconds and new_s > old_s * (1 + threshold):
+            rows.append((key, old_s, new_s, new_s / old_s))
+    return sorted(rows, key=lambda r: -r[3])
+
+
+def format_comparison(rows):
+    if not rows:
+        return "no regressions"
+    return "\n".join(f"  {key:<48} {old_s:>8.2f}s → {new_s:>8.2f}s  ({ratio:.2f}×)"
+                     for key, old_s, new_s, ratio in rows)
+
+
+# ── STANDALONE SCRIPTS ─────────────────────────────────
+def _write_env_report(path):
+    _RUN.stop()
+    write_report(path, _RUN.report())
+
+
+if os.environ.get(REPORT_ENV):
+    _RUN.name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None
+    _RUN.start()
+    atexit.register(_write_env_report, os.environ[REPORT_ENV])
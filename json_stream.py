@@ -0,0 +1,130 @@
+"""
+json_stream.py
+──────────────
+Record-at-a-time JSON reading and writing for the corpus files.
+
+Readers accept either a JSON array file (``[ {...}, {...} ]``) or newline
+delimited JSON (``.jsonl`` / ``.ndjson``) and yield one record at a time, so
+peak memory is a small multiple of the largest record instead of the whole
+corpus.  Arrays are parsed with ``ijson`` when it is installed and with an
+incremental ``json.JSONDecoder.raw_decode`` loop otherwise.
+
+Writers emit newline-delimited JSON through a temporary file that replaces
+the target only once every record was written.
+"""
+
+import json
+import os
+from pathlib import Path
+
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+READ_CHUNK = 1 << 16
+
+
+def is_jsonl(path):
+    return Path(path).suffix.lower() in JSONL_SUFFIXES
+
+
+# ── READING ────────────────────────────────────────────
+def _iter_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _iter_array_raw(path):
+    """Incrementally decode the items of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        fill()
+        skip_ws()
+        if buf[pos:pos + 1] != "[":
+            raise ValueError(f"{path}: expected a JSON array")
+        pos += 1
+        skip_ws()
+        if buf[pos:pos + 1] == "]":
+            return
+        while True:
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                # A number at the buffer edge may be cut short ("2." → 2); only accept
+                # a value once it is followed by a delimiter or the input is exhausted
+                if not eof and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                    fill()
+                    continue
+                break
+            yield obj
+            pos = end
+            skip_ws()
+            sep = buf[pos:pos + 1]
+            pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"{path}: expected ',' or ']' between array items")
+            skip_ws()
+
+
+def _iter_array_ijson(path, ijson):
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def iter_records(path):
+    """Yield the records of a JSON array or JSON Lines file one at a time."""
+    if is_jsonl(path):
+        yield from _iter_jsonl(path)
+        return
+    try:
+        import ijson
+    except ImportError:
+        yield from _iter_array_raw(path)
+    else:
+        yield from _iter_array_ijson(path, ijson)
+
+
+# ── WRITING ────────────────────────────────────────────
+def write_jsonl(path, records):
+    """Write ``records`` (any iterable) as JSON Lines; returns the record count."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    count = 0
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def jsonl_path(path):
+    """``foo.json`` → ``foo.jsonl`` (other suffixes are kept and ``.jsonl`` appended)."""
+    path = Path(path)
+    return path.with_suffix(".jsonl") if path.suffix.lower() == ".json" else path.with_name(path.name + ".jsonl")
@@ -0,0 +1,45 @@
+"""
+keywords.py
+───────────
+Keyword filtering of cleaned documents (tokens not in the stop-list), split
+across worker processes.
+
+  • ``keywords_per_doc`` sends chunks of documents to a process pool; the
+    frozen stop-list reaches each worker once through the pool initializer,
+    tasks carry only the documents.
+  • ``pool.map`` keeps input order, so the result equals the serial
+    comprehension; one worker or a single chunk stays in-process.
+
+The workers live in this module (not the stage script) so they can be
+pickled when the script runs as ``__main__`` under ``rita.run_script``.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+WORKERS = None          # None = one per CPU
+CHUNK = 2000            # documents per task
+
+_filter_set = None
+
+
+def _init_worker(filter_set):
+    global _filter_set
+    _filter_set = filter_set
+
+
+def _filter_chunk(docs, filter_set=None):
+    filter_set = _filter_set if filter_set is None else filter_set
+    return [[t for t in doc.split() if t not in filter_set] for doc in docs]
+
+
+def keywords_per_doc(docs, filter_set, workers=WORKERS, chunk_size=CHUNK):
+    """Tokens of every cleaned doc that are not in ``filter_set``, in input order."""
+    filter_set = frozenset(filter_set)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(docs) <= chunk_size:
+        return _filter_chunk(docs, filter_set)
+    chunks = (docs[k:k + chunk_size] for k in range(0, len(docs), chunk_size))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(filter_set,)) as pool:
+        return list(itertools.chain.from_iterable(pool.map(_filter_chunk, chunks)))
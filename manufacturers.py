@@ -0,0 +1,27 @@
+"""
+manufacturers.py
+────────────────
+Aircraft manufacturer keywords shared by the similarity filter
+(new_clean_data_similarities.py) and the level-of-detail cityscapes.
+"""
+
+import re
+
+# Aircraft manufacturer keywords for filtering
+MANUFACTURERS = {
+    "airbus", "boeing", "cessna", "piper", "beech", "beechcraft", "mooney", "cirrus",
+    "lancair", "ryan", "douglas", "mcdonnell", "north", "extra", "air", "airtractor",
+    "aeronca", "grumman", "yak", "zenith", "glasair", "vans", "poberezny", "moth",
+    "wheeler", "navion", "kitfox", "titan", "weatherly"
+}
+
+OTHER = "Other"
+_FIRST_WORD_RE = re.compile(r"[a-z]+")
+
+
+def manufacturer_of(name):
+    """Manufacturer block for an aircraft name (``"Cessna 172"`` → ``"Cessna"``), else ``OTHER``."""
+    m = _FIRST_WORD_RE.match(name.strip().lower())
+    if m and m.group(0) in MANUFACTURERS:
+        return m.group(0).capitalize()
+    return OTHER
@@ -2,12 +2,20 @@ import json
 import re
 import csv
 from collections import defaultdict
+from functools import lru_cache
 import pandas as pd
 from pathlib import Path
 
+from data_access import load_records
+from instrumentation import span
+from json_stream import iter_records
+from manufacturers import MANUFACTURERS
+from theme_matcher import ThemeMatcher
+
 # -------- CONFIG --------
 DATA_FILE = "C:\\Users\\olaye\\Documents\\UARC\\semantic_enriched_output.json"
 OUTPUT_JSON = "C:\\Users\\olaye\\Documents\\UARC\\aircraft_by_similarity_theme.json"
+STREAMING = False   # read DATA_FILE (JSON array or .jsonl) one record at a time
 
 # Define similarity themes and regex patterns
 THEMES = {
@@ -20,44 +28,46 @@ THEMES = {
     "Engine_component failure" : r"oil starvation|exhaust valve|idle valve|drive gear",
 }
 
-# Aircraft manufacturer keywords for filtering
-MANUFACTURERS = {
-    "airbus", "boeing", "cessna", "piper", "beech", "beechcraft", "mooney", "cirrus",
-    "lancair", "ryan", "douglas", "mcdonnell", "north", "extra", "air", "airtractor",
-    "aeronca", "grumman", "yak", "zenith", "glasair", "vans", "poberezny", "moth",
-    "wheeler", "navion", "kitfox", "titan", "weatherly"
-}
+# All THEMES compiled into one matcher: each blob is scanned once
+THEME_MATCHER = ThemeMatcher(THEMES)
+
+YEAR_RE     = re.compile(r"\d{4}")
+TAIL_RE     = re.compile(r"N\d+[A-Z]*")
+DIGIT_RE    = re.compile(r"\d")
+AIRCRAFT_SPLIT_RE = re.compile(r"[;/,]")
 
+@lru_cache(maxsize=None)
 def is_probable_aircraft(name: str) -> bool:
     """Return True if string looks like an aircraft model (basic heuristic)."""
     n = name.strip()
     if not n:
         return False
-    if re.fullmatch(r"\d{4}", n) or re.fullmatch(r"N\d+[A-Z]*", n):
+    if YEAR_RE.fullmatch(n) or TAIL_RE.fullmatch(n):
         return False
     first_word = n.split()[0].lower()
-    if re.search(r"\d", n) or first_word in MANUFACTURERS:
+    if DIGIT_RE.search(n) or first_word in MANUFACTURERS:
         return True
     return False
 
 # -------- LOAD DATA --------
-with open(DATA_FILE, encoding="utf-8") as f:
-    records = json.load(f)
+records = iter_records(DATA_FILE) if STREAMING else load_records(DATA_FILE)
 
 # -------- GROUP BY THEME --------
 theme_aircraft = defaultdict(set)
-for rec in records:
-    blob = " ".join(rec["damage_notes"] + rec["cause_notes"] + rec["keywords"]).lower()
-    aircraft_clean = set()
-    for entry in rec.get("aircraft", []):
-        for token in re.split(r"[;/,]", entry):
-            token = token.strip()
-            if is_probable_aircraft(token):
-                aircraft_clean.add(token)
+with span("themes") as grouping:
+    grouping.records = 0
+    for rec in records:
+        blob = " ".join(rec["damage_notes"] + rec["cause_notes"] + rec["keywords"]).lower()
+        aircraft_clean = set()
+        for entry in rec.get("aircraft", []):
+            for token in AIRCRAFT_SPLIT_RE.split(entry):
+                token = token.strip()
+                if is_probable_aircraft(token):
+                    aircraft_clean.add(token)
 
-    for theme, pattern in THEMES.items():
-        if re.search(pattern, blob):
+        for theme in THEME_MATCHER.matched(blob):
             theme_aircraft[theme].update(aircraft_clean)
+        grouping.records += 1
 
 # -------- EXPORT --------
 # Save as JSON
@@ -0,0 +1,278 @@
+"""
+pdf_extraction.py
+─────────────────
+NTSB "Aviation Investigation Final Report" PDFs → the records of
+final_extracted_data.json ("File Name", "Flight Information" {Location,
+Date & Time, Aircraft_model, Aircraft, Defining Event, Flight Conducted
+Under, Accident Number, Registration, Aircraft Damage, Injuries},
+"Analysis", "Probable Cause and Findings").
+
+  • Sections are found with rules on the page text: the page-1
+    ``Label: value`` fields and the section headings on lines of their own.
+    The text between two headings is kept as extracted, page footers
+    ("Page 2 of 5" + case ID) included, like the existing corpus.
+  • Pages are read only until the first heading after the cause section
+    ("Factual Information" …), so long dockets cost as much as short ones.
+  • ``extract_directory`` runs the PDFs through a process pool and appends
+    every finished report to a JSON Lines journal (``<output>.jsonl``, one
+    record + the PDF's SHA-1 per line).  A rerun extracts only new or
+    changed PDFs, reuses the record of a renamed copy and drops removed
+    files; an interrupted run resumes from the journal.
+  • A PDF that raises, or takes its worker process down, is retried on its
+    own in a fresh single-process pool (``retries`` times) and otherwise
+    listed in ``<output>.errors.json`` – it never aborts the run.
+
+Page text comes from PyMuPDF (``fitz``) when installed, else ``pypdf``.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from data_access import _file_sha1
+from instrumentation import count, span
+from json_stream import jsonl_path, write_jsonl
+
+RETRIES = 2
+IN_FLIGHT = 4                   # tasks queued per worker; bounds memory and what a crashed pool takes down
+
+FIELDS = ("Location", "Accident Number", "Date & Time", "Registration", "Aircraft Damage", "Aircraft Make",
+          "Aircraft", "Model/Series", "Defining Event", "Injuries", "Flight Conducted Under")
+HEADINGS = ("Analysis", "Probable Cause and Findings", "Factual Information", "History of Flight",
+            "Pilot Information", "Aircraft and Owner/Operator Information",
+            "Meteorological Information and Flight Plan", "Wreckage and Impact Information",
+            "Medical and Pathological Information", "Tests and Research", "Administrative Information")
+# Header field → "Flight Information" key of the existing corpus (Aircraft / Aircraft_model are derived)
+FLIGHT_INFO = {"Location": "Location", "Date & Time": "Date & Time", "Defining Event": "Defining Event",
+               "Flight Conducted Under": "Flight Conducted Under", "Accident Number": "Accident Number",
+               "Registration": "Registration", "Aircraft Damage": "Aircraft Damage", "Injuries": "Injuries"}
+SECTIONS = {"Analysis": "Analysis", "Probable Cause and Findings": "Probable Cause and Findings"}
+NOT_FOUND = "Not found"         # missing section, as the scripts expect it
+
+# Longer labels first so "Aircraft Damage:" is not read as "Aircraft:"
+FIELD_RE = re.compile(r"(?P<label>" + "|".join(re.escape(f) for f in sorted(FIELDS, key=len, reverse=True))
+                      + r"):[ \t]*")
+HEADING_RE = re.compile(r"^[ \t]*(?P<heading>" + "|".join(re.escape(h) for h in HEADINGS) + r")[ \t]*$",
+                        re.MULTILINE)
+
+
+# ── PAGE TEXT ──────────────────────────────────────────
+def backend():
+    """Name of the installed PDF text backend; raises ``ImportError`` when there is none."""
+    try:
+        import fitz  # noqa: F401
+
+        return "pymupdf"
+    except ImportError:
+        pass
+    try:
+        import pypdf  # noqa: F401
+
+        return "pypdf"
+    except ImportError:
+        raise ImportError("PDF extraction needs PyMuPDF (pip install pymupdf) or pypdf (pip install pypdf)") from None
+
+
+def iter_pages(path):
+    """Yield the text of each page of ``path``."""
+    if backend() == "pymupdf":
+        import fitz
+
+        with fitz.open(path) as doc:
+            for page in doc:
+                yield page.get_text()
+    else:
+        from pypdf import PdfReader
+
+        for page in PdfReader(path).pages:
+            yield page.extract_text() or ""
+
+
+# ── SECTIONS ───────────────────────────────────────────
+def header_fields(text):
+    """``{label: value}`` of the ``Label: value`` fields; the first occurrence of a label wins."""
+    fields = {}
+    for line in text.splitlines():
+        matches = list(FIELD_RE.finditer(line))
+        for m, following in zip(matches, matches[1:] + [None]):
+            value = line[m.end():following.start() if following else len(line)].strip()
+            fields.setdefault(m.group("label"), value or None)
+    return fields
+
+
+def split_sections(text):
+    """``{heading: text}`` between each heading and the next; the first occurrence of a heading wins."""
+    marks = list(HEADING_RE.finditer(text))
+    sections = {}
+    for m, following in zip(marks, marks[1:] + [None]):
+        body = text[m.end():following.start() if following else len(text)]
+        sections.setdefault(m.group("heading"), body.strip())
+    return sections
+
+
+def _complete(text):
+    """True once a heading after "Probable Cause and Findings" was read."""
+    headings = [m.group("heading") for m in HEADING_RE.finditer(text)]
+    return "Probable Cause and Findings" in headings[:-1]
+
+
+def parse_report(text, file_name):
+    """The final_extracted_data.json record of one report's text (missing fields ``None``, sections ``NOT_FOUND``)."""
+    first = HEADING_RE.search(text)
+    fields = header_fields(text[:first.start()] if first else text)
+    sections = split_sections(text)
+    series = fields.get("Model/Series")
+    model = fields.get("Aircraft") or (" ".join(filter(None, (fields.get("Aircraft Make"), series))) or None)
+    make = fields.get("Aircraft Make") or (model.split()[0] if model else None)
+    info = {key: fields.get(label) for label, key in FLIGHT_INFO.items()}
+    info.update({"Aircraft": make, "Aircraft_model": model})
+    record = {"File Name": file_name, "Flight Information": info}
+    for heading, key in SECTIONS.items():
+        record[key] = sections.get(heading) or NOT_FOUND
+    return record
+
+
+def extract_pdf(path):
+    """Worker entry point: the record of the PDF at ``path``."""
+    text = ""
+    for page in iter_pages(path):
+        text = f"{text}\n{page}" if text else page
+        if _complete(text):
+            break
+    return parse_report(text, os.path.basename(path))
+
+
+# ── DIRECTORY RUN ──────────────────────────────────────
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def list_pdfs(pdf_dir):
+    return sorted((p for p in Path(pdf_dir).iterdir() if p.suffix.lower() == ".pdf" and p.is_file()),
+                  key=lambda p: _natural_key(p.name))
+
+
+def load_journal(path):
+    """``{file name: (sha1, record)}`` from a journal; later lines win.
+
+    A record written before every header field was kept comes back without
+    its hash, so the PDF is extracted again.
+    """
+    journal = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:              # blank, or cut short by an interrupted run
+                    continue
+                sha1 = record.pop("sha1", None)
+                if not set(FLIGHT_INFO.values()) <= set(record.get("Flight Information", {})):
+                    sha1 = None
+                journal[record["File Name"]] = (sha1, record)
+    return journal
+
+
+def _pool_run(paths, workers, on_record):
+    """
+    Extract ``paths`` in a process pool, ``on_record(path, record)`` for each
+    success; returns ``{path: error}`` for the ones that raised or were
+    in flight when the pool broke.
+    """
+    failed, todo = {}, list(reversed(paths))
+    while todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            try:
+                while todo or running:
+                    while todo and len(running) < workers * IN_FLIGHT:
+                        path = todo.pop()
+                        running[pool.submit(extract_pdf, str(path))] = path
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path = running[future]
+                        try:
+                            record = future.result()
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as exc:
+                            failed[path] = f"{type(exc).__name__}: {exc}"
+                        else:
+                            on_record(path, record)
+                        del running[future]
+            except BrokenProcessPool:
+                # One of the PDFs in flight killed its worker: isolate all of them, carry on with a new pool
+                for path in running.values():
+                    failed[path] = "worker process died"
+    return failed
+
+
+def extract_directory(pdf_dir, output_json, workers=None, retries=RETRIES):
+    """
+    Extract every PDF in ``pdf_dir`` into ``output_json`` (JSON array) via the
+    ``<output>.jsonl`` journal; returns ``{"extracted", "reused", "removed",
+    "failed"}`` counts.
+    """
+    backend()
+    workers = workers or os.cpu_count() or 1
+    journal_path = jsonl_path(output_json)
+    errors_path = Path(str(output_json) + ".errors.json")
+    pdfs = list_pdfs(pdf_dir)
+    journal = load_journal(journal_path)
+    by_hash = {sha1: record for sha1, record in journal.values() if sha1}
+
+    with span("hash", records=len(pdfs)):
+        hashes = {p: _file_sha1(p) for p in pdfs}
+    done, todo = {}, []
+    for path in pdfs:
+        sha1 = hashes[path]
+        previous = journal.get(path.name)
+        if previous and previous[0] == sha1:
+            done[path.name] = (sha1, previous[1])
+        elif sha1 in by_hash:
+            done[path.name] = (sha1, dict(by_hash[sha1], **{"File Name": path.name}))
+        else:
+            todo.append(path)
+    reused = len(done)
+    removed = len(set(journal) - {p.name for p in pdfs})
+    count("extract.reused", reused)
+
+    with open(journal_path, "a", encoding="utf-8", newline="\n") as journal_file:
+        journal_file.write("\n")         # ends a line an interrupted run left half-written
+
+        def on_record(path, record):
+            done[path.name] = (hashes[path], record)
+            journal_file.write(json.dumps(dict(record, sha1=hashes[path]), ensure_ascii=False) + "\n")
+            journal_file.flush()
+
+        with span("extract", records=len(todo)):
+            failed = _pool_run(todo, workers, on_record)
+            for _ in range(retries):
+                retry, failed = sorted(failed, key=lambda p: _natural_key(p.name)), {}
+                for path in retry:
+                    failed.update(_pool_run([path], 1, on_record))
+
+    with span("write_json", records=len(done)):
+        names = [p.name for p in pdfs if p.name in done]
+        write_jsonl(journal_path, (dict(done[n][1], sha1=done[n][0]) for n in names))
+        _write_array(output_json, [done[n][1] for n in names])
+        if failed:
+            with open(errors_path, "w", encoding="utf-8") as f:
+                json.dump({p.name: error for p, error in failed.items()}, f, indent=2)
+        elif errors_path.exists():
+            errors_path.unlink()
+    count("extract.failed", len(failed))
+    return {"extracted": len(done) - reused, "reused": reused, "removed": removed, "failed": len(failed)}
+
+
+def _write_array(path, records):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[")
+        for k, rec in enumerate(records):
+            f.write(("\n" if k == 0 else ",\n") + json.dumps(rec, ensure_ascii=False))
+        f.write("\n]\n")
+    os.replace(tmp, path)
@@ -0,0 +1,375 @@
+"""
+rita.py
+───────
+Single entry point that runs the pipeline scripts as a dependency-aware DAG.
+
+    python rita.py list
+    python rita.py run                       # everything that is out of date
+    python rita.py run viz_cityscape         # one stage plus what it needs
+    python rita.py run --force --workers 2
+    python rita.py run --dry-run
+    python rita.py run --report run.json --profile cprofile
+    python rita.py compare old_run.json new_run.json
+
+Every stage is one of the existing scripts with declared input and output
+path keys.  The scripts keep their own configuration constants; ``rita``
+rebinds the module-level path constants listed in ``bind`` (and any
+``settings`` from the config) to the values in the config file before
+executing the script, so the same scripts run unchanged on Windows
+workstations and Linux batch hosts.
+
+A stage is skipped when all of its outputs exist and are newer than its
+inputs and its script.  Stages whose inputs do not exist (or have no path
+configured, e.g. no ``pdfs`` directory for ``extract``) and are not
+produced by another stage are skipped as well; a missing ``optional`` input
+(the cityscape's month / theme sources) does not hold a stage back.  Stages are dispatched to a
+process pool as soon as the stages they depend on finish, so independent
+stages (e.g. the four visualization exports) run in parallel.
+
+Each stage runs under ``instrumentation``: its wall time, the spans the
+libraries record (load / clean / ner / themes / similarity / write_html …),
+record counters and peak RSS are collected into one JSON run report
+(``--report`` or the ``run_report`` path key).  When the report already
+exists, stages and spans that got slower than last time are printed before
+it is replaced.  ``--profile cprofile|pyinstrument`` additionally profiles
+every stage into ``<stage>.prof`` / ``<stage>.html`` next to the report.
+
+Config (``rita.json`` next to this file, ``$RITA_CONFIG`` or ``--config``;
+see rita.example.json)::
+
+    {
+      "dirs":     {"data": "/srv/rita/data", "out": "/srv/rita/out"},
+      "paths":    {"extracted": "{data}/final_extracted_data.json", …},
+      "workers":  4,
+      "settings": {"cleanup": {"STREAMING": true}}
+    }
+
+Relative paths are resolved against the config file's directory.
+"""
+
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import instrumentation
+
+REPO_DIR = Path(__file__).resolve().parent
+CONFIG_ENV = "RITA_CONFIG"
+DEFAULT_CONFIG = REPO_DIR / "rita.json"
+
+
+# ── STAGES ─────────────────────────────────────────────
+@dataclass
+class Stage:
+    name: str
+    script: str
+    inputs: list
+    outputs: list
+    bind: dict = field(default_factory=dict)    # script constant -> path key
+    optional: list = field(default_factory=list)  # inputs the script can do without
+
+
+STAGES = [
+    Stage("extract", "final_data_extraction.py",
+          inputs=["pdfs"], outputs=["extracted"],
+          bind={"PDF_DIR": "pdfs", "OUTPUT_JSON": "extracted"}),
+    Stage("cleanup", "Query_based_visualization_data_cleanup.py",
+          inputs=["extracted"], outputs=["enriched"],
+          bind={"FILE_PATH": "extracted", "OUTPUT_JSON": "enriched"}),
+    Stage("themes", "new_clean_data_similarities.py",
+          inputs=["enriched"], outputs=["themes"],
+          bind={"DATA_FILE": "enriched", "OUTPUT_JSON": "themes"}),
+    Stage("theme_cleanup", "aircraft_by_similarity_theme.py",
+          inputs=["aircraft_sections"], outputs=["aircraft_sections_cleaned"],
+          bind={"input_path": "aircraft_sections", "output_path": "aircraft_sections_cleaned"}),
+    Stage("cause_groups", "cause_of_accidents_extraction.py",
+          inputs=["extracted"], outputs=["cause_groups"],
+          bind={"file_path": "extracted", "output_file": "cause_groups"}),
+    Stage("similarity", "finding_similarities_in_analysis_probable_cause_and_findings_UARC.py",
+          inputs=["extracted"], outputs=["similarities"],
+          bind={"json_path": "extracted", "output_txt_path": "similarities"}),
+    Stage("viz_names", "Aircraft_names_visualization.py",
+          inputs=["aircraft_names"], outputs=["names_html"],
+          bind={"file_path": "aircraft_names", "output_path": "names_html", "corpus_path": "enriched_clean",
+                "figures_dir": "figures", "lod_dir": "names_lod"}),
+    Stage("viz_injuries", "Injuries_visualization.py",
+          inputs=["injuries"], outputs=["injuries_html"],
+          bind={"file_path": "injuries", "output_path": "injuries_html", "corpus_path": "enriched_clean",
+                "figures_dir": "figures"}),
+    Stage("viz_cityscape", "Aircraft_Incident_cityscape_graph.py",
+          inputs=["aircraft_names", "injuries", "damage", "extracted", "themes"], outputs=["cityscape_html"],
+          bind={"flight_info_path": "aircraft_names", "injury_path": "injuries", "damage_path": "damage",
+                "extracted_path": "extracted", "themes_path": "themes",
+                "output_path": "cityscape_html", "corpus_path": "enriched_clean",
+                "figures_dir": "figures", "lod_dir": "cityscape_lod"},
+          optional=["extracted", "themes"]),
+    Stage("viz_clean_aircraft", "Clean_Aircraft_3D_Visualization.py",
+          inputs=["extracted"], outputs=["clean_aircraft_html"],
+          bind={"data_path": "extracted", "output_path": "clean_aircraft_html", "corpus_path": "enriched_clean",
+                "figures_dir": "figures"}),
+]
+
+
+# ── CONFIG ─────────────────────────────────────────────
+def load_config(path=None):
+    path = Path(path or os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG)
+    if not path.exists():
+        raise SystemExit(f"{path}: config not found (copy rita.example.json to rita.json and edit the paths)")
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    base = path.resolve().parent
+    dirs = {name: str((base / Path(d).expanduser()).resolve()) for name, d in config.get("dirs", {}).items()}
+    paths = {key: str(base / Path(p.format_map(dirs)).expanduser()) for key, p in config.get("paths", {}).items()}
+    return {
+        "paths": paths,
+        "workers": config.get("workers") or os.cpu_count() or 1,
+        "settings": config.get("settings", {}),
+    }
+
+
+# ── PLANNING ───────────────────────────────────────────
+def dependencies(stages, optional=True):
+    """``{stage name: {names of the stages producing its inputs}}`` (without ``optional`` ones if false)."""
+    producer = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: {producer[i] for i in s.inputs if i in producer and producer[i] != s.name
+                     and (optional or i not in s.optional)} for s in stages}
+
+
+def select(stages, targets):
+    """``targets`` plus everything upstream of them, in declaration order."""
+    if not targets:
+        return list(stages)
+    by_name = {s.name: s for s in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise SystemExit(f"unknown stage(s): {', '.join(unknown)}; see `python rita.py list`")
+    deps = dependencies(stages)
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in stages if s.name in wanted]
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def stage_status(stage, paths):
+    """``"stale"``, ``"up to date"`` or ``"missing input: …"`` for a stage."""
+    missing = [key for key in stage.outputs if key not in paths]
+    if missing:
+        raise SystemExit(f"stage {stage.name}: no path configured for {', '.join(missing)}")
+    input_times = [_mtime(paths[key]) if key in paths else None for key in stage.inputs]
+    missing = [k for k, t in zip(stage.inputs, input_times) if t is None and k not in stage.optional]
+    if missing:
+        return "missing input: " + ", ".join(missing)
+    input_times = [t for t in input_times if t is not None]
+    output_times = [_mtime(paths[key]) for key in stage.outputs]
+    if None in output_times:
+        return "stale"
+    newest_input = max(input_times + [_mtime(REPO_DIR / stage.script)])
+    return "up to date" if min(output_times) >= newest_input else "stale"
+
+
+# ── EXECUTION ──────────────────────────────────────────
+class _Rebind(ast.NodeTransformer):
+    """Replace the value of top-level ``NAME = …`` assignments (also inside ``if`` blocks)."""
+
+    def __init__(self, values):
+        self.values = values
+        self.seen = set()
+
+    def visit_FunctionDef(self, node):
+        return node
+
+    visit_AsyncFunctionDef = visit_ClassDef = visit_FunctionDef
+
+    def visit_Assign(self, node):
+        if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name) and node.targets[0].id in self.values:
+            name = node.targets[0].id
+            self.seen.add(name)
+            value = ast.parse(repr(self.values[name]), mode="eval").body
+            node.value = ast.copy_location(value, node.value)
+        return node
+
+
+def run_script(script, values):
+    """Execute ``script`` as ``__main__`` with the given constants rebound; returns its output."""
+    path = REPO_DIR / script
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    rebind = _Rebind(values)
+    tree = ast.fix_missing_locations(rebind.visit(tree))
+    unbound = set(values) - rebind.seen
+    if unbound:
+        raise RuntimeError(f"{script}: no module-level assignment for {', '.join(sorted(unbound))}")
+
+    if str(REPO_DIR) not in sys.path:
+        sys.path.insert(0, str(REPO_DIR))
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        exec(compile(tree, str(path), "exec"), {"__name__": "__main__", "__file__": str(path)})
+    return log.getvalue()
+
+
+def _run_stage(script, values, name=None, profile=None, profile_path=None):
+    """Worker entry point: ``(ok, seconds, output, instrumentation report)``."""
+    recorder = instrumentation.reset(name or script)
+    recorder.start()
+    t0 = time.perf_counter()
+    try:
+        with instrumentation.profile(profile, profile_path), instrumentation.span("script"):
+            output = run_script(script, values)
+        ok = True
+    except Exception:
+        output, ok = traceback.format_exc(), False
+    seconds = time.perf_counter() - t0
+    recorder.stop()
+    return ok, seconds, output, recorder.report()
+
+
+def _stage_values(stage, config):
+    values = {const: config["paths"][key] for const, key in stage.bind.items() if key in config["paths"]}
+    values.update(config["settings"].get(stage.name, {}))
+    for key in stage.outputs:
+        Path(config["paths"][key]).parent.mkdir(parents=True, exist_ok=True)
+    return values
+
+
+def run(stages, config, force=False, dry_run=False, workers=None, reports=None, profile=None, profile_dir=None):
+    """
+    Run ``stages`` respecting dependencies; returns the names of failed stages.
+
+    ``reports`` (a dict) is filled with ``{stage: {"status", "seconds",
+    "report"}}`` for the run report.
+    """
+    reports = {} if reports is None else reports
+    deps = dependencies(stages)
+    names = {s.name for s in stages}
+    deps = {name: d & names for name, d in deps.items() if name in names}
+    required = dependencies(stages, optional=False)
+    pending = {s.name: s for s in stages}
+    done, failed, running = set(), set(), {}
+
+    def ready(stage):
+        return deps[stage.name] <= done | failed
+
+    # A fresh worker per stage, so its lifetime peak RSS / children's RSS are that stage's alone
+    with ProcessPoolExecutor(max_workers=workers or config["workers"], max_tasks_per_child=1) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if required[name] & failed:
+                    print(f"✗ {name:<20} skipped (upstream failed)")
+                    reports[name] = {"status": "upstream failed"}
+                    failed.add(name)
+                    del pending[name]
+                elif ready(stage):
+                    del pending[name]
+                    status = stage_status(stage, config["paths"])
+                    runnable = status == "stale" or (force and status == "up to date")
+                    if not runnable or dry_run:
+                        print(f"· {name:<20} {'would run' if runnable else status}")
+                        reports[name] = {"status": "would run" if runnable else status}
+                        done.add(name)
+                        continue
+                    print(f"▶ {name:<20} started")
+                    profile_path = (str(Path(profile_dir or ".") / (name + instrumentation.profile_suffix(profile)))
+                                    if profile else None)
+                    running[pool.submit(_run_stage, stage.script, _stage_values(stage, config),
+                                        name, profile, profile_path)] = name
+            if not running:
+                if pending and not any(ready(s) for s in pending.values()):
+                    raise RuntimeError(f"dependency cycle among: {', '.join(pending)}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                ok, seconds, output, report = future.result()
+                reports[name] = {"status": "ok" if ok else "failed", "seconds": round(seconds, 3), "report": report}
+                for line in output.rstrip().splitlines():
+                    print(f"  {name} │ {line}")
+                print(f"{'✓' if ok else '✗'} {name:<20} {'done' if ok else 'FAILED'} in {seconds:.1f}s")
+                (done if ok else failed).add(name)
+
+    figures = config["paths"].get("figures")
+    if figures and Path(figures).is_dir() and not dry_run:
+        from figure_export import update_manifest
+        update_manifest(figures)        # parallel exports may have raced on the manifest
+    return failed
+
+
+# ── CLI ────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", help="config file (default: $RITA_CONFIG or rita.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show stages, dependencies and status")
+    run_parser = sub.add_parser("run", help="run stages (default: all)")
+    run_parser.add_argument("stages", nargs="*")
+    run_parser.add_argument("--force", action="store_true", help="run even if outputs are up to date")
+    run_parser.add_argument("--dry-run", action="store_true", help="only print what would run")
+    run_parser.add_argument("--workers", type=int, help="parallel stage processes")
+    run_parser.add_argument("--report", help="JSON run report (default: the run_report path key, if any)")
+    run_parser.add_argument("--profile", choices=instrumentation.PROFILERS, help="profile every stage")
+    compare_parser = sub.add_parser("compare", help="list stages / spans that got slower between two run reports")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown to report")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        rows = instrumentation.compare_reports(instrumentation.read_report(args.old),
+                                               instrumentation.read_report(args.new), args.threshold)
+        print(instrumentation.format_comparison(rows))
+        return 1 if rows else 0
+
+    config = load_config(args.config)
+    if args.command == "list":
+        deps = dependencies(STAGES)
+        for stage in STAGES:
+            after = ", ".join(sorted(deps[stage.name])) or "-"
+            print(f"{stage.name:<20} {stage_status(stage, config['paths']):<28} after: {after}")
+        return 0
+
+    report_path = args.report or config["paths"].get("run_report")
+    profile_dir = Path(report_path).parent if report_path else Path.cwd()
+    if report_path:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    t0 = time.perf_counter()
+    reports = {}
+    failed = run(select(STAGES, args.stages), config, args.force, args.dry_run, args.workers,
+                 reports, args.profile, profile_dir)
+    seconds = time.perf_counter() - t0
+    print(f"{'FAILED: ' + ', '.join(sorted(failed)) if failed else 'ok'} ({seconds:.1f}s)")
+
+    if report_path and not args.dry_run:
+        run_report = {"version": instrumentation.REPORT_VERSION, "started": started, "seconds": round(seconds, 3),
+                      "stages": reports}
+        if os.path.exists(report_path):
+            rows = instrumentation.compare_reports(instrumentation.read_report(report_path), run_report)
+            if rows:
+                print("slower than the previous run:")
+                print(instrumentation.format_comparison(rows))
+        instrumentation.write_report(report_path, run_report)
+        print(f"run report: {report_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+semantic_vectors.py
+───────────────────
+Document vectors from the spaCy model's word vectors and a CPU
+approximate-nearest-neighbour (ANN) index over them, for "find similar
+accidents" queries that catch paraphrases ("exceedance of critical angle of
+attack" ≈ "aerodynamic stall") which TF-IDF and SequenceMatcher miss.
+
+Vectors
+  A document vector is the mean of its tokens' word vectors (punctuation,
+  whitespace and stop words skipped), L2-normalised so a dot product is the
+  cosine similarity.  Only the tokenizer runs; texts are streamed through
+  ``nlp.tokenizer.pipe`` in batches and each batch is reduced with one
+  ``np.add.reduceat`` over the vector-table rows.  Per field the vectors are
+  written batch by batch into a float32 ``.npy`` that is opened with
+  ``mmap_mode="r"``, under ``.rita_cache/<file>.vectors-<field>/``.
+
+Index
+  ``IVFIndex`` – inverted-file index: spherical k-means centroids, every
+  vector filed under its nearest centroid; a query scans only the lists of
+  its ``nprobe`` nearest centroids.  ``nlist`` grows as 4·√n, so the default
+  ``nprobe`` is the fraction ``NPROBE_FRACTION`` of it and a query keeps
+  scanning the same share of the corpus at every size.  Pure NumPy.  With ``hnswlib`` installed
+  ``backend="hnsw"`` builds an HNSW graph instead.
+"""
+
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from data_access import _file_sha1, cache_dir_for, load_record_table
+
+SPACY_MODEL = "en_core_web_md"
+VECTOR_BATCH = 256
+FIELDS = {
+    "analysis": "Analysis",
+    "cause": "Probable Cause and Findings",
+}
+PIPES = ("tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner")
+VECTORS_VERSION = 1
+NPROBE_FRACTION = 0.1           # share of the IVF lists a query scans by default
+
+
+# ── DOCUMENT VECTORS ───────────────────────────────────
+@lru_cache(maxsize=None)
+def load_vector_nlp(model=SPACY_MODEL):
+    """The model with every pipeline component excluded: tokenizer + word vectors only."""
+    import spacy
+
+    return spacy.load(model, exclude=list(PIPES))
+
+
+def _batch_vectors(docs, vectors, table):
+    """Mean word vector per doc of one batch, L2-normalised (zeros if no token has a vector)."""
+    orth, lower, lengths = [], [], []
+    for doc in docs:
+        keys = [(t.orth, t.lower) for t in doc if not (t.is_punct or t.is_space or t.is_stop)]
+        orth.extend(k[0] for k in keys)
+        lower.extend(k[1] for k in keys)
+        lengths.append(len(keys))
+    out = np.zeros((len(lengths), table.shape[1]), dtype=np.float32)
+    if not orth:
+        return out
+    rows = vectors.find(keys=orth)
+    rows = np.where(rows < 0, vectors.find(keys=lower), rows)
+
+    doc_of = np.repeat(np.arange(len(lengths)), lengths)
+    found = rows >= 0
+    rows, doc_of = rows[found], doc_of[found]
+    if rows.size == 0:
+        return out
+    starts = np.flatnonzero(np.r_[True, doc_of[1:] != doc_of[:-1]])
+    sums = np.add.reduceat(np.asarray(table[rows], dtype=np.float32), starts, axis=0)
+    counts = np.diff(np.r_[starts, rows.size])
+    means = sums / counts[:, None]
+    norms = np.linalg.norm(means, axis=1, keepdims=True)
+    out[doc_of[starts]] = means / np.maximum(norms, 1e-12)
+    return out
+
+
+def iter_text_vectors(texts, nlp, batch_size=VECTOR_BATCH):
+    """Yield ``(batch_size, dim)`` float32 blocks of document vectors for ``texts``."""
+    vectors = nlp.vocab.vectors
+    table = vectors.data
+    batch = []
+    for doc in nlp.tokenizer.pipe((t or "" for t in texts), batch_size=batch_size):
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield _batch_vectors(batch, vectors, table)
+            batch = []
+    if batch:
+        yield _batch_vectors(batch, vectors, table)
+
+
+def embed_texts(texts, nlp, batch_size=VECTOR_BATCH):
+    """In-memory ``(len(texts), dim)`` float32 matrix of document vectors."""
+    blocks = list(iter_text_vectors(texts, nlp, batch_size))
+    dim = nlp.vocab.vectors.shape[1]
+    return np.concatenate(blocks) if blocks else np.zeros((0, dim), dtype=np.float32)
+
+
+# ── INDEXES ────────────────────────────────────────────
+def spherical_kmeans(vectors, n_clusters, n_iter=10, sample=None, seed=0, chunk=65536):
+    """Unit-norm centroids maximising the summed cosine of their members."""
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    train = vectors if sample is None or n <= sample else vectors[np.sort(rng.choice(n, sample, replace=False))]
+    train = np.asarray(train, dtype=np.float32)
+    centroids = train[rng.choice(train.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = assign_nearest(train, centroids, chunk)
+        order = np.argsort(assign, kind="stable")
+        members = assign[order]
+        starts = np.flatnonzero(np.r_[True, members[1:] != members[:-1]])
+        sums = np.zeros_like(centroids)
+        sums[members[starts]] = np.add.reduceat(train[order], starts, axis=0)
+        empty = ~sums.any(axis=1)
+        if empty.any():                     # re-seed clusters that lost every member
+            sums[empty] = train[rng.choice(train.shape[0], int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def assign_nearest(vectors, centroids, chunk=65536):
+    """Index of the most similar centroid for every row, ``chunk`` rows at a time."""
+    out = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        out[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+class IVFIndex:
+    """Inverted-file ANN index over unit-norm vectors (cosine similarity)."""
+
+    def __init__(self, vectors, centroids, list_offsets, list_ids):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+
+    @classmethod
+    def build(cls, vectors, nlist=None, n_iter=10, seed=0):
+        n = vectors.shape[0]
+        nlist = max(1, min(n, nlist or int(4 * np.sqrt(n))))
+        centroids = spherical_kmeans(vectors, nlist, n_iter=n_iter, sample=256 * nlist, seed=seed)
+        assign = assign_nearest(vectors, centroids)
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=list_offsets[1:])
+        return cls(vectors, centroids, list_offsets, order)
+
+    def save(self, directory):
+        directory = Path(directory)
+        np.save(directory / "ivf_centroids.npy", self.centroids)
+        np.save(directory / "ivf_offsets.npy", self.list_offsets)
+        np.save(directory / "ivf_ids.npy", self.list_ids)
+
+    @classmethod
+    def load(cls, directory, vectors):
+        directory = Path(directory)
+        return cls(vectors, *(np.load(directory / f"ivf_{name}.npy") for name in ("centroids", "offsets", "ids")))
+
+    def default_nprobe(self, fraction=NPROBE_FRACTION):
+        """Lists ``search`` scans when no ``nprobe`` is given: ``fraction`` of ``nlist``, at least one."""
+        return max(1, int(np.ceil(fraction * self.centroids.shape[0])))
+
+    def search(self, query, k=10, nprobe=None):
+        """``(ids, scores)`` of the ``k`` best matches for one unit-norm query vector."""
+        nprobe = min(nprobe or self.default_nprobe(), self.centroids.shape[0])
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        cands = np.concatenate([self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe])
+        if cands.size == 0:
+            return cands, np.zeros(0, dtype=np.float32)
+        cands.sort()                                        # sequential reads from the memmap
+        scores = np.asarray(self.vectors[cands], dtype=np.float32) @ query
+        top = np.argpartition(-scores, min(k, scores.size) - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return cands[top], scores[top]
+
+
+class HNSWIndex:
+    """``hnswlib`` graph index (optional dependency) with the same ``search`` API."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    @classmethod
+    def build(cls, vectors, m=16, ef_construction=200, ef=64):
+        import hnswlib
+
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.init_index(max_elements=max(1, vectors.shape[0]), M=m, ef_construction=ef_construction)
+        graph.add_items(np.asarray(vectors, dtype=np.float32), np.arange(vectors.shape[0]))
+        graph.set_ef(ef)
+        return cls(graph)
+
+    def save(self, directory):
+        self.graph.save_index(str(Path(directory) / "hnsw.bin"))
+
+    @classmethod
+    def load(cls, directory, vectors, ef=64):
+        import hnswlib
+
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.load_index(str(Path(directory) / "hnsw.bin"), max_elements=max(1, vectors.shape[0]))
+        graph.set_ef(ef)
+        return cls(graph)
+
+    def search(self, query, k=10, nprobe=None):
+        k = min(k, self.graph.get_current_count())
+        ids, dists = self.graph.knn_query(query[None, :], k=k)
+        return ids[0].astype(np.int64), (1.0 - dists[0]).astype(np.float32)
+
+
+INDEXES = {"ivf": IVFIndex, "hnsw": HNSWIndex}
+
+
+def neighbour_pairs(vectors, index, k=10, threshold=0.9, nprobe=None):
+    """Yield ``(i, j)`` with i < j for every row's ANN neighbours scoring ≥ ``threshold``."""
+    seen = set()
+    for i in range(vectors.shape[0]):
+        query = np.asarray(vectors[i], dtype=np.float32)
+        if not query.any():
+            continue
+        ids, scores = index.search(query, k=k + 1, nprobe=nprobe)
+        for j, score in zip(ids.tolist(), scores.tolist()):
+            if j != i and score >= threshold:
+                pair = (i, j) if i < j else (j, i)
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+
+# ── ON-DISK STORE ──────────────────────────────────────
+class SemanticIndex:
+    """Cached document vectors of one corpus field plus their ANN index."""
+
+    def __init__(self, directory, vectors, file_names, index, nlp=None, model=SPACY_MODEL):
+        self.directory = directory
+        self.vectors = vectors
+        self.file_names = file_names
+        self.index = index
+        self._position = {name: i for i, name in enumerate(file_names)}
+        self._nlp = nlp
+        self.model = model
+
+    def similar(self, file_name, k=10, nprobe=None):
+        """``[(file_name, cosine), …]`` of the reports most similar to ``file_name``."""
+        i = self._position[file_name]
+        ids, scores = self.index.search(np.asarray(self.vectors[i], dtype=np.float32), k=k + 1, nprobe=nprobe)
+        return [(self.file_names[j], float(s)) for j, s in zip(ids.tolist(), scores.tolist()) if j != i][:k]
+
+    def similar_text(self, text, k=10, nprobe=None):
+        """Same as ``similar`` for free text (e.g. a new report's analysis)."""
+        if self._nlp is None:
+            self._nlp = load_vector_nlp(self.model)
+        query = embed_texts([text], self._nlp)[0]
+        ids, scores = self.index.search(query, k=k, nprobe=nprobe)
+        return [(self.file_names[j], float(s)) for j, s in zip(ids.tolist(), scores.tolist())]
+
+
+def open_semantic_index(json_path, field="analysis", model=SPACY_MODEL, nlp=None,
+                        backend="ivf", batch_size=VECTOR_BATCH):
+    """
+    Vectors + ANN index for ``FIELDS[field]`` of ``json_path``, built on first use.
+
+    ``json_path`` must be in the extracted-corpus layout – records with a
+    "File Name" and the ``FIELDS`` columns, as written by pdf_extraction.py –
+    since results are keyed by "File Name".  Rebuilt when the source content,
+    the model or the index backend changes.  ``nlp`` may be passed instead of
+    loading ``model``.
+    """
+    directory = cache_dir_for(json_path, f"vectors-{field}")
+    meta_path = directory / "meta.json"
+    sha1 = _file_sha1(json_path)
+    wanted = {"version": VECTORS_VERSION, "sha1": sha1, "model": model, "backend": backend}
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if all(meta.get(key) == value for key, value in wanted.items()):
+            vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+            index = INDEXES[backend].load(directory, vectors)
+            return SemanticIndex(directory, vectors, meta["file_names"], index, nlp, model)
+
+    table = load_record_table(json_path)
+    texts = table.values(FIELDS[field], default="")
+    texts = ["" if t in (None, "Not found") else str(t) for t in texts]
+    file_names = [str(name) for name in table.values("File Name", default="")]
+    nlp = nlp or load_vector_nlp(model)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    dim = nlp.vocab.vectors.shape[1]
+    vectors = np.lib.format.open_memmap(directory / "vectors.npy", mode="w+", dtype=np.float32,
+                                        shape=(len(texts), dim))
+    row = 0
+    for block in iter_text_vectors(texts, nlp, batch_size):
+        vectors[row:row + block.shape[0]] = block
+        row += block.shape[0]
+    vectors.flush()
+    del vectors
+    vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+
+    index = INDEXES[backend].build(vectors)
+    index.save(directory)
+    meta_path.write_text(json.dumps(dict(wanted, dim=dim, file_names=file_names)), encoding="utf-8")
+    return SemanticIndex(directory, vectors, file_names, index, nlp, model)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find the reports most similar to one report.")
+    parser.add_argument("corpus", help="final_extracted_data.json")
+    parser.add_argument("file_name", help="report to start from, e.g. 100003.pdf")
+    parser.add_argument("--field", choices=sorted(FIELDS), default="analysis")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--backend", choices=sorted(INDEXES), default="ivf")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    semantic = open_semantic_index(args.corpus, args.field, backend=args.backend)
+    print(f"index ready in {time.perf_counter() - t0:.2f}s ({len(semantic.file_names)} reports)")
+    t0 = time.perf_counter()
+    matches = semantic.similar(args.file_name, k=args.k)
+    print(f"query: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    for name, score in matches:
+        print(f"  {score:.3f}  {name}")
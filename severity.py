@@ -0,0 +1,90 @@
+"""
+severity.py
+───────────
+Injury and damage scoring shared by the cityscape and the aggregate cube.
+
+``map_injury_level`` / ``map_damage_level`` score the *set* of categories
+seen for one aircraft (headers of Injuries.txt / Aircraft Damage.txt).
+Both follow the same rule: an exact ``"Unknown"`` in the set wins, otherwise
+the most severe category decides – so a set's score is a max over ordinal
+category ranks (``ordinal_ranks``, "Unknown" ranked highest).
+``set_levels`` applies that rule to a presence matrix (rows × categories),
+``group_levels`` to per-row category codes as a groupby-max.
+"""
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN = "Unknown"
+
+
+# ── SET SCORING ────────────────────────────────────────
+def map_injury_level(injury_set):
+    if not injury_set or 'Unknown' in injury_set:
+        return 0
+    if any('Fatal' in i for i in injury_set):
+        return 4
+    if any('Serious' in i for i in injury_set):
+        return 3
+    if any('Minor' in i for i in injury_set):
+        return 2
+    if any('None' in i for i in injury_set):
+        return 1
+    return 0
+
+
+def map_damage_level(damage_set):
+    if not damage_set or 'Unknown' in damage_set:
+        return 1.0
+    if any("Destroyed" in d for d in damage_set):
+        return 3.0
+    if any("Substantial" in d for d in damage_set):
+        return 2.0
+    if any("Minor" in d for d in damage_set):
+        return 1.5
+    return 1.0
+
+
+# ── VECTORISED ─────────────────────────────────────────
+def ordinal_ranks(categories, score):
+    """
+    ``(ranks, levels)``: an int rank per category and the score of each
+    rank, such that ``score(set)`` is ``levels[max rank in the set]``.
+    Ranks follow the single-category scores; an exact ``"Unknown"`` gets
+    the top rank because it overrides everything else.
+    """
+    single = [float(score({c})) for c in categories]
+    distinct = sorted(set(single))
+    ranks = np.array([distinct.index(s) for s in single], dtype=np.int64)
+    ranks[[k for k, c in enumerate(categories) if c == UNKNOWN]] = len(distinct)
+    return ranks, np.array(distinct + [float(score({UNKNOWN}))])
+
+
+def set_levels(presence, categories, score):
+    """
+    ``score(set of present categories)`` for every row of ``presence``.
+
+    ``presence`` is a (rows, len(categories)) array, non-zero where the row
+    saw that category (e.g. a count rollup).
+    """
+    presence = np.asarray(presence) > 0
+    ranks, levels = ordinal_ranks(categories, score)
+    best = np.where(presence, ranks, -1).max(axis=1, initial=-1)
+    return np.where(best >= 0, levels[np.maximum(best, 0)], float(score(set())))
+
+
+def group_levels(groups, codes, categories, score, n_groups=None):
+    """
+    ``score`` of every group's category set from per-row ``groups`` (group
+    index, -1 = none) and ``codes`` (index into ``categories``, -1 = no
+    category): a groupby-max over ordinal ranks, no Python sets.  Groups
+    without rows score ``score(set())``.
+    """
+    groups, codes = np.asarray(groups), np.asarray(codes)
+    n_groups = int(groups.max()) + 1 if n_groups is None and groups.size else n_groups or 0
+    ranks, levels = ordinal_ranks(categories, score)
+    out = np.full(n_groups, float(score(set())))
+    keep = (codes >= 0) & (groups >= 0)
+    best = pd.Series(ranks[codes[keep]]).groupby(groups[keep]).max()
+    out[best.index.to_numpy()] = levels[best.to_numpy()]
+    return out
@@ -0,0 +1,290 @@
+"""
+similarity_engine.py
+────────────────────
+Pairwise text-similarity search that avoids scoring all N²/2 pairs.
+
+1. A *candidate backend* proposes pairs worth looking at:
+     • "exhaustive" – every pair (the original behaviour, for small corpora)
+     • "tfidf"      – sparse TF-IDF cosine, computed in row chunks, keeping
+                      pairs above ``threshold`` and/or each row's ``top_k``
+     • "minhash"    – MinHash signatures bucketed with LSH banding
+     • "embedding"  – spaCy word-vector document embeddings, neighbours from
+                      an IVF approximate-nearest-neighbour index (finds
+                      paraphrases that share few characters)
+   Candidates from every text field are unioned.
+2. Only the candidates are rescored exactly with ``difflib.SequenceMatcher``
+   in a ``ProcessPoolExecutor``.  The texts are shipped to each worker once
+   through the pool initializer; tasks only carry index pairs.
+3. Scored pairs are yielded as soon as their chunk finishes so callers can
+   stream them to disk instead of holding the full result list.
+4. With ``dedupe=True`` rows whose fields are all identical are searched
+   once and the scores fanned back out to every copy.
+"""
+
+import os
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from difflib import SequenceMatcher
+from itertools import combinations, islice
+
+import numpy as np
+
+from instrumentation import count
+
+# ── CANDIDATE BACKENDS ─────────────────────────────────
+def exhaustive_candidates(texts):
+    """Every (i, j) pair with i < j."""
+    return combinations(range(len(texts)), 2)
+
+
+def tfidf_candidates(texts, threshold=0.3, top_k=None, chunk_size=1000,
+                     analyzer="char_wb", ngram_range=(3, 5)):
+    """
+    Pairs whose TF-IDF cosine similarity is at least ``threshold``.
+
+    The similarity matrix is never materialised: rows are multiplied against
+    the corpus ``chunk_size`` at a time and filtered immediately.  With
+    ``top_k`` only each row's k best neighbours are kept.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if len(texts) < 2:
+        return
+    matrix = TfidfVectorizer(analyzer=analyzer, ngram_range=ngram_range).fit_transform(texts)
+    matrix_t = matrix.T.tocsc()
+    seen = set() if top_k else None
+
+    for start in range(0, matrix.shape[0], chunk_size):
+        block = (matrix[start:start + chunk_size] @ matrix_t).tocsr()
+        for row in range(block.shape[0]):
+            i = start + row
+            lo, hi = block.indptr[row], block.indptr[row + 1]
+            cols, sims = block.indices[lo:hi], block.data[lo:hi]
+            keep = (cols != i) & (sims >= threshold)
+            cols, sims = cols[keep], sims[keep]
+            if top_k:
+                if cols.size > top_k:
+                    best = np.argpartition(-sims, top_k - 1)[:top_k]
+                    cols = cols[best]
+                for j in cols.tolist():
+                    pair = (i, j) if i < j else (j, i)
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+            else:
+                for j in cols[cols > i].tolist():
+                    yield i, j
+
+
+def _shingle_hashes(text, shingle_size):
+    words = text.lower().split()
+    if len(words) < shingle_size:
+        words = words + [""] * (shingle_size - len(words))
+    grams = {" ".join(words[k:k + shingle_size]) for k in range(len(words) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.int64, count=len(grams))
+
+
+def minhash_candidates(texts, num_perm=64, bands=16, shingle_size=3, seed=1, max_bucket=500):
+    """
+    Pairs that share at least one LSH band of their MinHash signatures.
+
+    Word ``shingle_size``-grams are hashed with CRC32 and permuted with
+    ``num_perm`` universal hash functions.  Buckets larger than
+    ``max_bucket`` (boilerplate shared by everything) are skipped.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be divisible by bands")
+    prime = (1 << 31) - 1
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, prime, size=num_perm, dtype=np.int64)[:, None]
+    b = rng.integers(0, prime, size=num_perm, dtype=np.int64)[:, None]
+    rows = num_perm // bands
+
+    buckets = defaultdict(list)
+    for idx, text in enumerate(texts):
+        h = _shingle_hashes(text, shingle_size) % prime
+        signature = ((a * h[None, :] + b) % prime).min(axis=1)
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            buckets[key].append(idx)
+
+    seen = set()
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > max_bucket:
+            continue
+        for pair in combinations(members, 2):
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+def embedding_candidates(texts, threshold=0.8, top_k=10, nprobe=None, model=None, nlp=None):
+    """
+    Pairs whose document-vector cosine is at least ``threshold`` among each
+    row's ``top_k`` approximate nearest neighbours (see semantic_vectors).
+    """
+    from semantic_vectors import SPACY_MODEL, IVFIndex, embed_texts, load_vector_nlp, neighbour_pairs
+
+    if len(texts) < 2:
+        return
+    vectors = embed_texts(texts, nlp or load_vector_nlp(model or SPACY_MODEL))
+    yield from neighbour_pairs(vectors, IVFIndex.build(vectors), k=top_k or 10,
+                               threshold=threshold, nprobe=nprobe)
+
+
+BACKENDS = {
+    "exhaustive": exhaustive_candidates,
+    "tfidf": tfidf_candidates,
+    "minhash": minhash_candidates,
+    "embedding": embedding_candidates,
+}
+
+
+def candidate_pairs(fields, backend="tfidf", **backend_kwargs):
+    """Union of the backend's candidate pairs over every text field."""
+    try:
+        generate = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"unknown similarity backend {backend!r}; choose from {sorted(BACKENDS)}")
+    if backend == "exhaustive":
+        yield from generate(fields[0])
+        return
+    seen = set()
+    for texts in fields:
+        for pair in generate(texts, **backend_kwargs):
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+# ── DEDUPLICATION ──────────────────────────────────────
+def unique_rows(fields):
+    """
+    ``(unique_fields, index)``: ``fields`` restricted to the first copy of
+    every distinct row and, per original row, its position among them.
+    """
+    positions, index = {}, np.empty(len(fields[0]), dtype=np.int64)
+    for k, row in enumerate(zip(*fields)):
+        index[k] = positions.setdefault(row, len(positions))
+    first = np.unique(index, return_index=True)[1]
+    return [[texts[k] for k in first.tolist()] for texts in fields], index
+
+
+def copies(index):
+    """``[array of original rows]`` per unique row, from ``unique_rows``'s ``index``."""
+    if not len(index):
+        return []
+    order = np.argsort(index, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(index))[:-1])
+
+
+def directed_pairs(pairs, members):
+    """
+    ``pairs`` of unique rows plus ``(v, u)`` wherever a copy of ``v`` precedes
+    a copy of ``u`` – SequenceMatcher's ratio depends on the argument order.
+    """
+    for u, v in pairs:
+        yield u, v
+        if members[v][0] < members[u][-1]:
+            yield v, u
+
+
+def fan_out(members, scored, n_fields):
+    """
+    Directed scored pairs of unique rows → ``(i, j, scores)`` for every pair
+    of their copies with ``i < j``, plus every pair of identical rows at 1.0.
+    """
+    identical = (1.0,) * n_fields
+    for rows in members:
+        for i, j in combinations(rows.tolist(), 2):
+            yield i, j, identical
+    for u, v, scores in scored:
+        later = members[v]
+        for i in members[u].tolist():
+            for j in later[later > i].tolist():
+                yield i, j, scores
+
+
+# ── EXACT RESCORING ────────────────────────────────────
+_WORKER_FIELDS = None
+
+
+def _init_worker(fields):
+    global _WORKER_FIELDS
+    _WORKER_FIELDS = fields
+
+
+def sequence_ratio(text1, text2):
+    return SequenceMatcher(None, text1, text2).ratio()
+
+
+def _score_chunk(pairs):
+    return [
+        (i, j, tuple(sequence_ratio(texts[i], texts[j]) for texts in _WORKER_FIELDS))
+        for i, j in pairs
+    ]
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_pairs(fields, pairs, workers=None, chunk_size=2000, max_pending=None):
+    """
+    Rescore ``pairs`` with SequenceMatcher on every field in worker processes.
+
+    Yields ``(i, j, (ratio_field0, ratio_field1, …))`` in completion order.
+    At most ``max_pending`` chunks are in flight so memory stays bounded
+    however many candidates the backend produces.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(fields,)) as executor:
+        pending = set()
+        for chunk in _chunks(pairs, chunk_size):
+            count("similarity.pairs_scored", len(chunk))
+            pending.add(executor.submit(_score_chunk, chunk))
+            if len(pending) >= max_pending:
+                done = next(as_completed(pending))
+                pending.remove(done)
+                yield from done.result()
+        for done in as_completed(pending):
+            yield from done.result()
+
+
+def find_similar_pairs(fields, backend="tfidf", min_similarity=None, workers=None,
+                       chunk_size=2000, dedupe=False, **backend_kwargs):
+    """
+    Candidate generation + exact rescoring in one generator.
+
+    ``fields`` is a list of equally long text lists (e.g. analyses and
+    probable causes).  With ``min_similarity`` only pairs where some field
+    reaches that ratio are yielded.  With ``dedupe`` identical rows are
+    scored once (see ``fan_out``); a backend's ``top_k`` then counts
+    distinct neighbours.
+    """
+    if dedupe:
+        fields, index = unique_rows(fields)
+        members = copies(index)
+        count("similarity.unique_rows", len(fields[0]))
+    pairs = candidate_pairs(fields, backend, **backend_kwargs)
+    if dedupe:
+        pairs = directed_pairs(pairs, members)
+    scored = score_pairs(fields, pairs, workers=workers, chunk_size=chunk_size)
+    if dedupe:
+        scored = fan_out(members, scored, len(fields))
+    kept = 0
+    try:
+        for i, j, scores in scored:
+            if min_similarity is None or max(scores) >= min_similarity:
+                kept += 1
+                yield i, j, scores
+    finally:
+        count("similarity.pairs_kept", kept)
@@ -0,0 +1,214 @@
+"""
+theme_matcher.py
+────────────────
+Scan a text once for many regex "themes" (e.g. ``THEMES`` in
+new_clean_data_similarities.py) instead of running one ``re.search`` per theme.
+
+Every theme pattern is split into its top-level ``|`` branches (leading global
+inline flags such as ``(?i)`` are carried over to every branch).  Branches that
+start with a literal prefix (``"landing gear "``, ``"fuel selector"`` …, also
+behind a leading ``\b`` or non-capturing group) are indexed by that prefix; all prefixes are compiled into a single trie-shaped
+regex inside a lookahead, so one scan of the text reports every position where
+any prefix starts, at a per-position cost proportional to the prefix length
+rather than the number of themes.  Only the branches whose prefix occurs at a
+hit are then run with ``.match`` at that position.  Branches without a usable
+literal prefix fall back to their own ``search``, resumed one character after
+each match start so that overlapping matches are counted the same way.
+
+A theme "matches" exactly when ``re.search(pattern, text)`` would find it; the
+scan additionally reports how many start positions matched and their spans.
+"""
+
+import os
+import re
+from collections import defaultdict
+
+MIN_PREFIX = 2
+_META = set(".^$*+?{}[]\\|()")
+_QUANTIFIERS = set("*+?{")
+_GLOBAL_FLAGS_RE = re.compile(r"\(\?([aiLmsux]+)\)")
+_CASE_FLAGS = set("ix")         # inline flags under which a prefix is not a plain literal
+
+
+# ── PATTERN ANALYSIS ───────────────────────────────────
+def split_flags(pattern):
+    """``(flags, rest)``: the leading global inline flag groups (``"(?i)"``) and the pattern after them."""
+    flags, pos = [], 0
+    while True:
+        m = _GLOBAL_FLAGS_RE.match(pattern, pos)
+        if not m:
+            return "".join(flags), pattern[pos:]
+        flags.append(m.group(0))
+        pos = m.end()
+
+
+def split_branches(pattern):
+    """Split a regex at its top-level ``|`` (outside groups, classes and escapes)."""
+    branches, depth, in_class, escaped, start = [], 0, False, False, 0
+    for i, ch in enumerate(pattern):
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            branches.append(pattern[start:i])
+            start = i + 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def _group_end(pattern, start):
+    """Index of the ``)`` closing the group opened at ``pattern[start]``."""
+    depth, in_class, escaped = 0, False, False
+    for i in range(start, len(pattern)):
+        ch = pattern[i]
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _prefix(branch):
+    """``(prefix, complete)``: the literal prefix and whether it is all of ``branch``."""
+    prefix, i = [], 0
+    while i < len(branch):
+        if branch.startswith("\\b", i):           # zero-width: the characters after it still follow
+            i += 2
+            continue
+        if branch.startswith("(?:", i):
+            end = _group_end(branch, i)
+            if end < 0:
+                break
+            after = branch[end + 1:end + 2]
+            if after and after in "?*{":
+                break                               # the group may be skipped
+            alts = [_prefix(alt) for alt in split_branches(branch[i + 3:end])]
+            common = os.path.commonprefix([p for p, _ in alts])
+            prefix.append(common)
+            if after == "+" or len(alts) > 1 or not alts[0][1]:
+                break
+            i = end + 1
+            continue
+        ch = branch[i]
+        if ch in _META:
+            if ch in _QUANTIFIERS and prefix:
+                prefix[-1] = prefix[-1][:-1]        # the last literal is optional/repeated
+            break
+        prefix.append(ch)
+        i += 1
+    else:
+        return "".join(prefix), True
+    return "".join(prefix), False
+
+
+def literal_prefix(branch):
+    """Leading characters every match of ``branch`` must start with."""
+    return _prefix(branch)[0]
+
+
+def trie_regex(words):
+    """Regex source matching any of ``words``, factored into a prefix trie."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        end = node.get("") is True
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if end else body
+
+    return build(trie)
+
+
+# ── MATCHER ────────────────────────────────────────────
+class ThemeMatcher:
+    """Compiled set of named regex themes, scanned in a single pass."""
+
+    def __init__(self, themes, flags=0):
+        self.names = list(themes)
+        self._by_prefix = defaultdict(list)     # prefix -> [(theme index, compiled branch)]
+        self._residual = []                     # (theme index, compiled branch)
+        for t, pattern in enumerate(themes.values()):
+            inline, body = split_flags(pattern)
+            literal = not flags & (re.IGNORECASE | re.VERBOSE) and not _CASE_FLAGS & set(inline)
+            for branch in split_branches(body):
+                compiled = re.compile(inline + branch, flags)
+                prefix = literal_prefix(branch)
+                if len(prefix) >= MIN_PREFIX and literal:
+                    self._by_prefix[prefix].append((t, compiled))
+                else:
+                    self._residual.append((t, compiled))
+
+        self._by_first = defaultdict(list)      # first char -> [(prefix, branches)]
+        for prefix, branches in self._by_prefix.items():
+            self._by_first[prefix[0]].append((prefix, branches))
+        self._gate = re.compile(f"(?=(?:{trie_regex(self._by_prefix)}))") if self._by_prefix else None
+
+    def __len__(self):
+        return len(self.names)
+
+    def _hits(self, text):
+        """Yield ``(theme index, start, end)`` for every matching start position."""
+        if self._gate is not None:
+            for gate in self._gate.finditer(text):
+                pos = gate.start()
+                seen = set()
+                for prefix, branches in self._by_first[text[pos]]:
+                    if not text.startswith(prefix, pos):
+                        continue
+                    for t, compiled in branches:
+                        if t in seen:
+                            continue
+                        m = compiled.match(text, pos)
+                        if m:
+                            seen.add(t)
+                            yield t, m.start(), m.end()
+        for t, compiled in self._residual:
+            m = compiled.search(text)
+            while m:
+                yield t, m.start(), m.end()
+                m = compiled.search(text, m.start() + 1)
+
+    def scan(self, text):
+        """
+        ``{theme: {"count": n, "spans": [(start, end), …]}}`` for every theme found.
+
+        Themes are returned in definition order.
+        """
+        spans = defaultdict(dict)
+        for t, start, end in self._hits(text):
+            spans[t].setdefault(start, end)
+        return {
+            self.names[t]: {"count": len(spans[t]), "spans": sorted(spans[t].items())}
+            for t in sorted(spans)
+        }
+
+    def matched(self, text):
+        """Names of the themes ``text`` matches, in definition order."""
+        found = {t for t, _, _ in self._hits(text)}
+        return [self.names[t] for t in sorted(found)]
@@ -0,0 +1,391 @@
+"""
+viz_server.py
+─────────────
+Local HTTP server behind main_dashboard.html: cityscape, injury and theme
+figures are built on demand for any filter instead of by rerunning a script.
+
+    python viz_server.py                       # paths from rita.json, http://127.0.0.1:8050/
+    python viz_server.py --config rita.json --port 8080 --workers 4
+
+Endpoints
+  GET /                  main_dashboard.html (shows the live filters when served from here)
+  GET /figures/<file>    prebuilt views, manifest, plotly.min.js and layout templates
+                         (without a figures directory: plotly.min.js from the
+                         installed plotly and an empty manifest, live views only)
+  GET /api/options       aircraft, themes, injury levels and months to filter on
+  GET /api/figure/<view>?aircraft=A&aircraft=B&theme=T&injury=3&from=2015-01&to=2019-12
+                         ``view`` is cityscape, injuries or themes; the body is
+                         figure_export's compact figure JSON
+  GET /<path>            any other file below the figures directory's parent,
+                         e.g. the LOD drill-down pages a cityscape overview
+                         view links to
+
+Data
+  The aggregate cube (aggregate_cube.open_cube) is opened once at start-up
+  – built or refreshed from the sources if needed – and every figure is a
+  slice of it; nothing is re-parsed per request.  Figure building and the
+  Plotly JSON serialisation run in a process pool whose workers open the
+  same memory-mapped cube once, so the event loop only parses requests and
+  writes bytes.  Rendered figures are kept in an LRU cache keyed by the
+  normalised query (sorted, de-duplicated aircraft; missing and empty
+  parameters equal), and concurrent requests for the same query share one
+  build.
+
+Counts are (aircraft, pdf) pairs of Aircraft_names.txt, like every cube view.
+"""
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+
+from aggregate_cube import THEME_SEP, open_cube
+from cityscape_builder import build_cityscape_traces, cube_bars, grid_positions
+from figure_export import MANIFEST_FILE, PLOTLY_JS, compact_figure_json, template_file
+from severity import UNKNOWN, map_injury_level
+
+REPO_DIR = Path(__file__).resolve().parent
+DASHBOARD = REPO_DIR / "main_dashboard.html"
+HOST, PORT = "127.0.0.1", 8050
+CACHE_SIZE = 256                # rendered figures kept
+VIEWS = ("cityscape", "injuries", "themes")
+INJURY_LEVELS = {0: "Unknown", 1: "None", 2: "Minor", 3: "Serious", 4: "Fatal"}
+MONTH_RE = re.compile(r"\d{4}-\d{2}")
+SOURCE_KEYS = ("aircraft_names", "injuries", "damage", "extracted", "themes")
+MAX_HEADERS = 100
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# ── QUERIES ────────────────────────────────────────────
+class Query(NamedTuple):
+    view: str
+    aircraft: tuple = ()
+    theme: str = None
+    injury: int = None          # minimum injury level (severity.map_injury_level)
+    start: str = None           # "YYYY-MM", inclusive
+    end: str = None
+
+
+def parse_query(view, query_string):
+    """Normalised, hashable ``Query`` for ``/api/figure/<view>?…``; raises ``BadRequest``."""
+    if view not in VIEWS:
+        raise BadRequest(f"unknown view {view!r}; choose from {', '.join(VIEWS)}")
+    params = {k: [v.strip() for v in vs if v.strip()] for k, vs in parse_qs(query_string).items()}
+
+    def one(name):
+        values = params.get(name) or [None]
+        return values[-1]
+
+    injury = one("injury")
+    if injury is not None:
+        if not injury.isdigit() or int(injury) not in INJURY_LEVELS:
+            raise BadRequest(f"injury must be one of {sorted(INJURY_LEVELS)}")
+        injury = int(injury)
+    start, end = one("from"), one("to")
+    for month in (start, end):
+        if month is not None and not MONTH_RE.fullmatch(month):
+            raise BadRequest(f"months are YYYY-MM, got {month!r}")
+    return Query(view, tuple(sorted(set(params.get("aircraft", [])))), one("theme"), injury, start, end)
+
+
+def cube_filters(cube, query):
+    """``Cube.slice`` keyword filters for ``query``."""
+    where = {}
+    if query.aircraft:
+        where["aircraft"] = list(query.aircraft)
+    if query.theme:
+        where["theme"] = query.theme
+    if query.injury is not None:
+        where["injury"] = [c for c in cube.labels["injury"] if map_injury_level({c}) >= query.injury]
+    if query.start or query.end:
+        lo, hi = query.start or "0000-00", query.end or "9999-99"
+        where["month"] = [m for m in cube.labels["month"] if m != UNKNOWN and lo <= m <= hi]
+    return where
+
+
+def describe(query):
+    parts = []
+    if query.aircraft:
+        parts.append(", ".join(query.aircraft[:3]) + (f" +{len(query.aircraft) - 3}" if len(query.aircraft) > 3 else ""))
+    if query.theme:
+        parts.append(query.theme)
+    if query.injury is not None:
+        parts.append(f"injury ≥ {INJURY_LEVELS[query.injury]}")
+    if query.start or query.end:
+        parts.append(f"{query.start or '…'} – {query.end or '…'}")
+    return " · ".join(parts)
+
+
+# ── FIGURES ────────────────────────────────────────────
+def _layout(title, z_title):
+    return dict(
+        title=title,
+        scene=dict(
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            zaxis=dict(title=z_title),
+            aspectratio=dict(x=2, y=2, z=0.7)
+        ),
+        margin=dict(l=0, r=0, b=0, t=40),
+        showlegend=False
+    )
+
+
+def _count_bars(labels, counts, title, z_title, color):
+    keep = [k for k, n in enumerate(counts) if n]
+    x, y = grid_positions(len(keep), columns=20, spacing=5)
+    heights = [int(counts[k]) for k in keep]
+    texts = [f"<b>{labels[k]}</b><br>PDF Count: {n}" for k, n in zip(keep, heights)]
+    fig = go.Figure(build_cityscape_traces(x, y, 1.8, 1.8, heights, texts, color=color, opacity=0.85))
+    fig.update_layout(**_layout(title, z_title))
+    return fig
+
+
+def build_figure(cube, query):
+    """The ``go.Figure`` for ``query`` from ``cube``."""
+    where = cube_filters(cube, query)
+    suffix = describe(query)
+    if query.view == "cityscape":
+        names, heights, widths, colors, texts = cube_bars(cube, drop_empty=bool(where), **where)
+        x, y = grid_positions(len(names), columns=20, spacing=5)
+        fig = go.Figure(build_cityscape_traces(x, y, widths, widths, heights, texts, color=colors, opacity=0.7))
+        title = "Interactive Aircraft Incident Cityscape"
+        fig.update_layout(**_layout(f"{title} — {suffix}" if suffix else title, "Number of Documents"))
+        return fig
+    if query.view == "injuries":
+        labels = cube.labels["injury"]
+        counts = cube.slice("injury", **where)
+        title = "PDFs per Injury Category"
+        color = "rgba(255, 165, 0, 0.8)"
+    else:
+        labels = cube.theme_names()
+        per_set = cube.slice("themes", **where)
+        counts = [sum(int(n) for s, n in zip(cube.labels["themes"], per_set) if theme in s.split(THEME_SEP))
+                  for theme in labels]
+        title = "PDFs per Similarity Theme"
+        color = "rgba(0, 150, 136, 0.8)"
+    return _count_bars(labels, counts, f"{title} — {suffix}" if suffix else title, "Number of PDFs", color)
+
+
+def render(cube, query):
+    """``(figure JSON bytes, template file name or None, template text)`` for ``query``."""
+    payload, template = compact_figure_json(build_figure(cube, query))
+    name = text = None
+    if template is not None:
+        name, text = template_file(template)
+        payload["template"] = name
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), name, text
+
+
+_WORKER_CUBE = None
+
+
+def _init_worker(sources):
+    global _WORKER_CUBE
+    _WORKER_CUBE = open_cube(*sources)          # cached: memory-maps the .npy files
+
+
+def _render_in_worker(query):
+    return render(_WORKER_CUBE, query)
+
+
+class FigureCache:
+    """LRU of rendered figures; concurrent misses for one key share a single build."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._building = {}
+        self.hits = self.misses = 0
+
+    async def get(self, key, build):
+        """``(value, hit)``; ``build()`` is a coroutine function producing the value."""
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key], True
+        self.misses += 1
+        task = self._building.get(key)
+        if task is None:
+            task = self._building[key] = asyncio.ensure_future(build())
+            task.add_done_callback(partial(self._done, key))
+        return await asyncio.shield(task), False
+
+    def _done(self, key, task):
+        del self._building[key]
+        if not task.cancelled() and task.exception() is None:
+            self._items[key] = task.result()
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+# ── HTTP ───────────────────────────────────────────────
+async def _file_response(file):
+    ctype = mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+    return 200, ctype, await asyncio.to_thread(file.read_bytes), {}
+
+
+class VizServer:
+    def __init__(self, sources, figures_dir=None, workers=None, cache_size=CACHE_SIZE):
+        self.sources = sources
+        self.cube = open_cube(*sources)         # built / refreshed here, before any worker maps it
+        self.figures_dir = Path(figures_dir) if figures_dir else None
+        self.templates = {}
+        self.plotly_js = None                   # served when figures_dir has no plotly.min.js
+        self.cache = FigureCache(cache_size)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers:
+            self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(sources,))
+            self._render = _render_in_worker
+        else:                                   # in-process threads (debugging, single core)
+            self.executor = ThreadPoolExecutor(1)
+            self._render = partial(render, self.cube)
+        self.options = json.dumps({
+            "views": list(VIEWS),
+            "aircraft": sorted(self.cube.labels["aircraft"]),
+            "themes": self.cube.theme_names(),
+            "injury_levels": [{"level": k, "label": v} for k, v in INJURY_LEVELS.items()],
+            "months": sorted(m for m in self.cube.labels["month"] if m != UNKNOWN),
+        }, ensure_ascii=False).encode("utf-8")
+
+    async def figure(self, query):
+        async def build():
+            body, name, text = await asyncio.get_running_loop().run_in_executor(self.executor, self._render, query)
+            if name:
+                self.templates[name] = text.encode("utf-8")
+            return body
+        return await self.cache.get(query, build)
+
+    async def route(self, method, target):
+        """``(status, content type, body, extra headers)``."""
+        if method not in ("GET", "HEAD"):
+            return 405, "text/plain", b"method not allowed", {"Allow": "GET, HEAD"}
+        url = urlsplit(target)
+        path = unquote(url.path)
+        if path in ("/", "/index.html", "/" + DASHBOARD.name):
+            return 200, "text/html; charset=utf-8", await asyncio.to_thread(DASHBOARD.read_bytes), {}
+        if path == "/api/options":
+            return 200, "application/json", self.options, {}
+        if path.startswith("/api/figure/"):
+            try:
+                query = parse_query(path[len("/api/figure/"):], url.query)
+            except BadRequest as e:
+                return 400, "text/plain; charset=utf-8", str(e).encode("utf-8"), {}
+            body, hit = await self.figure(query)
+            return 200, "application/json", body, {"X-Cache": "hit" if hit else "miss"}
+        if path.startswith("/figures/"):
+            name = path[len("/figures/"):]
+            if name in self.templates:
+                return 200, "application/json", self.templates[name], {}
+            if self.figures_dir:
+                file = (self.figures_dir / name).resolve()
+                if file.parent == self.figures_dir.resolve() and file.is_file():
+                    return await _file_response(file)
+            if name == PLOTLY_JS:
+                if self.plotly_js is None:
+                    self.plotly_js = (await asyncio.to_thread(get_plotlyjs)).encode("utf-8")
+                return 200, "text/javascript; charset=utf-8", self.plotly_js, {}
+            if name == MANIFEST_FILE:
+                return 200, "application/json", b'{"views": []}', {}
+        elif self.figures_dir:
+            root = self.figures_dir.resolve().parent
+            file = (root / path.lstrip("/")).resolve()
+            if file.is_relative_to(root) and file.is_file():
+                return await _file_response(file)
+        return 404, "text/plain", b"not found", {}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                for _ in range(MAX_HEADERS):
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    status, ctype, body, extra = await self.route(method, target)
+                except Exception as e:            # a failed build must not kill the connection handler
+                    status, ctype, body, extra = 500, "text/plain", repr(e).encode("utf-8"), {}
+                head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {ctype}",
+                        f"Content-Length: {len(body)}", "Cache-Control: no-cache",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"serving http://{host}:{port}/  ({len(self.cube.labels['aircraft'])} aircraft, "
+              f"{self.cube.total} facts)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error"}
+
+
+# ── CLI ────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", help="rita config for the source paths (default: $RITA_CONFIG or rita.json)")
+    for key in SOURCE_KEYS + ("figures",):
+        parser.add_argument(f"--{key.replace('_', '-')}", help=f"override the {key} path")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, help="render processes (0: threads in this process)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    args = parser.parse_args(argv)
+
+    paths = {}
+    if args.config or os.environ.get("RITA_CONFIG") or (REPO_DIR / "rita.json").exists():
+        from rita import load_config
+        paths = load_config(args.config)["paths"]
+    paths.update({key: getattr(args, key) for key in SOURCE_KEYS + ("figures",) if getattr(args, key)})
+    missing = [key for key in SOURCE_KEYS[:3] if not paths.get(key)]
+    if missing:
+        raise SystemExit(f"no path for {', '.join(missing)} (use --config or --{missing[0].replace('_', '-')})")
+    sources = [paths.get(key) if paths.get(key) and os.path.exists(paths[key]) else None for key in SOURCE_KEYS]
+
+    server = VizServer(sources, paths.get("figures"), args.workers, args.cache_size)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()